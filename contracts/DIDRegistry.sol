@@ -8,8 +8,16 @@ import "./interfaces/IDIDRegistry.sol";
 contract DIDRegistry is IDIDRegistry {
     mapping(address => GovernanceMethod[]) public governanceMethods; // stores all governanceMethods for each did
     mapping(address => DIDDocument) public didDocuments; // stores did documents for each did
-    mapping(address => Proposal[]) public proposals; // mapps from did to all pending proposals for the did document
-    mapping(address => GovernanceMethod[][]) public proposedGovernanceMethods; // maps from DID to array of proposed GovernanceMetrhods arrays for each proposals. proposedGovernanceMethods[did][proposalIndex] => array of new GovernanceMethods that were proposed inside of the proposal.
+    // Pending proposals are stored per epoch of the did. Approving a proposal bumps the epoch, this invalidates all other
+    // pending proposals of the did in constant gas instead of deleting them one by one. Proposals of older epochs are
+    // rejected when a governance contract tries to resolve them.
+    mapping(address => uint) public didEpochs; // current epoch of each did
+    mapping(address => mapping(uint => Proposal[])) internal epochProposals; // did => epoch => all pending proposals for the did document
+    mapping(address => mapping(uint => GovernanceMethod[][])) internal epochProposedGovernanceMethods; // did => epoch => array of proposed GovernanceMetrhods arrays for each proposals. [proposalIndex] => array of new GovernanceMethods that were proposed inside of the proposal.
+    // DIDs created with createCommittedDIDDocument store only a keccak256 commitment of their document, the document itself
+    // is carried in the DocumentPayload event. Only owner and lastChanged are kept in didDocuments, the strings stay empty.
+    mapping(address => bytes32) public didDocumentHashes; // did => hash of the current document, 0 for DIDs that store the full document
+    mapping(address => mapping(uint => mapping(uint => bytes32))) internal epochProposedDocumentHashes; // did => epoch => proposalIndex => hash of the proposed document
     //mapping(address => uint[]) public proposalsIds; // mapps from dodcumte did to all pending proposals ids. NOTE we need this as solidity does not allow iterating over mappings :(. Maybe not needed
     uint public proposalCount; // used for creation of uiniqe id for each proposal
 
@@ -17,6 +25,9 @@ contract DIDRegistry is IDIDRegistry {
     event DIDDocumentUpdated(address indexed did, uint indexed proposalId);
     event ProposalCreated(uint indexed proposalId, address indexed did);
     event ProposalExecuted(uint indexed proposalId, Proposal executedProposal);
+    event ProposalsInvalidated(address indexed did, uint newEpoch); // all pending proposals of the did created before newEpoch are rejected
+    event DocumentPayload(address indexed did, bytes32 indexed documentHash, DIDDocument document); // full document of a commitment, see hashDIDDocument
+    event DIDDocumentCommitted(address indexed did, bytes32 indexed documentHash); // documentHash is the current document of the did
 
     // checks if the caller is dfeined as controller in the governance metrhod
     // Creates new did document with owner equel to msg.sender and prowided arguments
@@ -34,6 +45,35 @@ contract DIDRegistry is IDIDRegistry {
         string memory authenticationMethod,
         GovernanceMethod[] memory newGovernanceMethods
     ) external {
+        createDIDDocumentIn(
+            publicKey,
+            authenticationMethod,
+            newGovernanceMethods,
+            false
+        );
+    }
+
+    // Same as createDIDDocument, but the did document and all documents proposed for it later are stored only as their hash.
+    // The documents are emitted in DocumentPayload events from which they can be rebuilt off-chain.
+    function createCommittedDIDDocument(
+        string memory publicKey,
+        string memory authenticationMethod,
+        GovernanceMethod[] memory newGovernanceMethods
+    ) external {
+        createDIDDocumentIn(
+            publicKey,
+            authenticationMethod,
+            newGovernanceMethods,
+            true
+        );
+    }
+
+    function createDIDDocumentIn(
+        string memory publicKey,
+        string memory authenticationMethod,
+        GovernanceMethod[] memory newGovernanceMethods,
+        bool committed // store only the hash of the document
+    ) internal {
         require(bytes(publicKey).length > 0, "Public key is required");
         require(
             bytes(authenticationMethod).length > 0,
@@ -49,12 +89,22 @@ contract DIDRegistry is IDIDRegistry {
         // 3. those checks should be seeperate function validGovernanceMethods() that gets called here and returns bool
 
         // Creation of the DID document
-        didDocuments[msg.sender] = DIDDocument({
+        DIDDocument memory document = DIDDocument({
             owner: msg.sender,
             publicKey: publicKey,
             lastChanged: block.number,
             authenticationMethod: authenticationMethod
         });
+        if (committed) {
+            bytes32 documentHash = hashDIDDocument(document);
+            didDocuments[msg.sender].owner = msg.sender;
+            didDocuments[msg.sender].lastChanged = block.number;
+            didDocumentHashes[msg.sender] = documentHash;
+            emit DocumentPayload(msg.sender, documentHash, document);
+            emit DIDDocumentCommitted(msg.sender, documentHash);
+        } else {
+            didDocuments[msg.sender] = document;
+        }
 
         // copying the governanceMethods for the new DIDdocument
         for (uint i = 0; i < newGovernanceMethods.length; i++) {
@@ -147,16 +197,32 @@ contract DIDRegistry is IDIDRegistry {
             "This governanceMethod is still Blocked until certain timestamp"
         );
 
-        uint proposalIndex = proposals[did].length;
-        proposals[did].push(
+        Proposal[] storage pendingProposals = currentProposals(did);
+        GovernanceMethod[][] storage proposedMethods = currentProposedGovernanceMethods(did);
+        uint proposalIndex = pendingProposals.length;
+        if (didDocumentHashes[did] != bytes32(0)) {
+            // committed did: the proposal keeps owner and lastChanged, the strings are only part of the hash and the event
+            bytes32 documentHash = hashDIDDocument(newDIDDocument);
+            epochProposedDocumentHashes[did][didEpochs[did]][
+                proposalIndex
+            ] = documentHash;
+            emit DocumentPayload(did, documentHash, newDIDDocument);
+            newDIDDocument = DIDDocument({
+                owner: newDIDDocument.owner,
+                publicKey: "",
+                authenticationMethod: "",
+                lastChanged: newDIDDocument.lastChanged
+            });
+        }
+        pendingProposals.push(
             Proposal({
                 did: did,
                 newDidDocument: newDIDDocument,
                 status: ProposalStatus.Pending,
-                governanceMethodIndex: governanceMethodIndex,
+                governanceMethodIndex: uint64(governanceMethodIndex), // bounds checked by governanceMethods[did] above
                 caller: caller,
-                id: proposalCount,
-                timestamp: block.timestamp
+                id: uint64(proposalCount),
+                timestamp: uint64(block.timestamp)
             })
         );
 
@@ -166,11 +232,11 @@ contract DIDRegistry is IDIDRegistry {
             chosenGovernanceMethod.editRightsLevel <=
             EditRightsLevel.DelegatesCreation
         ) {
-            if (proposedGovernanceMethods[did].length <= proposalIndex) {
-                proposedGovernanceMethods[did].push(); // we need to first initite the array
+            if (proposedMethods.length <= proposalIndex) {
+                proposedMethods.push(); // we need to first initite the array
             }
             for (uint i = 0; i < newGovernanceMethods.length; i++) {
-                proposedGovernanceMethods[did][proposalIndex].push(
+                proposedMethods[proposalIndex].push(
                     newGovernanceMethods[i]
                 ); // copying the newgovernanceMethods into proposedGovernanceMethods array
             }
@@ -190,8 +256,8 @@ contract DIDRegistry is IDIDRegistry {
                 newGovernanceMethods.length == 1,
                 "You need to provide only one governanceMethod if you EditRightsLevel == SelfGovernance"
             );
-            proposedGovernanceMethods[did].push();
-            proposedGovernanceMethods[did][proposalIndex].push(
+            proposedMethods.push();
+            proposedMethods[proposalIndex].push(
                 newGovernanceMethods[0]
             );
             // case where EditRightsLevel == Documnt. Here we do not allow for overriding of any GovernanceMethod. Therefore user should not provide any new governanceMethods
@@ -201,7 +267,7 @@ contract DIDRegistry is IDIDRegistry {
                 "You are not allow to provide any new governanceMethods as yur EditRightsLevel==Document"
             );
             // still we need to initate a new array of propposed GovernanceMethod otherwise we will lose the  correct inedxing of propposedGovernance methods
-            proposedGovernanceMethods[did].push();
+            proposedMethods.push();
         }
 
         // call to the GovernanceMethodContract initiating the GovernanceProcess
@@ -209,7 +275,7 @@ contract DIDRegistry is IDIDRegistry {
         IGovernanceMethod(chosenGovernanceMethod.contractAddres)
             .initiateGovernanceProcess(
                 proposalCount, // unique id of proposa
-                proposalIndex, //  index needed for the retirvel of the proposal <= proposals[did][proposalIndex]
+                proposalIndex, //  index needed for the retirvel of the proposal <= getProposal(did, proposalIndex)
                 did, // did for witch the proposal was createed
                 governanceMethodIndex,
                 msg.sender
@@ -268,7 +334,14 @@ contract DIDRegistry is IDIDRegistry {
         address did,
         bool approved
     ) external override {
-        Proposal memory proposal = proposals[did][proposalIndex];
+        Proposal[] storage pendingProposals = currentProposals(did);
+        GovernanceMethod[][] storage proposedMethods = currentProposedGovernanceMethods(did);
+        // proposals of an earlier epoch are not in pendingProposals anymore, they were rejected when another proposal got approved
+        require(
+            pendingProposals.length > proposalIndex,
+            "Proposal is not pending anymore"
+        );
+        Proposal memory proposal = pendingProposals[proposalIndex];
         require(proposal.id == proposalId, "Proposal ids must match");
         require(
             proposal.status == ProposalStatus.Pending,
@@ -300,13 +373,19 @@ contract DIDRegistry is IDIDRegistry {
         ) {
             // If porposal was approwed we execute it!
 
-            // First we set its status to Approwd and we delete all othre proposals
+            // First we set its status to Approwd, all othre proposals are invalidated below
             proposal.status = ProposalStatus.Approved;
-            // NOTE: now all other proposals that were started for this did are not valid anymore(as we overrite the whole did document we also likely make changes to the GovernanceMethods avaiable for this did) therefore we must resolve them
-            resolveUnvalidProposals(did, proposal);
 
             // Apply the update to the diddocumet
             didDocuments[proposal.did] = proposal.newDidDocument;
+            // for committed dids the strings of the document are empty, the proposed hash becomes the current document
+            if (didDocumentHashes[did] != bytes32(0)) {
+                bytes32 documentHash = epochProposedDocumentHashes[did][
+                    didEpochs[did]
+                ][proposalIndex];
+                didDocumentHashes[did] = documentHash;
+                emit DIDDocumentCommitted(did, documentHash);
+            }
 
             // in case where editRightsLevel == All we copy all new GovernanceMetrhods that were provided during Proposal createion
             if (usedGovernanceMethod.editRightsLevel == EditRightsLevel.All) {
@@ -314,11 +393,11 @@ contract DIDRegistry is IDIDRegistry {
                 delete governanceMethods[did];
                 for (
                     uint i = 0;
-                    i < proposedGovernanceMethods[did][proposalIndex].length;
+                    i < proposedMethods[proposalIndex].length;
                     i++
                 ) {
                     governanceMethods[did].push(
-                        proposedGovernanceMethods[did][proposalIndex][i]
+                        proposedMethods[proposalIndex][i]
                     );
                 }
                 // in case where editRightsLevel == SelfGovenance we only update the governancemethods that was used
@@ -328,14 +407,14 @@ contract DIDRegistry is IDIDRegistry {
             ) {
                 governanceMethods[did][
                     proposal.governanceMethodIndex
-                ] = proposedGovernanceMethods[did][proposalIndex][0];
+                ] = proposedMethods[proposalIndex][0];
                 for (
                     uint i = 1;
-                    i < proposedGovernanceMethods[did][proposalIndex].length;
+                    i < proposedMethods[proposalIndex].length;
                     i++
                 ) {
                     governanceMethods[did].push(
-                        proposedGovernanceMethods[did][proposalIndex][i]
+                        proposedMethods[proposalIndex][i]
                     );
                 }
             }
@@ -346,45 +425,43 @@ contract DIDRegistry is IDIDRegistry {
             ) {
                 governanceMethods[did][
                     proposal.governanceMethodIndex
-                ] = proposedGovernanceMethods[did][proposalIndex][0];
+                ] = proposedMethods[proposalIndex][0];
             }
             // in case where EidtRights == Document we do not update any governanceMethods so we are done
             // NOTE: it should be disscuessed if all other proposal do become unvalid in such scenario, in current implementation they do
 
-            // we do not need the old preposed methods as their propposals became unvalid
-            delete proposedGovernanceMethods[did];
-            // ass all proposals for the did address got resolved we can delete the whole array of those propossals from the contract
-            delete proposals[did];
+            // NOTE: now all other proposals that were started for this did are not valid anymore(as we overrite the whole did document we also likely make changes to the GovernanceMethods avaiable for this did)
+            // starting a new epoch rejects all of them at once, their proposals and preposed methods are left behind in the old epoch
+            didEpochs[did]++;
+            emit ProposalsInvalidated(did, didEpochs[did]);
         } else {
             //Note: if the proposal was rejected than we do not need to do anything with all other proposals
             proposal.status = ProposalStatus.Rejected;
             // stiil we delete this proposal from the proposals array as we allow resoliving an proposal only once.
-            delete proposals[did][proposalIndex];
+            delete pendingProposals[proposalIndex];
+            delete epochProposedDocumentHashes[did][didEpochs[did]][proposalIndex];
         }
         emit DIDDocumentUpdated(proposal.did, proposalId);
         emit ProposalExecuted(proposalId, proposal);
     }
 
-    // gets did for witch all other proposals than the validProposal should be resolved to rejected and deleted from the proosals array
-    // should be called after some proposals gets executed as Approved
-    function resolveUnvalidProposals(
-        address did,
-        Proposal memory validProposal
-    ) internal {
-        Proposal[] memory pendingProposals = proposals[did];
-        for (uint i = 0; i < pendingProposals.length; i++) {
-            // we performe this actions for all other proposal than the validProposal
-            if (pendingProposals[i].id != validProposal.id) {
-                Proposal memory unvalidProposal = pendingProposals[i];
-                unvalidProposal.status = ProposalStatus.Rejected;
-                // emiting the event
-                emit ProposalExecuted(
-                    pendingProposals[i].id,
-                    pendingProposals[i]
-                );
-                delete proposals[did][i];
-            }
-        }
+    function currentProposals(
+        address did
+    ) internal view returns (Proposal[] storage) {
+        return epochProposals[did][didEpochs[did]];
+    }
+
+    function currentProposedGovernanceMethods(
+        address did
+    ) internal view returns (GovernanceMethod[][] storage) {
+        return epochProposedGovernanceMethods[did][didEpochs[did]];
+    }
+
+    // commitment of a did document, equal to keccak256 of the data of its DocumentPayload event
+    function hashDIDDocument(
+        DIDDocument memory document
+    ) public pure returns (bytes32) {
+        return keccak256(abi.encode(document));
     }
 
     //#################### Getter methods #####################################
@@ -407,9 +484,37 @@ contract DIDRegistry is IDIDRegistry {
         return governanceMethods[did][governanceMethodIndex];
     }
 
+    // get pending proposal for did document with ProposalIndex, same as the former public proposals mapping
+    function proposals(
+        address did,
+        uint proposalIndex
+    ) public view returns (Proposal memory) {
+        return currentProposals(did)[proposalIndex];
+    }
+
+    // get one of the GovernanceMethods proposed inside of the pending proposal with ProposalIndex
+    function proposedGovernanceMethods(
+        address did,
+        uint proposalIndex,
+        uint governanceMethodIndex
+    ) public view returns (GovernanceMethod memory) {
+        return
+            currentProposedGovernanceMethods(did)[proposalIndex][
+                governanceMethodIndex
+            ];
+    }
+
+    // get the hash of the document proposed inside of the pending proposal with ProposalIndex, 0 if the did is not committed
+    function proposedDocumentHash(
+        address did,
+        uint proposalIndex
+    ) public view returns (bytes32) {
+        return epochProposedDocumentHashes[did][didEpochs[did]][proposalIndex];
+    }
+
     // get all pending proposals for the did
     function getProposals(address did) public view returns (Proposal[] memory) {
-        return proposals[did];
+        return currentProposals(did);
     }
 
     // get pending proposal for did document with ProposalIndex
@@ -417,12 +522,12 @@ contract DIDRegistry is IDIDRegistry {
         address did,
         uint proposalIndex
     ) public view returns (Proposal memory) {
-        return proposals[did][proposalIndex];
+        return currentProposals(did)[proposalIndex];
     }
 
     // return s number of proposals that are pending for the did documnet
     function getProposalCount(address did) public view returns (uint) {
-        return proposals[did].length;
+        return currentProposals(did).length;
     }
 
     //DEBUGGING FOR ONLYCONTROLLER MODIFIER
@@ -13,11 +13,12 @@ contract CounterLogicGovernance is IGovernanceMethod {
         Rejected
     }
     struct GovernanceProcess {
+        // status and the ids share one slot, did and governanceMethodIndex the next one
         GovernanceStatus governanceStatus;
-        uint proposalId;
-        uint proposalIndex;
+        uint64 proposalId;
+        uint64 proposalIndex;
         address did;
-        uint governanceMethodIndex;
+        uint64 governanceMethodIndex;
         address[] controllers;
         ////// GOvernanceMetrho specific stuff
         uint requiredYesVotes; // requred numbers of votes to reject the propoosal
@@ -66,10 +67,10 @@ contract CounterLogicGovernance is IGovernanceMethod {
 
         governanceProcesses[proposalId] = GovernanceProcess({
             governanceStatus: GovernanceStatus.Pending,
-            proposalId: proposalId,
-            proposalIndex: proposalIndex,
+            proposalId: uint64(proposalId),
+            proposalIndex: uint64(proposalIndex),
             did: did,
-            governanceMethodIndex: governanceMethodIndex,
+            governanceMethodIndex: uint64(governanceMethodIndex),
             requiredYesVotes: govMethodDetails.intArgs[0],
             requiredNoVotes: govMethodDetails.intArgs[1],
             yesVotes: 0,
@@ -2,8 +2,13 @@
 pragma solidity ^0.8.20;
 import "../interfaces/IGovernanceMethod.sol";
 import "../interfaces/IDIDRegistry.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
 
 //Simple governance method with a counter where controllers can vote Yes or No, and the proposal is executed if the specified number of Yes votes is reached
+//
+//Merkle mode: with stringArgs[0] == "merkle" only the root of the allowed voters is stored (intArgs = [treashold, root])
+//and every vote carries a membership proof, see scripts/merkle_controllers.py. The controllers of the
+//governance method then only list who may create proposals.
 
 contract NofMGovernance is IGovernanceMethod {
     enum GovernanceStatus {
@@ -11,20 +16,25 @@ contract NofMGovernance is IGovernanceMethod {
         Approved
     }
     struct GovernanceProcess {
+        // status and the ids share one slot, did and governanceMethodIndex the next one
         GovernanceStatus governanceStatus;
-        uint proposalId;
-        uint proposalIndex;
+        uint64 proposalId;
+        uint64 proposalIndex;
         address did;
-        uint governanceMethodIndex;
+        uint64 governanceMethodIndex;
         address caller;
         uint treashold;
         address[] controllers;
+        bytes32 controllersRoot; // set in merkle mode instead of controllers
         uint votesCount;
         bool approved;
     }
 
     address public didRegistryAddress;
     mapping(uint => GovernanceProcess) public governanceProcesses; // GovernanceMethods mapped by  PropossalID of proposals for witch the governanceProcesses was created
+    mapping(uint => mapping(address => bool)) public voted; // voters that already voted with a proof, by proposalId
+
+    bytes32 constant MERKLE_MODE = keccak256("merkle");
 
     constructor(address _didRegistryAddress) {
         didRegistryAddress = _didRegistryAddress;
@@ -48,15 +58,18 @@ contract NofMGovernance is IGovernanceMethod {
         // TODO: !! mechanism for handling invalid governanceMethod configuration need to be disscuesed
         // simplest one would be rejecting the proposal if the arguments would not follow requirements
 
+        bool merkleMode = usesControllersRoot(govMethodDetails);
+
         governanceProcesses[proposalId] = GovernanceProcess({
             governanceStatus: GovernanceStatus.Pending,
-            proposalId: proposalId,
-            proposalIndex: proposalIndex,
+            proposalId: uint64(proposalId),
+            proposalIndex: uint64(proposalIndex),
             did: did,
-            governanceMethodIndex: governanceMethodIndex,
+            governanceMethodIndex: uint64(governanceMethodIndex),
             caller: caller,
             treashold: govMethodDetails.intArgs[0],
-            controllers: govMethodDetails.controllers,
+            controllers: merkleMode ? new address[](0) : govMethodDetails.controllers,
+            controllersRoot: merkleMode ? bytes32(govMethodDetails.intArgs[1]) : bytes32(0),
             votesCount: 0,
             approved: false
         });
@@ -70,6 +83,24 @@ contract NofMGovernance is IGovernanceMethod {
         );
         // TODO: Check if governanceProcess exists
 
+        countVote(proposalId);
+    }
+
+    // vote of a governance process in merkle mode, proof shows that msg.sender is a leaf of the controllers root
+    function voteWithProof(uint proposalId, bytes32[] calldata proof) external {
+        bytes32 root = governanceProcesses[proposalId].controllersRoot;
+        require(root != bytes32(0), "Governance process has no controllers root");
+        require(
+            MerkleProof.verifyCalldata(proof, root, controllerLeaf(msg.sender)),
+            "Only controllers can vote."
+        );
+        require(!voted[proposalId][msg.sender], "Controller already voted");
+        voted[proposalId][msg.sender] = true;
+
+        countVote(proposalId);
+    }
+
+    function countVote(uint proposalId) internal {
         governanceProcesses[proposalId].votesCount++;
 
         // in case we arrived at the treashold the propsal should be resolved to accepted
@@ -93,6 +124,12 @@ contract NofMGovernance is IGovernanceMethod {
     function validateGovernanceMethodConfiguration(
         GovernanceMethod calldata governanceMethodConfiguration
     ) external override returns (bool) {
+        if (
+            usesControllersRoot(governanceMethodConfiguration) &&
+            (governanceMethodConfiguration.intArgs.length < 2 || governanceMethodConfiguration.intArgs[1] == 0)
+        ) {
+            return false;
+        }
         if (governanceMethodConfiguration.intArgs[0] > 0) {
             return (true);
         } else {
@@ -103,4 +140,14 @@ contract NofMGovernance is IGovernanceMethod {
         GovernanceProcess storage proposal = governanceProcesses[proposalId];
         return proposal.approved;
     }
+
+    function usesControllersRoot(GovernanceMethod memory governanceMethod) internal pure returns (bool) {
+        return governanceMethod.stringArgs.length > 0 && keccak256(bytes(governanceMethod.stringArgs[0])) == MERKLE_MODE;
+    }
+
+    // leaves are hashed like the other values signed in Credentials.sol, the 32 byte preimage
+    // can not be mistaken for an inner node of the tree (64 bytes)
+    function controllerLeaf(address account) internal pure returns (bytes32) {
+        return keccak256(abi.encode(account));
+    }
 }
@@ -9,7 +9,7 @@ contract OffChainGovernanceController is IGovernanceMethod {
     using ECDSA for bytes32;
 
     struct OffChainProposal {
-        uint id;
+        uint64 id; // shares a slot with did
         address did;
         bytes32 hash;
         uint requiredYesVotes;
@@ -59,7 +59,7 @@ contract OffChainGovernanceController is IGovernanceMethod {
                 "Invalid governance method configuration");
 
         OffChainProposal storage newProposal = proposals[did].push();
-        newProposal.id = proposalId;
+        newProposal.id = uint64(proposalId);
         newProposal.did = did;
         newProposal.hash = keccak256(abi.encode(proposalId, proposalIndex, did, block.timestamp));
         newProposal.requiredYesVotes = govMethodDetails.intArgs[0];
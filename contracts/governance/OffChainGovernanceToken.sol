@@ -11,7 +11,7 @@ contract OffChainGovernanceToken is IGovernanceMethod {
     using ECDSA for bytes32;
 
     struct OffChainProposal {
-        uint id;
+        uint64 id; // shares a slot with did
         address did;
         bytes32 hash;
         //uint votingDeadline;
@@ -35,7 +35,28 @@ contract OffChainGovernanceToken is IGovernanceMethod {
         uint issuerIndex;
     }
 
+    // parameters of the aggregated submission, every token is the entry tokenIndexes[i] of a token
+    // list the issuer signed as a whole instead of carrying a signature of its own
+    struct AggregatedVoteParams {
+        address[] voters;
+        bool[] votes;
+        bytes[] signatures;
+        address[] tokens;
+        uint[] tokenIndexes;
+        bytes32[] tokenHashes;
+        bytes issuerSignature;
+        address issuer;
+        uint issuerIndex;
+    }
+
     mapping(address => OffChainProposal[]) public proposals;
+    // issuer => keccak256(abi.encodePacked(tokenHashes)) of token lists whose signature was verified
+    mapping(address => mapping(bytes32 => bool)) public verifiedTokenLists;
+    // registry proposal id => issuer => the token list of its first aggregated submission,
+    // later submissions of the issuer to the proposal have to use the same list
+    mapping(uint => mapping(address => bytes32)) public proposalTokenLists;
+    // registry proposal id => token list => bitmap words of the list indexes that already voted
+    mapping(uint => mapping(bytes32 => mapping(uint => uint))) private usedTokens;
  
 
     Credentials private credentials;
@@ -97,7 +118,7 @@ contract OffChainGovernanceToken is IGovernanceMethod {
         );
 
         OffChainProposal memory newProposal = OffChainProposal({
-            id: proposalId,
+            id: uint64(proposalId),
             did: did,
             hash: keccak256(abi.encode(proposalId, proposalIndex, did, block.timestamp)),
             requiredYesVotes: govMethodDetails.intArgs[0],
@@ -178,6 +199,97 @@ contract OffChainGovernanceToken is IGovernanceMethod {
             proposal.noVotes
         );
     }
+    // Aggregated submission: the issuer signs the list of token hashes keccak256(abi.encode(token))
+    // once instead of every token, the list signature is recovered only the first time it is used.
+    // Duplicate voters of a batch are rejected by the ascending order, a token can only vote once
+    // per proposal as the proposal accepts a single list of every issuer.
+    function submitAggregatedVotes(
+        uint proposalId,
+        address did,
+        AggregatedVoteParams calldata voteParams
+    ) external {
+        require(proposals[did].length > proposalId, "Invalid proposal ID");
+        OffChainProposal storage proposal = proposals[did][proposalId];
+        require(!proposal.resolved, "Proposal already resolved");
+
+        uint len = voteParams.voters.length;
+        require(
+            len == voteParams.votes.length &&
+            len == voteParams.signatures.length &&
+            len == voteParams.tokens.length &&
+            len == voteParams.tokenIndexes.length,
+            "Array length mismatch"
+        );
+
+        require(
+            proposal.issuers[voteParams.issuerIndex] == voteParams.issuer,
+            "No such issuer for this governanceProcesses"
+        );
+
+        bytes32 listHash = keccak256(abi.encodePacked(voteParams.tokenHashes));
+        if (!verifiedTokenLists[voteParams.issuer][listHash]) {
+            require(
+                credentials.recoverSigner(listHash, voteParams.issuerSignature) == voteParams.issuer,
+                "Invalid token list signature"
+            );
+            verifiedTokenLists[voteParams.issuer][listHash] = true;
+        }
+        bytes32 proposalList = proposalTokenLists[proposal.id][voteParams.issuer];
+        if (proposalList == bytes32(0)) {
+            proposalTokenLists[proposal.id][voteParams.issuer] = listHash;
+        } else {
+            require(proposalList == listHash, "Token list differs from the list of the proposal");
+        }
+        mapping(uint => uint) storage used = usedTokens[proposal.id][listHash];
+        bytes32 proposalHash = proposal.hash;
+        uint yesVotes = proposal.yesVotes;
+        uint noVotes = proposal.noVotes;
+
+        for (uint i = 0; i < len; i++) {
+            require(voteParams.voters[i] != address(0), "Invalid voter address");
+
+            if (i > 0) {
+                require(voteParams.voters[i] > voteParams.voters[i-1], "Voters must be in ascending order");
+            }
+
+            uint index = voteParams.tokenIndexes[i];
+            require(
+                index < voteParams.tokenHashes.length &&
+                keccak256(abi.encode(voteParams.tokens[i])) == voteParams.tokenHashes[index],
+                "Invalid token"
+            );
+            uint bit = 1 << (index & 0xff);
+            uint word = used[index >> 8];
+            require(word & bit == 0, "Token already used");
+            used[index >> 8] = word | bit;
+
+            require(
+                credentials.recoverSigner(
+                    keccak256(abi.encodePacked(proposalHash, voteParams.votes[i])),
+                    voteParams.signatures[i]
+                ) == voteParams.voters[i],
+                "Invalid signature"
+            );
+
+            if (voteParams.votes[i]) {
+                yesVotes++;
+                if (yesVotes >= proposal.requiredYesVotes) {
+                    proposal.yesVotes = yesVotes;
+                    proposal.noVotes = noVotes;
+                    resolveProposal(proposalId, did);
+                    return;
+                }
+            } else {
+                noVotes++;
+            }
+        }
+
+        proposal.yesVotes = yesVotes;
+        proposal.noVotes = noVotes;
+
+        emit VotesSubmitted(proposalId, did, yesVotes, noVotes);
+    }
+
     // votes are verified using credentials contract (offchain)
     /*function submitVotes(
         uint proposalId,
@@ -8,7 +8,7 @@ import "hardhat/console.sol";
 
 contract OffChainVC is IGovernanceMethod {
     struct OffChainProposal {
-        uint id;
+        uint64 id; // shares a slot with did
         address did;
         bytes32 hash;
         uint requiredYesVotes;
@@ -38,7 +38,27 @@ contract OffChainVC is IGovernanceMethod {
         VerifiableCredential credential;
     }
 
+    // vote of the aggregated submission, the credential is the entry credentialIndex of a credential
+    // list the issuer signed as a whole, so it carries no signature of its own
+    struct AggregatedVote {
+        address voter;
+        bool vote;
+        bytes voteSignature;
+        uint credentialIndex;
+        string[] strings;
+        uint256[] numbers;
+        bool[] bools;
+        address[] addresses;
+    }
+
     mapping(address => OffChainProposal[]) public proposals;
+    // issuer => keccak256(abi.encodePacked(credentialHashes)) of credential lists whose signature was verified
+    mapping(address => mapping(bytes32 => bool)) public verifiedCredentialLists;
+    // registry proposal id => issuer => the credential list of its first aggregated submission,
+    // later submissions of the issuer to the proposal have to use the same list
+    mapping(uint => mapping(address => bytes32)) public proposalCredentialLists;
+    // registry proposal id => credential list => bitmap words of the list indexes that already voted
+    mapping(uint => mapping(bytes32 => mapping(uint => uint))) private usedCredentials;
     Credentials private credentialsContract;
     address public didRegistry;
 
@@ -82,7 +102,7 @@ contract OffChainVC is IGovernanceMethod {
         );
 
         OffChainProposal storage newProposal = proposals[did].push();
-        newProposal.id = proposalId;
+        newProposal.id = uint64(proposalId);
         newProposal.did = did;
         newProposal.hash = keccak256(
             abi.encode(proposalId, proposalIndex, did, block.timestamp)
@@ -184,6 +204,106 @@ contract OffChainVC is IGovernanceMethod {
         );
     }
 
+    // Aggregated submission: instead of one signature per credential the issuer signs the list of
+    // hashes of all credentials it issued once, the list signature is recovered only the first time
+    // it is used. Every vote points to its credential in the list, the credential is hashed in place.
+    // Duplicate voters of a batch are rejected by the ascending order, a credential can only vote once
+    // per proposal as the proposal accepts a single list of every issuer.
+    function submitAggregatedVotes(
+        uint proposalId,
+        address did,
+        AggregatedVote[] calldata votesData,
+        bytes32[] calldata credentialHashes,
+        bytes calldata issuerSignature,
+        address issuer,
+        uint issuerIndex
+    ) external {
+        require(proposals[did].length > proposalId, "Invalid proposal ID");
+        OffChainProposal storage proposal = proposals[did][proposalId];
+        require(!proposal.resolved, "Proposal already resolved");
+        require(proposal.issuers[issuerIndex] == issuer, "Invalid issuer");
+
+        uint len = votesData.length;
+        require(len > 0, "No votes provided");
+
+        bytes32 listHash = verifyCredentialList(proposal.id, credentialHashes, issuerSignature, issuer);
+        mapping(uint => uint) storage used = usedCredentials[proposal.id][listHash];
+        bytes32 proposalHash = proposal.hash;
+        uint yesVotes = proposal.yesVotes;
+        uint noVotes = proposal.noVotes;
+
+        for (uint i = 0; i < len; i++) {
+            AggregatedVote calldata voteData = votesData[i];
+            require(voteData.voter != address(0), "Invalid voter address");
+            if (i > 0) {
+                require(
+                    voteData.voter > votesData[i - 1].voter,
+                    "Voters must be in ascending order"
+                );
+            }
+
+            uint index = voteData.credentialIndex;
+            require(
+                index < credentialHashes.length &&
+                    keccak256(abi.encode(voteData.strings, voteData.numbers, voteData.bools, voteData.addresses)) ==
+                    credentialHashes[index],
+                "not valid credentials"
+            );
+            uint bit = 1 << (index & 0xff);
+            uint word = used[index >> 8];
+            require(word & bit == 0, "Credential already used");
+            used[index >> 8] = word | bit;
+
+            require(
+                credentialsContract.recoverSigner(
+                    keccak256(abi.encodePacked(proposalHash, voteData.vote)),
+                    voteData.voteSignature
+                ) == voteData.voter,
+                "Invalid vote signature"
+            );
+
+            if (voteData.vote) {
+                yesVotes++;
+                if (yesVotes >= proposal.requiredYesVotes) {
+                    proposal.yesVotes = yesVotes;
+                    proposal.noVotes = noVotes;
+                    resolveProposal(proposalId, did);
+                    return;
+                }
+            } else {
+                noVotes++;
+            }
+        }
+
+        proposal.yesVotes = yesVotes;
+        proposal.noVotes = noVotes;
+
+        emit VotesSubmitted(proposalId, did, yesVotes, noVotes);
+    }
+
+    // checks the issuer signature of the list once and binds the proposal to the first list of the issuer
+    function verifyCredentialList(
+        uint registryProposalId,
+        bytes32[] calldata credentialHashes,
+        bytes calldata issuerSignature,
+        address issuer
+    ) private returns (bytes32 listHash) {
+        listHash = keccak256(abi.encodePacked(credentialHashes));
+        if (!verifiedCredentialLists[issuer][listHash]) {
+            require(
+                credentialsContract.recoverSigner(listHash, issuerSignature) == issuer,
+                "Invalid credential list signature"
+            );
+            verifiedCredentialLists[issuer][listHash] = true;
+        }
+        bytes32 proposalList = proposalCredentialLists[registryProposalId][issuer];
+        if (proposalList == bytes32(0)) {
+            proposalCredentialLists[registryProposalId][issuer] = listHash;
+        } else {
+            require(proposalList == listHash, "Credential list differs from the list of the proposal");
+        }
+    }
+
     function resolveProposal(uint proposalId, address did) internal {
         OffChainProposal storage proposal = proposals[did][proposalId];
         require(!proposal.resolved, "Proposal already resolved");
@@ -11,7 +11,7 @@ import "hardhat/console.sol";
 
 contract OffChainVCAlternative is IGovernanceMethod {
     struct OffChainProposal {
-        uint id;
+        uint64 id; // shares a slot with did
         address did;
         bytes32 hash;
         uint requiredYesVotes;
@@ -158,7 +158,7 @@ contract OffChainVCAlternative is IGovernanceMethod {
         require(validateGovernanceMethodConfiguration(govMethodDetails), "Invalid governance method configuration");
 
         OffChainProposal storage newProposal = proposals[did].push();
-        newProposal.id = proposalId;
+        newProposal.id = uint64(proposalId);
         newProposal.did = did;
         newProposal.hash = keccak256(abi.encode(proposalId, proposalIndex, did, block.timestamp));
         newProposal.requiredYesVotes = govMethodDetails.intArgs[0];
@@ -3,10 +3,15 @@ pragma solidity ^0.8.0;
 
 import "../interfaces/IGovernanceMethod.sol";
 import "../interfaces/IDIDRegistry.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
 import "hardhat/console.sol";
 
 import {AutomationCompatibleInterface} from "@chainlink/contracts/src/v0.8/automation/AutomationCompatible.sol";
 
+// Merkle mode: with stringArgs[0] == "merkle" only the root of the allowed voters is stored
+// (intArgs = [duration, root, number of voters]) and every vote carries a membership proof,
+// see scripts/merkle_controllers.py. The controllers of the governance method then only list
+// who may create proposals.
 contract TimeLimitedGovernance is IGovernanceMethod, AutomationCompatibleInterface {
     enum GovernanceStatus {
         Pending,
@@ -17,12 +22,14 @@ contract TimeLimitedGovernance is IGovernanceMethod, AutomationCompatibleInterfa
     uint public proposalCount;
 
     struct GovernanceProcess {
+        // status and the ids share one slot, did and governanceMethodIndex the next one
         GovernanceStatus governanceStatus;
-        uint proposalId;
-        uint proposalIndex;
+        uint64 proposalId;
+        uint64 proposalIndex;
         address did;
-        uint governanceMethodIndex;
+        uint64 governanceMethodIndex;
         address[] controllers;
+        bytes32 controllersRoot; // set in merkle mode instead of controllers
 
         uint requiredYesVotes;
         uint requiredNoVotes;
@@ -38,6 +45,15 @@ contract TimeLimitedGovernance is IGovernanceMethod, AutomationCompatibleInterfa
     mapping(uint => mapping(address => bool)) voters;
 
     address public didRegistryAddress;
+    bytes32 constant MERKLE_MODE = keccak256("merkle");
+
+    // Governance processes ordered by the end of their voting period, a binary min-heap of (end << 128 | proposalId).
+    // Voting periods differ per governance method, so the processes do not expire in creation order. The heap gives
+    // checkUpkeep the next expiry in O(1) and lets one performUpkeep finalize every expired process up to the batch size.
+    // Processes resolved by votes or finalizeProposal stay in the heap and are dropped when they reach the top, so do
+    // the entries of a process the registry initiated again under the same proposal id before its newer entry expired.
+    uint[] internal expiryQueue;
+    uint public constant MAX_UPKEEP_BATCH = 50; // processes finalized by one performUpkeep at most
     event ProposalFinalized(uint proposalId, GovernanceStatus status);
 
     constructor(address _didRegistryAddress) {
@@ -51,6 +67,11 @@ contract TimeLimitedGovernance is IGovernanceMethod, AutomationCompatibleInterfa
         uint governanceMethodIndex,
         address caller
     ) external {
+        require(
+            msg.sender == didRegistryAddress,
+            "Only DIDRegistry can call this function"
+        );
+
         GovernanceMethod memory govMethodDetails = IDIDRegistry(didRegistryAddress)
             .getGovernanceMethod(did, governanceMethodIndex);
 
@@ -59,20 +80,25 @@ contract TimeLimitedGovernance is IGovernanceMethod, AutomationCompatibleInterfa
             "Voting Period Cannot be less than 5 minutes!"
         );
 
+        bool merkleMode = usesControllersRoot(govMethodDetails);
+        uint controllersCount = merkleMode ? govMethodDetails.intArgs[2] : govMethodDetails.controllers.length;
+
         governanceProcesses[proposalId] = GovernanceProcess({
             governanceStatus: GovernanceStatus.Pending,
-            proposalId: proposalId,
-            proposalIndex: proposalIndex,
+            proposalId: uint64(proposalId),
+            proposalIndex: uint64(proposalIndex),
             did: did,
-            governanceMethodIndex: governanceMethodIndex,
-            requiredYesVotes: (govMethodDetails.controllers.length / 2) + 1,
-            requiredNoVotes: (govMethodDetails.controllers.length / 2) + 1,
+            governanceMethodIndex: uint64(governanceMethodIndex),
+            requiredYesVotes: (controllersCount / 2) + 1,
+            requiredNoVotes: (controllersCount / 2) + 1,
             yesVotes: 0,
             noVotes: 0,
-            controllers: govMethodDetails.controllers,
+            controllers: merkleMode ? new address[](0) : govMethodDetails.controllers,
+            controllersRoot: merkleMode ? bytes32(govMethodDetails.intArgs[1]) : bytes32(0),
             startTime: block.timestamp,
             duration: govMethodDetails.intArgs[0]
         });
+        pushExpiry(block.timestamp, govMethodDetails.intArgs[0], proposalId);
 
         proposalCount++;
         //console.log(governanceProcesses[proposalId].requiredYesVotes);
@@ -115,10 +141,26 @@ contract TimeLimitedGovernance is IGovernanceMethod, AutomationCompatibleInterfa
     }
 
     function vote(uint proposalId, bool approve) external {
-        GovernanceProcess storage proposal = governanceProcesses[proposalId];
-
         require(isController(msg.sender, proposalId), "Only controllers can vote");
 
+        castVote(proposalId, approve);
+    }
+
+    // vote of a governance process in merkle mode, proof shows that msg.sender is a leaf of the controllers root
+    function voteWithProof(uint proposalId, bool approve, bytes32[] calldata proof) external {
+        bytes32 root = governanceProcesses[proposalId].controllersRoot;
+        require(root != bytes32(0), "Governance process has no controllers root");
+        require(
+            MerkleProof.verifyCalldata(proof, root, controllerLeaf(msg.sender)),
+            "Only controllers can vote"
+        );
+
+        castVote(proposalId, approve);
+    }
+
+    function castVote(uint proposalId, bool approve) internal {
+        GovernanceProcess storage proposal = governanceProcesses[proposalId];
+
         require(
             block.timestamp <= proposal.startTime + proposal.duration,
             "Voting period has ended"
@@ -167,32 +209,150 @@ contract TimeLimitedGovernance is IGovernanceMethod, AutomationCompatibleInterfa
 
 
     //Chainlink will be calling this function periodically
+    // performData is the number of expired heap entries, counted by walking only the expired part of the heap from its top
     function checkUpkeep(
         bytes calldata
     ) external view override returns (bool upkeepNeeded, bytes memory performData) {
-        for (uint i = 0; i < proposalCount; i++) {
-            GovernanceProcess storage proposal = governanceProcesses[i];
-            if (
-                proposal.governanceStatus == GovernanceStatus.Pending &&
-                block.timestamp > proposal.startTime + proposal.duration
-            ) {
-                upkeepNeeded = true;
-                performData = abi.encode(i);
-                return (upkeepNeeded, performData);
+        uint count = 0;
+        // every counted entry pops one node and pushes at most its two children
+        uint[] memory nodes = new uint[](MAX_UPKEEP_BATCH + 1);
+        uint stackSize = 0;
+        if (expiryQueue.length > 0) {
+            nodes[stackSize++] = 0;
+        }
+        while (stackSize > 0 && count < MAX_UPKEEP_BATCH) {
+            uint node = nodes[--stackSize];
+            if (!expired(expiryQueue[node])) {
+                continue; // all entries below are not expired either
+            }
+            count++;
+            uint child = 2 * node + 1;
+            if (child < expiryQueue.length) {
+                nodes[stackSize++] = child;
             }
+            if (child + 1 < expiryQueue.length) {
+                nodes[stackSize++] = child + 1;
+            }
+        }
+        if (count == 0) {
+            return (false, bytes(""));
         }
-        return (false, bytes(""));
+        return (true, abi.encode(count));
     }
 
-    //If checkUpkeep returns true, Chainlink will call this function, which will then finalize the proposal    
+    //If checkUpkeep returns true, Chainlink will call this function, which will then finalize the expired proposals
+    // takes up to performData (capped at MAX_UPKEEP_BATCH) expired entries from the top of the heap, anyone can call it
     function performUpkeep(bytes calldata performData) external override {
-        uint proposalId = abi.decode(performData, (uint));
-        finalizeProposal(proposalId);
+        uint maxCount = abi.decode(performData, (uint));
+        if (maxCount > MAX_UPKEEP_BATCH) {
+            maxCount = MAX_UPKEEP_BATCH;
+        }
+        for (uint i = 0; i < maxCount && expiryQueue.length > 0; i++) {
+            uint entry = expiryQueue[0];
+            if (!expired(entry)) {
+                break;
+            }
+            popExpiry();
+            uint proposalId = uint128(entry);
+            GovernanceProcess storage proposal = governanceProcesses[proposalId];
+            if (proposal.governanceStatus != GovernanceStatus.Pending) {
+                continue; // already resolved by votes or finalizeProposal
+            }
+            if (block.timestamp <= proposal.startTime + proposal.duration) {
+                continue; // stale entry, the process was initiated again and its own entry is still queued
+            }
+            if (!pendingInRegistry(proposal)) {
+                // another proposal of the did got approved, the registry already rejected this one and would revert
+                proposal.governanceStatus = GovernanceStatus.Rejected;
+                emit ProposalFinalized(proposalId, proposal.governanceStatus);
+                continue;
+            }
+            finalizeProposal(proposalId);
+        }
+    }
+
+    // number of entries in the expiry heap, including processes that were resolved before they expired
+    function expiryQueueLength() external view returns (uint) {
+        return expiryQueue.length;
+    }
+
+    // end of the voting period of the next process to expire, 0 if no process is queued
+    function nextExpiry() external view returns (uint) {
+        return expiryQueue.length > 0 ? expiryQueue[0] >> 128 : 0;
+    }
+
+    function expired(uint entry) internal view returns (bool) {
+        return block.timestamp > entry >> 128; // same condition as finalizeProposal
+    }
+
+    function pendingInRegistry(GovernanceProcess storage proposal) internal view returns (bool) {
+        IDIDRegistry registry = IDIDRegistry(didRegistryAddress);
+        if (registry.getProposalCount(proposal.did) <= proposal.proposalIndex) {
+            return false;
+        }
+        Proposal memory registryProposal = registry.getProposal(proposal.did, proposal.proposalIndex);
+        // rejected proposals are deleted in the registry, their zeroed slot has no did
+        return registryProposal.did == proposal.did &&
+            registryProposal.id == proposal.proposalId &&
+            registryProposal.status == ProposalStatus.Pending;
+    }
+
+    function pushExpiry(uint startTime, uint duration, uint proposalId) internal {
+        // voting periods that do not fit into 128 bits never end in practice
+        uint end = duration < type(uint128).max - startTime ? startTime + duration : type(uint128).max;
+        uint entry = (end << 128) | proposalId;
+        uint node = expiryQueue.length;
+        expiryQueue.push(entry);
+        while (node > 0) {
+            uint parent = (node - 1) / 2;
+            uint parentEntry = expiryQueue[parent];
+            if (parentEntry <= entry) {
+                break;
+            }
+            expiryQueue[node] = parentEntry;
+            node = parent;
+        }
+        expiryQueue[node] = entry;
+    }
+
+    function popExpiry() internal {
+        uint last = expiryQueue[expiryQueue.length - 1];
+        expiryQueue.pop();
+        uint length = expiryQueue.length;
+        if (length == 0) {
+            return;
+        }
+        uint node = 0;
+        while (true) {
+            uint child = 2 * node + 1;
+            if (child >= length) {
+                break;
+            }
+            uint childEntry = expiryQueue[child];
+            if (child + 1 < length && expiryQueue[child + 1] < childEntry) {
+                child++;
+                childEntry = expiryQueue[child];
+            }
+            if (last <= childEntry) {
+                break;
+            }
+            expiryQueue[node] = childEntry;
+            node = child;
+        }
+        expiryQueue[node] = last;
     }
 
     function validateGovernanceMethodConfiguration(
         GovernanceMethod memory governanceMethodConfiguration
     ) public pure override returns (bool) {
+        if (usesControllersRoot(governanceMethodConfiguration)) {
+            // root and number of voters are needed to compute the required votes
+            if (governanceMethodConfiguration.intArgs.length < 3 ||
+                governanceMethodConfiguration.intArgs[1] == 0 ||
+                governanceMethodConfiguration.intArgs[2] == 0) {
+                return false;
+            }
+        }
         return governanceMethodConfiguration.intArgs[0] >= 300; // At least 5 minutes
     }
 
@@ -205,4 +365,14 @@ contract TimeLimitedGovernance is IGovernanceMethod, AutomationCompatibleInterfa
         }
         return false;
     }
+
+    function usesControllersRoot(GovernanceMethod memory governanceMethod) internal pure returns (bool) {
+        return governanceMethod.stringArgs.length > 0 && keccak256(bytes(governanceMethod.stringArgs[0])) == MERKLE_MODE;
+    }
+
+    // leaves are hashed like the other values signed in Credentials.sol, the 32 byte preimage
+    // can not be mistaken for an inner node of the tree (64 bytes)
+    function controllerLeaf(address account) internal pure returns (bytes32) {
+        return keccak256(abi.encode(account));
+    }
 }
@@ -14,11 +14,12 @@ contract WeightedMajorityGovernance is IGovernanceMethod {
         Rejected
     }
     struct GovernanceProcess {
+        // status and the ids share one slot, did and governanceMethodIndex the next one
         GovernanceStatus governanceStatus;
-        uint proposalId;
-        uint proposalIndex;
+        uint64 proposalId;
+        uint64 proposalIndex;
         address did;
-        uint governanceMethodIndex;
+        uint64 governanceMethodIndex;
         address[] controllers;
         address[] issuers;
         GovernanceMethodType governanceMethodType;
@@ -62,10 +63,10 @@ contract WeightedMajorityGovernance is IGovernanceMethod {
 
         governanceProcesses[proposalId] = GovernanceProcess({
             governanceStatus: GovernanceStatus.Pending,
-            proposalId: proposalId,
-            proposalIndex: proposalIndex,
+            proposalId: uint64(proposalId),
+            proposalIndex: uint64(proposalIndex),
             did: did,
-            governanceMethodIndex: governanceMethodIndex,
+            governanceMethodIndex: uint64(governanceMethodIndex),
             requiredYesVotes: govMethodDetails.intArgs[
                 govMethodDetails.intArgs.length - 1
             ],
@@ -259,6 +260,318 @@ contract WeightedMajorityGovernance is IGovernanceMethod {
         castVote(approve, proposalId, weight);
     }
 
+    // Batched voting: many signed votes are submitted in one transaction by any account.
+    // Every voter signs keccak256(abi.encodePacked(getProposalHash(proposalId), approve)) and
+    // the votes have to be sorted by voter address in ascending order (like OffChainGovernanceController.submitVotes).
+    // Weights are summed in memory and the tally is written to storage once per batch,
+    // votes after the one that decides the proposal are ignored.
+    struct VCVote {
+        address voter;
+        bool approve;
+        bytes voteSignature;
+        // VC of the voter, addresses[0] has to be the voter
+        string[] strings;
+        uint256[] numbers;
+        bool[] bools;
+        address[] addresses;
+        bytes credentialSignature;
+    }
+
+    struct TokenVote {
+        address ownerAddress;
+        uint weight;
+        bool approve;
+        bytes tokenSignature;
+    }
+
+    struct BatchTally {
+        uint yesVotes;
+        uint noVotes;
+        uint requiredYesVotes;
+        uint requiredNoVotes;
+        bool decided;
+    }
+
+    function getProposalHash(uint proposalId) public view returns (bytes32) {
+        GovernanceProcess storage proposal = governanceProcesses[proposalId];
+        return
+            keccak256(
+                abi.encode(
+                    address(this),
+                    proposalId,
+                    proposal.proposalIndex,
+                    proposal.did
+                )
+            );
+    }
+
+    function submitControllerVotes(
+        uint proposalId,
+        address[] calldata controllerAddresses,
+        uint[] calldata controllerIndexes,
+        bool[] calldata votes,
+        bytes[] calldata signatures
+    ) external {
+        GovernanceProcess storage proposal = governanceProcesses[proposalId];
+        require(
+            controllerAddresses.length == controllerIndexes.length &&
+                controllerAddresses.length == votes.length &&
+                controllerAddresses.length == signatures.length,
+            "Length mismatch"
+        );
+        BatchTally memory tally = startBatch(
+            proposal,
+            GovernanceMethodType.Controllers
+        );
+        bytes32 proposalHash = getProposalHash(proposalId);
+
+        for (uint i = 0; i < controllerAddresses.length && !tally.decided; i++) {
+            address voter = controllerAddresses[i];
+            if (i > 0) {
+                require(
+                    voter > controllerAddresses[i - 1],
+                    "Voters must be in ascending order"
+                );
+            }
+            // checked against storage, isController() would copy the whole controllers array per vote
+            require(
+                proposal.controllers.length > controllerIndexes[i],
+                "controllerIndex out of controllers array"
+            );
+            require(
+                proposal.controllers[controllerIndexes[i]] == voter,
+                "address of the voter must be in controllers array"
+            );
+            require(
+                verifyVoteSignature(proposalHash, voter, votes[i], signatures[i]),
+                "Invalid vote signature"
+            );
+            require(!voters[proposalId][voter], "Controller already voted");
+            voters[proposalId][voter] = true;
+
+            addVote(tally, votes[i], proposal.weights[controllerIndexes[i]]);
+            emit VoteCast(proposalId, voter, votes[i]);
+        }
+
+        finishBatch(proposalId, tally);
+    }
+
+    function submitVCVotes(
+        uint proposalId,
+        VCVote[] calldata votes,
+        address issuer,
+        uint issuerIndex
+    ) external {
+        GovernanceProcess storage proposal = governanceProcesses[proposalId];
+        BatchTally memory tally = startBatch(proposal, GovernanceMethodType.VC);
+        require(
+            proposal.issuers[issuerIndex] == issuer,
+            "No such issuer for this governanceProcesses"
+        );
+        bytes32 proposalHash = getProposalHash(proposalId);
+
+        for (uint i = 0; i < votes.length && !tally.decided; i++) {
+            VCVote calldata vote = votes[i];
+            if (i > 0) {
+                require(
+                    vote.voter > votes[i - 1].voter,
+                    "Voters must be in ascending order"
+                );
+            }
+            require(
+                vote.addresses[0] == vote.voter,
+                "Voter must be the owner of the VC"
+            );
+            require(
+                credentials.verifyVCSignature(
+                    issuer,
+                    vote.strings,
+                    vote.numbers,
+                    vote.bools,
+                    vote.addresses,
+                    vote.credentialSignature
+                ),
+                "not valid credentials"
+            );
+            require(
+                verifyVoteSignature(
+                    proposalHash,
+                    vote.voter,
+                    vote.approve,
+                    vote.voteSignature
+                ),
+                "Invalid vote signature"
+            );
+            require(!voters[proposalId][vote.voter], "VC already voted");
+            voters[proposalId][vote.voter] = true;
+
+            addVote(tally, vote.approve, vote.numbers[0]);
+            emit VoteCast(proposalId, vote.voter, vote.approve);
+        }
+
+        finishBatch(proposalId, tally);
+    }
+
+    // tokens are bearer credentials like in voteWithToken, the votes need no voter signature
+    function submitTokenVotes(
+        uint proposalId,
+        TokenVote[] calldata votes,
+        address issuer,
+        uint issuerIndex
+    ) external {
+        GovernanceProcess storage proposal = governanceProcesses[proposalId];
+        BatchTally memory tally = startBatch(
+            proposal,
+            GovernanceMethodType.Token
+        );
+        require(
+            proposal.issuers[issuerIndex] == issuer,
+            "No such issuer for this governanceProcesses"
+        );
+
+        for (uint i = 0; i < votes.length && !tally.decided; i++) {
+            TokenVote calldata vote = votes[i];
+            if (i > 0) {
+                require(
+                    vote.ownerAddress > votes[i - 1].ownerAddress,
+                    "Voters must be in ascending order"
+                );
+            }
+            require(
+                credentials.recoverTokenSigner(
+                    vote.ownerAddress,
+                    vote.weight,
+                    vote.tokenSignature
+                ) == issuer,
+                "not valid token Signature"
+            );
+
+            address tokenHash = address(
+                uint160(
+                    uint256(credentials.hashToken(vote.weight, vote.ownerAddress))
+                )
+            );
+            require(!voters[proposalId][tokenHash], "Token already voted");
+            voters[proposalId][tokenHash] = true;
+
+            addVote(tally, vote.approve, vote.weight);
+            emit VoteCast(proposalId, vote.ownerAddress, vote.approve);
+        }
+
+        finishBatch(proposalId, tally);
+    }
+
+    // token holders sign their vote, voteSignatures[i] belongs to votes[i].ownerAddress
+    function submitTokenHolderVotes(
+        uint proposalId,
+        TokenVote[] calldata votes,
+        bytes[] calldata voteSignatures,
+        address issuer,
+        uint issuerIndex
+    ) external {
+        GovernanceProcess storage proposal = governanceProcesses[proposalId];
+        require(votes.length == voteSignatures.length, "Length mismatch");
+        BatchTally memory tally = startBatch(
+            proposal,
+            GovernanceMethodType.TokenHolder
+        );
+        require(
+            proposal.issuers[issuerIndex] == issuer,
+            "No such issuer for this governanceProcesses"
+        );
+        bytes32 proposalHash = getProposalHash(proposalId);
+
+        for (uint i = 0; i < votes.length && !tally.decided; i++) {
+            TokenVote calldata vote = votes[i];
+            if (i > 0) {
+                require(
+                    vote.ownerAddress > votes[i - 1].ownerAddress,
+                    "Voters must be in ascending order"
+                );
+            }
+            require(
+                credentials.recoverTokenSigner(
+                    vote.ownerAddress,
+                    vote.weight,
+                    vote.tokenSignature
+                ) == issuer,
+                "not valid token Signature"
+            );
+            require(
+                verifyVoteSignature(
+                    proposalHash,
+                    vote.ownerAddress,
+                    vote.approve,
+                    voteSignatures[i]
+                ),
+                "Invalid vote signature"
+            );
+            require(
+                !voters[proposalId][vote.ownerAddress],
+                "Token owner already voted"
+            );
+            voters[proposalId][vote.ownerAddress] = true;
+
+            addVote(tally, vote.approve, vote.weight);
+            emit VoteCast(proposalId, vote.ownerAddress, vote.approve);
+        }
+
+        finishBatch(proposalId, tally);
+    }
+
+    function verifyVoteSignature(
+        bytes32 proposalHash,
+        address voter,
+        bool approve,
+        bytes calldata signature
+    ) internal view returns (bool) {
+        bytes32 messageHash = keccak256(abi.encodePacked(proposalHash, approve));
+        return credentials.recoverSigner(messageHash, signature) == voter;
+    }
+
+    function startBatch(
+        GovernanceProcess storage proposal,
+        GovernanceMethodType governanceMethodType
+    ) internal view returns (BatchTally memory) {
+        require(
+            proposal.governanceMethodType == governanceMethodType,
+            "GovernanceMethodType does not match the batch"
+        );
+        require(
+            proposal.governanceStatus == GovernanceStatus.Pending,
+            "GovernanceProcess already approved"
+        );
+        return
+            BatchTally({
+                yesVotes: proposal.yesVotes,
+                noVotes: proposal.noVotes,
+                requiredYesVotes: proposal.requiredYesVotes,
+                requiredNoVotes: proposal.requiredNoVotes,
+                decided: false
+            });
+    }
+
+    function addVote(
+        BatchTally memory tally,
+        bool approve,
+        uint wheight
+    ) internal pure {
+        if (approve) {
+            tally.yesVotes += wheight;
+        } else {
+            tally.noVotes += wheight;
+        }
+        tally.decided =
+            tally.yesVotes >= tally.requiredYesVotes ||
+            tally.noVotes >= tally.requiredNoVotes;
+    }
+
+    function finishBatch(uint proposalId, BatchTally memory tally) internal {
+        governanceProcesses[proposalId].yesVotes = tally.yesVotes;
+        governanceProcesses[proposalId].noVotes = tally.noVotes;
+        resolveIfDecided(proposalId);
+    }
+
     function castVote(bool approve, uint proposalId, uint wheight) internal {
         if (approve) {
             governanceProcesses[proposalId].yesVotes += wheight;
@@ -266,6 +579,12 @@ contract WeightedMajorityGovernance is IGovernanceMethod {
             governanceProcesses[proposalId].noVotes += wheight;
         }
 
+        resolveIfDecided(proposalId);
+
+        emit VoteCast(proposalId, msg.sender, approve);
+    }
+
+    function resolveIfDecided(uint proposalId) internal {
         if (
             governanceProcesses[proposalId].yesVotes >=
             governanceProcesses[proposalId].requiredYesVotes
@@ -294,8 +613,6 @@ contract WeightedMajorityGovernance is IGovernanceMethod {
             );
             emit GovernaceProcessApproved(proposalId);
         }
-
-        emit VoteCast(proposalId, msg.sender, approve);
     }
 
     function isApproved(uint proposalId) external view returns (bool) {
@@ -16,6 +16,8 @@ interface IDIDRegistry is IGovernanceSystemPart {
         uint proposalIndex
     ) external view returns (Proposal memory);
 
+    function getProposalCount(address did) external view returns (uint);
+
     function getGovernanceMethods(
         address did
     ) external view returns (GovernanceMethod[] memory);
@@ -30,6 +30,7 @@ interface IGovernanceSystemPart {
         VC // extension of Token based that utilisez VCs this means that verifier contract Addresses need to be provided for proposalCreation
     }
     // NOTE: this struct name will be lieklly changed to GovernanceMethodConfiguration to avoid confusion
+    // editRightsLevel, expiresAt and blockedUntil share one storage slot, timestamps fit into uint64
     struct GovernanceMethod {
         string methodName;
         GovernanceMethodType governanceMethodType;
@@ -42,16 +43,17 @@ interface IGovernanceSystemPart {
         string[] stringArgs;
         bool[] boolArgs;
         EditRightsLevel editRightsLevel;
-        uint expiresAt; // 0 or  expiration time of the GovMethods. if (block.time > expiresAt && expiresAt != 0) the GovernanceMethod cannot be used anymore. if expiresAt == 0 govMethod can be used for ever
-        uint blockedUntil; // 0 or time until witch GovMethods can not be used. if (block.time < blockedUntil && blockedUntil != 0)  then this GovernanceMethod can be used for proposal creation otherwise proposal creation will be not allowed. If blockedUntil == 0 then it means that there is no blocking for this govv methods.
+        uint64 expiresAt; // 0 or  expiration time of the GovMethods. if (block.time > expiresAt && expiresAt != 0) the GovernanceMethod cannot be used anymore. if expiresAt == 0 govMethod can be used for ever
+        uint64 blockedUntil; // 0 or time until witch GovMethods can not be used. if (block.time < blockedUntil && blockedUntil != 0)  then this GovernanceMethod can be used for proposal creation otherwise proposal creation will be not allowed. If blockedUntil == 0 then it means that there is no blocking for this govv methods.
     }
+    // status, governanceMethodIndex and caller share one storage slot, id and timestamp another one
     struct Proposal {
         address did; // This is using Ethereum address for simplicity now, did:ethr not integrated yet
         DIDDocument newDidDocument; // the new Did document that will overide the old one
         ProposalStatus status; // States the status of the proposal pending | accepted | rejected
-        uint governanceMethodIndex; // Index of the the used governanceMethod from old DID document
+        uint64 governanceMethodIndex; // Index of the the used governanceMethod from old DID document
         address caller; // address of controller that called for the change of the didDocument
-        uint id; // Id equel to proposalCount at the creation of the proposal
-        uint timestamp; // block.timestamp during creation of the proposal
+        uint64 id; // Id equel to proposalCount at the creation of the proposal
+        uint64 timestamp; // block.timestamp during creation of the proposal
     }
 }
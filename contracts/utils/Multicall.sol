@@ -0,0 +1,29 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+// Runs many view calls in one eth_call, used by scripts/batch_reader.py to read the registry and
+// the governance contracts of thousands of DIDs without one JSON-RPC round trip per getter.
+contract Multicall {
+    struct Call {
+        address target;
+        bytes callData;
+    }
+
+    struct Result {
+        bool success;
+        bytes returnData; // revert data if the call failed
+    }
+
+    // a failing call does not revert the whole batch, its result is marked as not successful
+    function aggregate(
+        Call[] calldata calls
+    ) external view returns (Result[] memory results) {
+        results = new Result[](calls.length);
+        for (uint i = 0; i < calls.length; i++) {
+            (bool success, bytes memory returnData) = calls[i].target.staticcall(
+                calls[i].callData
+            );
+            results[i] = Result(success, returnData);
+        }
+    }
+}
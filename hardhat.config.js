@@ -13,6 +13,13 @@ module.exports = {
         runs: 2,
       },
       viaIR: true,
+      // storage layouts in the build-info, hardhat merges this into its default outputs.
+      // scripts/storage_report.py and scripts/gas_profiler.py read them
+      outputSelection: {
+        "*": {
+          "*": ["storageLayout"],
+        },
+      },
     },
   },
   networks: {
@@ -22,7 +29,8 @@ module.exports = {
     },
     hardhat: {
       accounts: {
-        count: 102, // had to make it 102 to have enough accounts for the tests, 1 owner, 1 issuer, 100 controllers where up to 50 of them vote
+        count: Number(process.env.HARDHAT_ACCOUNTS || 102), // had to make it 102 to have enough accounts for the tests, 1 owner, 1 issuer, 100 controllers where up to 50 of them vote
+                                                            // larger gas sweeps (scripts/run_gas_sweep.py) raise it through HARDHAT_ACCOUNTS
         initialIndex: 0,
         accountsBalance: "10000000000000000000000" // 10 ETH
       }
@@ -0,0 +1,148 @@
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from eth_abi import decode
+
+from eth_rpc import DEFAULT_RPC_URL, JsonRpcClient, RpcError, block_tag, decode_result, encode_call
+
+# one view call: target contract, function signature like 'getProposals(address)', ABI types and
+# values of the arguments and the ABI types of the return values
+ViewCall = namedtuple("ViewCall", "target signature arg_types args return_types")
+
+AGGREGATE = "aggregate((address,bytes)[])"  # contracts/utils/Multicall.sol
+
+
+class CallFailed(Exception):
+    """Result of a view call that reverted, `data` holds the revert data if the node returned it."""
+
+    def __init__(self, call, data=None):
+        super().__init__(f"{call.signature} on {call.target} reverted")
+        self.call = call
+        self.data = data
+
+
+class ClientPool:
+    """Hands every worker thread its own JsonRpcClient, so each keeps one connection open."""
+
+    def __init__(self, url=DEFAULT_RPC_URL):
+        self.url = url
+        self._local = threading.local()
+        self._clients = []
+        self._lock = threading.Lock()
+
+    def client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = JsonRpcClient(self.url)
+            with self._lock:
+                self._clients.append(client)
+        return client
+
+    def close(self):
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients = []
+        self._local = threading.local()
+
+
+class BatchReader:
+    """Reads thousands of ViewCalls with a handful of JSON-RPC round trips.
+
+    Calls are packed into Multicall.aggregate eth_calls of `multicall_size` calls if a
+    Multicall address is given, otherwise every call is its own eth_call. The eth_calls
+    are sent as JSON-RPC batches of `batch_size` requests, spread over `workers` pooled
+    connections, and all results are decoded once every batch has returned.
+    """
+
+    def __init__(self, url=DEFAULT_RPC_URL, multicall=None, batch_size=200, multicall_size=100, workers=4):
+        self.pool = ClientPool(url)
+        self.multicall = multicall
+        self.batch_size = batch_size
+        self.multicall_size = multicall_size
+        self.workers = workers
+        self._executor = None  # kept between reads, its threads own the pooled connections
+
+    def read(self, calls, block="latest"):
+        """Returns the decoded return values of every call in order, CallFailed for reverted calls.
+
+        All calls read the state of the same block, 'latest' is pinned to one block number first.
+        """
+        calls = list(calls)
+        if not calls:
+            return []
+        if block == "latest":
+            block = int(self.pool.client().request("eth_blockNumber"), 16)
+        tag = block_tag(block)
+
+        if self.multicall:
+            groups = [calls[i:i + self.multicall_size] for i in range(0, len(calls), self.multicall_size)]
+            requests = [self._eth_call(self.multicall, self._aggregate_data(group), tag) for group in groups]
+        else:
+            groups = [[call] for call in calls]
+            requests = [self._eth_call(call.target, call_data(call), tag) for call in calls]
+
+        responses = self._send(requests)
+
+        results = []
+        for group, response in zip(groups, responses):
+            if self.multicall:
+                if isinstance(response, Exception):
+                    raise response
+                (outcomes,) = decode_result(["(bool,bytes)[]"], response)
+                results.extend(decode_return(call, success, data) for call, (success, data) in zip(group, outcomes))
+            elif isinstance(response, RpcError):
+                results.append(CallFailed(group[0], response.data))
+            else:
+                results.append(decode_return(group[0], True, bytes.fromhex(response[2:])))
+        return results
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self.pool.close()
+
+    def _aggregate_data(self, group):
+        return encode_call(AGGREGATE, ["(address,bytes)[]"], [[(call.target, bytes.fromhex(call_data(call)[2:]))
+                                                                  for call in group]])
+
+    @staticmethod
+    def _eth_call(target, data, tag):
+        return ("eth_call", [{"to": target, "data": data}, tag])
+
+    def _send(self, requests):
+        batches = [requests[i:i + self.batch_size] for i in range(0, len(requests), self.batch_size)]
+        if self.workers <= 1 or len(batches) == 1:
+            responses = [self.pool.client().batch(batch) for batch in batches]
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            responses = list(self._executor.map(lambda batch: self.pool.client().batch(batch), batches))
+        return [response for batch in responses for response in batch]
+
+
+def call_data(call):
+    return encode_call(call.signature, call.arg_types, call.args)
+
+
+def decode_return(call, success, data):
+    if not success:
+        return CallFailed(call, data)
+    return decode(call.return_types, data)
+
+
+def read_sequential(client, calls, block="latest"):
+    """One eth_call round trip per call, the way the getters are read without BatchReader."""
+    tag = block_tag(block)
+    results = []
+    for call in calls:
+        try:
+            response = client.request("eth_call", [{"to": call.target, "data": call_data(call)}, tag])
+        except RpcError as error:
+            results.append(CallFailed(call, error.data))
+            continue
+        results.append(decode_return(call, True, bytes.fromhex(response[2:])))
+    return results
+
@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import time
+
+from batch_reader import BatchReader, ViewCall, read_sequential
+from deployment import deploy, did_address, load_bytecode
+from did_indexer import GOVERNANCE_METHOD, PROPOSAL
+from eth_rpc import DEFAULT_RPC_URL, JsonRpcClient, RpcError, encode_call
+
+STRATEGIES = ("sequential", "batched", "multicall")
+CREATE_DID = f"createDIDDocument(string,string,{GOVERNANCE_METHOD}[])"
+
+
+def create_dids(client, registry, nofm, count, batch_size=200):
+    """Creates `count` DID documents, each from its own impersonated hardhat account."""
+    dids = [did_address(i) for i in range(count)]
+    for start in range(0, count, batch_size):
+        chunk = dids[start:start + batch_size]
+        setup = [("hardhat_impersonateAccount", [did]) for did in chunk]
+        setup += [("hardhat_setBalance", [did, hex(10 ** 18)]) for did in chunk]
+        txs = [("eth_sendTransaction", [{
+            "from": did,
+            "to": registry,
+            "gas": hex(3_000_000),
+            "data": encode_call(CREATE_DID, ["string", "string", f"{GOVERNANCE_METHOD}[]"], [
+                "publicKey", "authMethod",
+                [("NofM", 0, [did], [], [], nofm, "publicKey123", [1], [], [], 0, 0, 0)],
+            ]),
+        }]) for did in chunk]
+        for result in client.batch(setup) + client.batch(txs):
+            if isinstance(result, RpcError):
+                raise result
+    return dids
+
+
+def audit_calls(registry, nofm, dids):
+    """The getters an audit reads for every DID: document, methods, proposals, controller, governance state."""
+    calls = []
+    for i, did in enumerate(dids):
+        calls += [
+            ViewCall(registry, "didDocuments(address)", ["address"], [did], ["address", "string", "string", "uint256"]),
+            ViewCall(registry, "getGovernanceMethods(address)", ["address"], [did], [f"{GOVERNANCE_METHOD}[]"]),
+            ViewCall(registry, "getProposals(address)", ["address"], [did], [f"{PROPOSAL}[]"]),
+            ViewCall(registry, "getController(address,uint256,uint256)", ["address", "uint256", "uint256"], [did, 0, 0],
+                     ["address"]),
+            ViewCall(nofm, "isApproved(uint256)", ["uint256"], [i], ["bool"]),
+        ]
+    return calls
+
+
+def run(args):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    client = JsonRpcClient(args.rpc)
+    deployer = client.request("eth_accounts")[0]
+
+    registry = deploy(client, deployer, load_bytecode(project_root, 'DIDRegistry.sol', 'DIDRegistry'))
+    nofm = deploy(client, deployer, load_bytecode(project_root, 'governance/NofMGovernance.sol', 'NofMGovernance'),
+                  ['address'], [registry])
+    multicall = deploy(client, deployer, load_bytecode(project_root, 'utils/Multicall.sol', 'Multicall'))
+    dids = create_dids(client, registry, nofm, max(args.dids))
+    block = int(client.request("eth_blockNumber"), 16)
+
+    readers = {
+        "batched": BatchReader(args.rpc, batch_size=args.batch_size, workers=args.workers),
+        "multicall": BatchReader(args.rpc, multicall=multicall, batch_size=args.batch_size,
+                                 multicall_size=args.multicall_size, workers=args.workers),
+    }
+    rows = []
+    try:
+        for count in args.dids:
+            calls = audit_calls(registry, nofm, dids[:count])
+            expected = None
+            for strategy in args.strategies:
+                best = None
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    if strategy == "sequential":
+                        results = read_sequential(client, calls, block)
+                    else:
+                        results = readers[strategy].read(calls, block)
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                if expected is None:
+                    expected = results
+                elif results != expected:
+                    print(f"warning: {strategy} results differ for {count} DIDs")
+                rows.append(dict(dids=count, strategy=strategy, calls=len(calls), seconds=best,
+                                 callsPerSecond=len(calls) / best, didsPerSecond=count / best))
+                print(f"{count:>7} DIDs {strategy:>10}: {len(calls):>7} calls in {best:8.3f}s "
+                      f"{len(calls) / best:>10.0f} calls/s {count / best:>9.0f} DIDs/s")
+    finally:
+        for reader in readers.values():
+            reader.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark reading DIDs one call at a time vs batched JSON-RPC vs Multicall')
+    parser.add_argument('--rpc', default=DEFAULT_RPC_URL, help='JSON-RPC url of a hardhat node (npx hardhat node)')
+    parser.add_argument('--dids', default='10,100,1000,5000', help='comma separated DID counts')
+    parser.add_argument('--strategies', default=','.join(STRATEGIES), help='comma separated read strategies')
+    parser.add_argument('--batch-size', type=int, default=200, help='requests per JSON-RPC batch')
+    parser.add_argument('--multicall-size', type=int, default=100, help='calls per Multicall.aggregate')
+    parser.add_argument('--workers', type=int, default=4, help='pooled connections')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement, the fastest is reported')
+    parser.add_argument('--output', default=None, help='write the measurements to this JSON file')
+    args = parser.parse_args()
+    args.dids = sorted(int(count) for count in args.dids.split(','))
+    args.strategies = args.strategies.split(',')
+    unknown = sorted(set(args.strategies) - set(STRATEGIES))
+    if unknown:
+        parser.error(f"unknown strategies: {', '.join(unknown)}")
+
+    rows = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
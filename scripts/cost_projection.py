@@ -0,0 +1,233 @@
+import argparse
+import os
+
+import matplotlib
+matplotlib.use('Agg')  # figures are only written to disk, also inside pool workers
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+import numpy as np
+
+from gas_results import load_gas_results
+from render_pipeline import FULL_DPI, FigureJob, render_all
+
+GWEI = 1e-9  # ETH per gwei
+PERCENTILES = (5, 50, 95, 99)
+DEFAULT_VOTERS = "9,19,39,59,79,99"
+# cubes larger than this are written to a memory-mapped .npy file instead of being held in memory
+MEMMAP_BYTES = 512 * 2 ** 20
+SCENARIO_CHUNK = 1 << 16  # scenarios filled per step, bounds the temporary arrays
+
+
+class Scenarios:
+    """Gas price (gwei) and ETH price (USD) scenarios, flattened to one USD-per-gas factor each.
+
+    A grid pairs every gas price with every ETH price (independent prices), joint scenarios
+    pair the i-th gas price with the i-th ETH price (e.g. rows of the same historical series).
+    """
+
+    def __init__(self, gas_gwei, eth_usd, grid=True):
+        self.gas_gwei = np.asarray(gas_gwei, dtype=np.float64)
+        self.eth_usd = np.asarray(eth_usd, dtype=np.float64)
+        self.grid = grid
+        if grid:
+            self.factors = np.multiply.outer(self.gas_gwei, self.eth_usd).ravel() * GWEI
+        else:
+            if self.gas_gwei.shape != self.eth_usd.shape:
+                raise ValueError("Joint scenarios need as many gas prices as ETH prices")
+            self.factors = self.gas_gwei * self.eth_usd * GWEI
+
+    def __len__(self):
+        return len(self.factors)
+
+
+def load_series(path, column, drop_missing=True):
+    """One numeric column of a CSV file with a header row, rows without a value are dropped (or NaN)."""
+    data = np.genfromtxt(path, delimiter=',', names=True, dtype=np.float64, encoding='utf-8')
+    if column not in data.dtype.names:
+        raise KeyError(f"{path} has no column '{column}', columns: {', '.join(data.dtype.names)}")
+    values = np.atleast_1d(data[column])
+    return values[np.isfinite(values)] if drop_missing else values
+
+
+def lognormal(median, sigma, samples, rng):
+    return median * np.exp(sigma * rng.standard_normal(samples))
+
+
+def cost_cube(gas, scenarios, path=None, memmap_bytes=MEMMAP_BYTES):
+    """USD cost of every (method, voter count, scenario), a (methods, voters, scenarios) array.
+
+    `gas` is the (methods, voters) gas matrix. The cube is filled in chunks of scenarios by
+    broadcasting, into a memory-mapped .npy file at `path` once it exceeds `memmap_bytes`.
+    """
+    gas = np.asarray(gas, dtype=np.float64)
+    shape = gas.shape + (len(scenarios),)
+    if path is not None and np.prod(shape) * 8 > memmap_bytes:
+        cube = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=shape)
+    else:
+        cube = np.empty(shape, dtype=np.float64)
+    for start in range(0, len(scenarios), SCENARIO_CHUNK):
+        stop = min(start + SCENARIO_CHUNK, len(scenarios))
+        np.multiply(gas[..., None], scenarios.factors[start:stop], out=cube[..., start:stop])
+    if isinstance(cube, np.memmap):
+        cube.flush()
+    return cube
+
+
+def summarize(cube, percentiles=PERCENTILES):
+    """Mean, standard deviation and percentiles over the scenario axis, each a (methods, voters) array.
+
+    Statistics are computed one method at a time, so only one (voters, scenarios) slab of a
+    memory-mapped cube is read into memory at once.
+    """
+    stats = {name: np.empty(cube.shape[:2]) for name in ('mean', 'std', 'max')}
+    stats.update({f'p{q}': np.empty(cube.shape[:2]) for q in percentiles})
+    for i in range(cube.shape[0]):
+        slab = np.asarray(cube[i])
+        stats['mean'][i] = slab.mean(axis=-1)
+        stats['std'][i] = slab.std(axis=-1)
+        stats['max'][i] = slab.max(axis=-1)
+        for q, values in zip(percentiles, np.percentile(slab, percentiles, axis=-1)):
+            stats[f'p{q}'][i] = values
+    return stats
+
+
+def write_summary(path, methods, voters, stats):
+    """One CSV row per (method, voter count) with every statistic in USD."""
+    names = list(stats)
+    rows = len(methods) * len(voters)
+    method_column = np.repeat(np.asarray(methods, dtype=str), len(voters))
+    voter_column = np.tile(np.asarray(voters), len(methods)).astype(str)
+    values = np.stack([stats[name].reshape(rows) for name in names], axis=1)
+    formatted = np.char.mod('%.4f', values)
+    table = np.column_stack([method_column, voter_column, formatted])
+    np.savetxt(path, table, fmt='%s', delimiter=',', header=','.join(['method', 'voters'] + names), comments='')
+
+
+def draw_heatmap(path, dpi, values, rows, columns, title, xlabel, ylabel, colorbar):
+    fig, ax = plt.subplots(figsize=(max(8, len(columns) * 0.9), max(4, len(rows) * 0.45)))
+    positive = values[values > 0]
+    norm = LogNorm(vmin=positive.min(), vmax=positive.max()) if positive.size else None
+    image = ax.imshow(values, aspect='auto', cmap='viridis', norm=norm)
+    ax.set_xticks(np.arange(len(columns)))
+    ax.set_xticklabels(columns)
+    ax.set_yticks(np.arange(len(rows)))
+    ax.set_yticklabels(rows)
+    if len(columns) <= 12 and len(rows) <= 30:
+        for (i, j), value in np.ndenumerate(values):
+            ax.text(j, i, f'{value:,.2f}', ha='center', va='center', color='white', fontsize=7)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    fig.colorbar(image, ax=ax, label=colorbar)
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+def heatmap_jobs(methods, voters, stats, metric, scenarios, gas=None, focus=None, grid_ticks=8):
+    methods = [str(method) for method in methods]
+    voters = [int(count) for count in voters]
+    jobs = [
+        FigureJob(f'projected_{name}_{metric}.png', draw_heatmap, dict(
+            values=stats[name], rows=methods, columns=voters,
+            title=f'{label} {metric} cost over {len(scenarios)} price scenarios',
+            xlabel='Number of Voters', ylabel='Governance method', colorbar='USD',
+        ))
+        for name, label in (('mean', 'Expected'), ('p95', '95th percentile'))
+    ]
+    if focus is not None and scenarios.grid:
+        # cost of one method and voter count over the gas price x ETH price grid, thinned to the ticks
+        i, j = focus
+        gas_ticks = np.unique(np.linspace(0, len(scenarios.gas_gwei) - 1, grid_ticks).astype(int))
+        eth_ticks = np.unique(np.linspace(0, len(scenarios.eth_usd) - 1, grid_ticks).astype(int))
+        gas_order = np.sort(scenarios.gas_gwei)[gas_ticks]
+        eth_order = np.sort(scenarios.eth_usd)[eth_ticks]
+        values = gas[i, j] * np.multiply.outer(gas_order, eth_order) * GWEI
+        jobs.append(FigureJob(f'projected_grid_{methods[i]}_{voters[j]}.png', draw_heatmap, dict(
+            values=values, rows=[f'{v:.1f}' for v in gas_order], columns=[f'{v:,.0f}' for v in eth_order],
+            title=f'{methods[i]} with {voters[j]} voters, {metric} cost',
+            xlabel='ETH price (USD)', ylabel='Gas price (gwei)', colorbar='USD',
+        )))
+    return jobs
+
+
+def build_scenarios(args, rng):
+    if args.joint:
+        if not args.gas_csv or not args.eth_csv:
+            raise ValueError("--joint needs --gas-csv and --eth-csv")
+        gas = load_series(args.gas_csv, args.gas_column, drop_missing=False)
+        eth = load_series(args.eth_csv, args.eth_column, drop_missing=False)
+        if gas.shape != eth.shape:
+            raise ValueError("--joint needs gas and ETH price series of the same length")
+        # a row counts only if both prices are known
+        known = np.isfinite(gas) & np.isfinite(eth)
+        return Scenarios(gas[known], eth[known], grid=False)
+    gas = (load_series(args.gas_csv, args.gas_column) if args.gas_csv
+           else lognormal(args.gas_median, args.gas_sigma, args.gas_samples, rng))
+    eth = (load_series(args.eth_csv, args.eth_column) if args.eth_csv
+           else lognormal(args.eth_median, args.eth_sigma, args.eth_samples, rng))
+    return Scenarios(gas, eth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Project the USD cost of every governance method over price scenarios')
+    parser.add_argument('--results', default=None,
+                        help='gas results, test_results.json or the streamed test_results.jsonl')
+    parser.add_argument('--metric', default='totalProcessGas', help='gas metric to price')
+    parser.add_argument('--voters', default=DEFAULT_VOTERS, help='comma separated voter counts')
+    parser.add_argument('--methods', default=None, help='comma separated methods (default: all with every voter count)')
+    parser.add_argument('--gas-csv', default=None, help='CSV with a historical gas price series (gwei)')
+    parser.add_argument('--gas-column', default='gas_price_gwei')
+    parser.add_argument('--eth-csv', default=None, help='CSV with a historical ETH price series (USD)')
+    parser.add_argument('--eth-column', default='eth_usd')
+    parser.add_argument('--joint', action='store_true',
+                        help='pair the rows of both series instead of crossing every gas with every ETH price')
+    parser.add_argument('--gas-median', type=float, default=20.0, help='synthetic lognormal gas price median (gwei)')
+    parser.add_argument('--gas-sigma', type=float, default=0.6)
+    parser.add_argument('--gas-samples', type=int, default=1000)
+    parser.add_argument('--eth-median', type=float, default=3000.0, help='synthetic lognormal ETH price median (USD)')
+    parser.add_argument('--eth-sigma', type=float, default=0.3)
+    parser.add_argument('--eth-samples', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--focus', default=None, help="'Method:voters' to draw over the gas x ETH price grid")
+    parser.add_argument('--output-dir', default=os.path.join('visualizations', 'projection'))
+    parser.add_argument('--jobs', type=int, default=None, help='number of worker processes (default: all cores)')
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    table = load_gas_results(args.results or os.path.join(project_root, 'test', 'test_results.json'))
+    voters = sorted(int(count) for count in args.voters.split(','))
+    if args.methods:
+        methods = args.methods.split(',')
+    else:
+        methods = [method for method in table.method_names() if set(voters) <= set(table.voter_counts(method).tolist())]
+    if not methods:
+        parser.error(f"no governance method has results for all of {voters}")
+
+    try:
+        scenarios = build_scenarios(args, np.random.default_rng(args.seed))
+    except (ValueError, KeyError, OSError) as error:
+        parser.error(str(error))
+    gas = table.matrix(methods, voters, args.metric)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    cube = cost_cube(gas, scenarios, os.path.join(args.output_dir, 'cost_cube.npy'))
+    print(f"{len(methods)} methods x {len(voters)} voter counts x {len(scenarios)} scenarios"
+          f"{' (memory-mapped)' if isinstance(cube, np.memmap) else ''}")
+    stats = summarize(cube)
+    summary_path = os.path.join(args.output_dir, f'cost_summary_{args.metric}.csv')
+    write_summary(summary_path, methods, voters, stats)
+    print(f"wrote {summary_path}")
+
+    focus = None
+    if args.focus:
+        method, count = args.focus.split(':')
+        if method not in methods or int(count) not in voters:
+            parser.error(f"--focus {args.focus} is not part of the projection")
+        focus = (methods.index(method), voters.index(int(count)))
+    render_all(heatmap_jobs(methods, voters, stats, args.metric, scenarios, gas, focus), args.output_dir,
+               dpi=FULL_DPI, workers=args.jobs)
+
+
+if __name__ == '__main__':
+    main()
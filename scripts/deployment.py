@@ -0,0 +1,33 @@
+import json
+import os
+import time
+
+from eth_abi import encode
+from eth_hash.auto import keccak
+
+
+def load_bytecode(project_root, source, name):
+    """Creation bytecode from the hardhat artifacts, run `npx hardhat compile` first."""
+    path = os.path.join(project_root, 'artifacts', 'contracts', source, f'{name}.json')
+    with open(path, 'r') as f:
+        return json.load(f)['bytecode']
+
+
+def send_transaction(client, tx):
+    tx_hash = client.request("eth_sendTransaction", [tx])
+    receipt = client.request("eth_getTransactionReceipt", [tx_hash])
+    while receipt is None:  # nodes without automine
+        time.sleep(0.1)
+        receipt = client.request("eth_getTransactionReceipt", [tx_hash])
+    if receipt["status"] != "0x1":
+        raise RuntimeError(f"transaction {tx_hash} reverted")
+    return receipt
+
+
+def deploy(client, deployer, bytecode, constructor_types=(), constructor_args=()):
+    data = bytecode + encode(list(constructor_types), list(constructor_args)).hex()
+    return send_transaction(client, {"from": deployer, "data": data})["contractAddress"]
+
+
+def did_address(i):
+    return "0x" + keccak(f"benchmark-did-{i}".encode())[-20:].hex()
@@ -0,0 +1,416 @@
+import argparse
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+from eth_abi import decode
+from eth_hash.auto import keccak
+
+from eth_rpc import (DEFAULT_RPC_URL, JsonRpcClient, block_tag, decode_result, encode_call, event_topic,
+                     topic_address, topic_int)
+
+# ABI types of the structs in contracts/interfaces/IGovernanceSystemPart.sol
+DID_DOCUMENT = "(address,string,string,uint256)"
+GOVERNANCE_METHOD = "(string,uint8,address[],address[],address[],address,string,uint256[],string[],bool[],uint8,uint64,uint64)"
+PROPOSAL = f"(address,{DID_DOCUMENT},uint8,uint64,address,uint64,uint64)"
+PROPOSAL_STATUS = ("Pending", "Approved", "Rejected")
+GOVERNANCE_METHOD_TYPES = ("Controllers", "Token", "TokenHolder", "VC")
+EDIT_RIGHTS_LEVELS = ("All", "DelegatesCreation", "SelfGovernance", "Document")
+ZERO_ADDRESS = "0x" + "00" * 20
+
+# DIDRegistry events, by topic0
+EVENTS = {
+    event_topic("DIDDocumentCreated(address,address)"): "DIDDocumentCreated",
+    event_topic("DIDDocumentUpdated(address,uint256)"): "DIDDocumentUpdated",
+    event_topic("ProposalCreated(uint256,address)"): "ProposalCreated",
+    event_topic(f"ProposalExecuted(uint256,{PROPOSAL})"): "ProposalExecuted",
+    event_topic("ProposalsInvalidated(address,uint256)"): "ProposalsInvalidated",
+    event_topic(f"DocumentPayload(address,bytes32,{DID_DOCUMENT})"): "DocumentPayload",
+    event_topic("DIDDocumentCommitted(address,bytes32)"): "DIDDocumentCommitted",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS events (
+    block INTEGER NOT NULL, log_index INTEGER NOT NULL, tx_hash TEXT NOT NULL,
+    name TEXT NOT NULL, did TEXT NOT NULL, proposal_id INTEGER,
+    PRIMARY KEY (block, log_index)
+);
+CREATE TABLE IF NOT EXISTS documents (
+    did TEXT PRIMARY KEY, owner TEXT NOT NULL, public_key TEXT NOT NULL,
+    authentication_method TEXT NOT NULL, last_changed INTEGER NOT NULL, block INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS governance_methods (
+    did TEXT NOT NULL, method_index INTEGER NOT NULL, method TEXT NOT NULL,
+    PRIMARY KEY (did, method_index)
+);
+CREATE TABLE IF NOT EXISTS proposals (
+    id INTEGER PRIMARY KEY, did TEXT NOT NULL, proposal_index INTEGER, status TEXT NOT NULL,
+    governance_method_index INTEGER, caller TEXT, new_document TEXT, timestamp INTEGER,
+    created_block INTEGER, resolved_block INTEGER
+);
+CREATE INDEX IF NOT EXISTS proposals_by_did ON proposals (did, status);
+CREATE TABLE IF NOT EXISTS document_payloads (hash TEXT PRIMARY KEY, document TEXT NOT NULL);
+"""
+
+
+def document_dict(document):
+    owner, public_key, authentication_method, last_changed = document
+    return dict(owner=owner.lower(), publicKey=public_key, authenticationMethod=authentication_method,
+                lastChanged=last_changed)
+
+
+def method_dict(method):
+    return dict(
+        methodName=method[0],
+        governanceMethodType=GOVERNANCE_METHOD_TYPES[method[1]],
+        controllers=[a.lower() for a in method[2]],
+        verifierContracts=[a.lower() for a in method[3]],
+        issuers=[a.lower() for a in method[4]],
+        contractAddres=method[5].lower(),
+        contractPublicKey=method[6],
+        intArgs=list(method[7]),
+        stringArgs=list(method[8]),
+        boolArgs=list(method[9]),
+        editRightsLevel=EDIT_RIGHTS_LEVELS[method[10]],
+        expiresAt=method[11],
+        blockedUntil=method[12],
+    )
+
+
+def proposal_dict(proposal):
+    did, new_document, status, governance_method_index, caller, proposal_id, timestamp = proposal
+    return dict(id=proposal_id, did=did.lower(), newDidDocument=document_dict(new_document),
+                status=PROPOSAL_STATUS[status], governanceMethodIndex=governance_method_index,
+                caller=caller.lower(), timestamp=timestamp)
+
+
+def decode_log(log):
+    """Turns a raw DIDRegistry log into {name, block, logIndex, txHash, did, proposalId, ...}."""
+    topics = log["topics"]
+    event = dict(name=EVENTS[topics[0]], block=int(log["blockNumber"], 16), logIndex=int(log["logIndex"], 16),
+                 txHash=log["transactionHash"], proposalId=None)
+    if event["name"] in ("DIDDocumentCreated", "DIDDocumentUpdated", "ProposalsInvalidated", "DocumentPayload",
+                         "DIDDocumentCommitted"):
+        event["did"] = topic_address(topics[1])
+    if event["name"] == "DIDDocumentUpdated":
+        event["proposalId"] = topic_int(topics[2])
+    elif event["name"] == "ProposalCreated":
+        event["proposalId"] = topic_int(topics[1])
+        event["did"] = topic_address(topics[2])
+    elif event["name"] == "ProposalExecuted":
+        (proposal,) = decode([PROPOSAL], bytes.fromhex(log["data"][2:]))
+        event["proposalId"] = topic_int(topics[1])
+        event["proposal"] = proposal_dict(proposal)
+        event["did"] = event["proposal"]["did"]
+    elif event["name"] == "ProposalsInvalidated":
+        (event["epoch"],) = decode(["uint256"], bytes.fromhex(log["data"][2:]))
+    elif event["name"] == "DocumentPayload":
+        # the commitment is keccak256(abi.encode(document)), which is exactly the event data
+        data = bytes.fromhex(log["data"][2:])
+        (document,) = decode([DID_DOCUMENT], data)
+        event["documentHash"] = topics[2].lower()
+        event["document"] = document_dict(document)
+        event["verified"] = "0x" + keccak(data).hex() == event["documentHash"]
+    elif event["name"] == "DIDDocumentCommitted":
+        event["documentHash"] = topics[2].lower()
+    return event
+
+
+class DIDIndex:
+    """On-disk SQLite index of DID documents, their governance methods and proposals."""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else json.loads(row["value"])
+
+    def set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def apply(self, events, snapshots, to_block):
+        """Applies the events of a block range and the DID state at its last block in one transaction.
+
+        Events are applied in log order and carry the proposal outcomes, the snapshots
+        (did -> (document, governance methods, pending proposals)) replace the document
+        and methods of every DID an event touched. Documents of committed DIDs are rebuilt
+        from the verified DocumentPayload of their hash.
+        """
+        with self.db:
+            for event in events:
+                self._apply_event(event)
+            for did, (document, methods, pending) in snapshots.items():
+                self._apply_snapshot(did, document, methods, pending, to_block)
+            self.set_meta("last_block", to_block)
+
+    def _apply_event(self, event):
+        self.db.execute(
+            "INSERT OR IGNORE INTO events (block, log_index, tx_hash, name, did, proposal_id) VALUES (?, ?, ?, ?, ?, ?)",
+            (event["block"], event["logIndex"], event["txHash"], event["name"], event["did"], event["proposalId"]))
+        if event["name"] == "ProposalCreated":
+            self.db.execute(
+                "INSERT OR IGNORE INTO proposals (id, did, status, created_block) VALUES (?, ?, 'Pending', ?)",
+                (event["proposalId"], event["did"], event["block"]))
+        elif event["name"] == "ProposalsInvalidated":
+            # emitted right before the ProposalExecuted of the approved proposal, which then overrides its status
+            self.db.execute(
+                "UPDATE proposals SET status = 'Rejected', resolved_block = ? WHERE did = ? AND status = 'Pending'",
+                (event["block"], event["did"]))
+        elif event["name"] == "ProposalExecuted":
+            proposal = event["proposal"]
+            self.db.execute(
+                "INSERT INTO proposals (id, did, status, governance_method_index, caller, new_document, timestamp, resolved_block)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET status = excluded.status,"
+                " governance_method_index = excluded.governance_method_index, caller = excluded.caller,"
+                " new_document = excluded.new_document, timestamp = excluded.timestamp,"
+                " resolved_block = excluded.resolved_block",
+                (proposal["id"], proposal["did"], proposal["status"], proposal["governanceMethodIndex"],
+                 proposal["caller"], json.dumps(proposal["newDidDocument"]), proposal["timestamp"], event["block"]))
+        elif event["name"] == "DocumentPayload" and event["verified"]:
+            # payloads that do not match their hash are never used to rebuild a document
+            self.db.execute("INSERT OR IGNORE INTO document_payloads (hash, document) VALUES (?, ?)",
+                            (event["documentHash"], json.dumps(event["document"])))
+
+    def payload(self, document_hash):
+        """The verified document committed to by `document_hash`, None if its DocumentPayload was not indexed."""
+        row = self.db.execute("SELECT document FROM document_payloads WHERE hash = ?", (document_hash.lower(),)).fetchone()
+        return None if row is None else json.loads(row["document"])
+
+    def _apply_snapshot(self, did, document, methods, pending, block):
+        if document is not None and document.get("documentHash"):
+            committed = self.payload(document["documentHash"])
+            if committed is None:
+                raise ValueError(f"No DocumentPayload for the document {document['documentHash']} of {did}, "
+                                 "index from an earlier block")
+            document = committed
+        if document is None or document["owner"] == ZERO_ADDRESS:
+            self.db.execute("DELETE FROM documents WHERE did = ?", (did,))
+        else:
+            self.db.execute(
+                "INSERT OR REPLACE INTO documents (did, owner, public_key, authentication_method, last_changed, block)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (did, document["owner"], document["publicKey"], document["authenticationMethod"],
+                 document["lastChanged"], block))
+        self.db.execute("DELETE FROM governance_methods WHERE did = ?", (did,))
+        self.db.executemany(
+            "INSERT INTO governance_methods (did, method_index, method) VALUES (?, ?, ?)",
+            [(did, i, json.dumps(method)) for i, method in enumerate(methods)])
+        for proposal_index, proposal in enumerate(pending):
+            # rejected proposals are deleted from the pending array and come back zeroed
+            if proposal["did"] == ZERO_ADDRESS or proposal["status"] != "Pending":
+                continue
+            self.db.execute(
+                "INSERT INTO proposals (id, did, proposal_index, status, governance_method_index, caller, new_document,"
+                " timestamp) VALUES (?, ?, ?, 'Pending', ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET"
+                " proposal_index = excluded.proposal_index, governance_method_index = excluded.governance_method_index,"
+                " caller = excluded.caller, new_document = excluded.new_document, timestamp = excluded.timestamp",
+                (proposal["id"], did, proposal_index, proposal["governanceMethodIndex"], proposal["caller"],
+                 json.dumps(proposal["newDidDocument"]), proposal["timestamp"]))
+
+    def document(self, did):
+        """Returns the DID document with its governance methods, None for unknown DIDs."""
+        row = self.db.execute("SELECT * FROM documents WHERE did = ?", (did,)).fetchone()
+        if row is None:
+            return None
+        methods = self.db.execute(
+            "SELECT method FROM governance_methods WHERE did = ? ORDER BY method_index", (did,)).fetchall()
+        return dict(did=did, owner=row["owner"], publicKey=row["public_key"],
+                    authenticationMethod=row["authentication_method"], lastChanged=row["last_changed"],
+                    governanceMethods=[json.loads(m["method"]) for m in methods])
+
+    def pending_proposals(self, did):
+        rows = self.db.execute(
+            "SELECT * FROM proposals WHERE did = ? AND status = 'Pending' ORDER BY proposal_index, id", (did,)).fetchall()
+        return [dict(id=row["id"], proposalIndex=row["proposal_index"],
+                     governanceMethodIndex=row["governance_method_index"], caller=row["caller"],
+                     newDidDocument=json.loads(row["new_document"]) if row["new_document"] else None,
+                     timestamp=row["timestamp"]) for row in rows]
+
+    def close(self):
+        self.db.close()
+
+
+class DIDRegistryIndexer:
+    """Replays the DIDRegistry events of a node into a DIDIndex.
+
+    Events name the DIDs that changed. The state of those DIDs is read once per synced
+    block range with one batched JSON-RPC request, every other read is served by the index.
+    """
+
+    def __init__(self, client, registry, index, start_block=0, chunk_blocks=2000):
+        self.client = client
+        self.registry = registry.lower()
+        self.index = index
+        self.start_block = start_block
+        self.chunk_blocks = chunk_blocks
+        indexed = index.meta("registry")
+        if indexed is not None and indexed != self.registry:
+            raise ValueError(f"Index was built for registry {indexed}, not {self.registry}")
+        index.set_meta("registry", self.registry)
+
+    def sync(self):
+        """Indexes all blocks up to the latest one, returns the set of DIDs that changed."""
+        latest = int(self.client.request("eth_blockNumber"), 16)
+        from_block = self.index.meta("last_block", self.start_block - 1) + 1
+        touched = set()
+        while from_block <= latest:
+            to_block = min(from_block + self.chunk_blocks - 1, latest)
+            logs = self.client.request("eth_getLogs", [{
+                "address": self.registry,
+                "fromBlock": block_tag(from_block),
+                "toBlock": block_tag(to_block),
+                "topics": [list(EVENTS)],
+            }])
+            events = sorted((decode_log(log) for log in logs), key=lambda e: (e["block"], e["logIndex"]))
+            dids = {event["did"] for event in events}
+            self.index.apply(events, self.fetch_state(dids, to_block), to_block)
+            touched |= dids
+            from_block = to_block + 1
+        return touched
+
+    def fetch_state(self, dids, block):
+        """Reads document, governance methods, pending proposals and document hash of every DID at `block`."""
+        dids = sorted(dids)
+        calls = []
+        for did in dids:
+            calls.append(("didDocuments(address)", ["address"], [did]))
+            calls.append(("getGovernanceMethods(address)", ["address"], [did]))
+            calls.append(("getProposals(address)", ["address"], [did]))
+            calls.append(("didDocumentHashes(address)", ["address"], [did]))
+        results = self.client.batch([
+            ("eth_call", [{"to": self.registry, "data": encode_call(*call)}, block_tag(block)]) for call in calls
+        ])
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        snapshots = {}
+        for i, did in enumerate(dids):
+            document = document_dict(decode_result(["address", "string", "string", "uint256"], results[4 * i]))
+            (methods,) = decode_result([f"{GOVERNANCE_METHOD}[]"], results[4 * i + 1])
+            (pending,) = decode_result([f"{PROPOSAL}[]"], results[4 * i + 2])
+            (document_hash,) = decode_result(["bytes32"], results[4 * i + 3])
+            if document_hash != bytes(32):
+                document["documentHash"] = "0x" + document_hash.hex()
+            snapshots[did] = (document, [method_dict(m) for m in methods], [proposal_dict(p) for p in pending])
+        return snapshots
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if key not in self.entries:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+_MISSING = object()
+
+
+class DIDResolver:
+    """Resolves DIDs and their pending proposals from the index instead of the node.
+
+    Before answering, the resolver syncs new events if the last sync is older than
+    `max_staleness` seconds. Cached answers of DIDs touched by those events are dropped,
+    repeated reads of hot DIDs in between are answered from the LRU cache alone.
+    Returned dicts are shared with the cache and must not be modified.
+    """
+
+    def __init__(self, indexer, cache_size=1024, max_staleness=1.0, clock=time.monotonic):
+        self.indexer = indexer
+        self.cache = LRUCache(cache_size)
+        self.max_staleness = max_staleness
+        self.clock = clock
+        self.last_sync = None
+
+    def refresh(self, force=False):
+        now = self.clock()
+        if not force and self.last_sync is not None and now - self.last_sync < self.max_staleness:
+            return set()
+        touched = self.indexer.sync()
+        self.last_sync = now
+        for did in touched:
+            self.cache.invalidate(("document", did))
+            self.cache.invalidate(("pending", did))
+        return touched
+
+    def resolve(self, did):
+        return self._cached("document", did.lower(), self.indexer.index.document)
+
+    def pending_proposals(self, did):
+        return self._cached("pending", did.lower(), self.indexer.index.pending_proposals)
+
+    def _cached(self, kind, did, load):
+        self.refresh()
+        value = self.cache.get((kind, did), _MISSING)
+        if value is _MISSING:
+            value = load(did)
+            self.cache.put((kind, did), value)
+        return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Index DIDRegistry events into SQLite and resolve DIDs from the index')
+    parser.add_argument('--rpc', default=DEFAULT_RPC_URL, help='JSON-RPC url of the node')
+    parser.add_argument('--registry', required=True, help='DIDRegistry address')
+    parser.add_argument('--db', default='did_index.sqlite', help='SQLite index file')
+    parser.add_argument('--from-block', type=int, default=0, help='first block to index (deployment block)')
+    parser.add_argument('--chunk-blocks', type=int, default=2000, help='blocks per eth_getLogs request')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('sync', help='index all new events')
+    commands.add_parser('resolve', help='print a DID document').add_argument('did')
+    commands.add_parser('pending', help='print the pending proposals of a DID').add_argument('did')
+    watch = commands.add_parser('watch', help='keep the index in sync with the node')
+    watch.add_argument('--interval', type=float, default=2.0, help='seconds between syncs')
+    args = parser.parse_args()
+
+    index = DIDIndex(args.db)
+    indexer = DIDRegistryIndexer(JsonRpcClient(args.rpc), args.registry, index,
+                                 start_block=args.from_block, chunk_blocks=args.chunk_blocks)
+    resolver = DIDResolver(indexer)
+    try:
+        if args.command == 'sync':
+            touched = indexer.sync()
+            print(f"indexed up to block {index.meta('last_block')}, {len(touched)} DIDs changed")
+        elif args.command == 'resolve':
+            print(json.dumps(resolver.resolve(args.did), indent=2))
+        elif args.command == 'pending':
+            print(json.dumps(resolver.pending_proposals(args.did), indent=2))
+        else:
+            while True:
+                touched = indexer.sync()
+                if touched:
+                    print(f"block {index.meta('last_block')}: {', '.join(sorted(touched))}")
+                time.sleep(args.interval)
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
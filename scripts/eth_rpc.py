@@ -0,0 +1,116 @@
+import http.client
+import itertools
+import json
+from urllib.parse import urlsplit
+
+from eth_abi import decode, encode
+from eth_hash.auto import keccak
+
+DEFAULT_RPC_URL = "http://127.0.0.1:8545"  # npx hardhat node
+
+
+class RpcError(Exception):
+    """Error object returned by the node for one JSON-RPC request."""
+
+    def __init__(self, error):
+        super().__init__(error.get("message", str(error)))
+        self.code = error.get("code")
+        self.data = error.get("data")
+
+
+class JsonRpcClient:
+    """JSON-RPC client that keeps one HTTP connection to the node open between requests.
+
+    Opening a connection per call costs more than the call itself on a local node,
+    batch() additionally sends many requests in one round trip.
+    """
+
+    def __init__(self, url=DEFAULT_RPC_URL, timeout=60):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path or "/"
+        self.https = parts.scheme == "https"
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._connection = None
+
+    def request(self, method, params=()):
+        response = self._post({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)})
+        if "error" in response:
+            raise RpcError(response["error"])
+        return response["result"]
+
+    def batch(self, calls):
+        """Sends [(method, params), ...] as one batch, returns the results in the same order.
+
+        Failed requests are returned as RpcError instances instead of raising, so one
+        reverting call does not lose the results of the others.
+        """
+        if not calls:
+            return []
+        ids = [next(self._ids) for _ in calls]
+        payload = [{"jsonrpc": "2.0", "id": i, "method": method, "params": list(params)}
+                   for i, (method, params) in zip(ids, calls)]
+        by_id = {response["id"]: response for response in self._post(payload)}
+        return [RpcError(by_id[i]["error"]) if "error" in by_id[i] else by_id[i]["result"] for i in ids]
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _post(self, payload):
+        body = json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json"}
+        # a node may drop idle keep-alive connections, reconnect once before giving up
+        for attempt in range(2):
+            connection = self._connect()
+            try:
+                connection.request("POST", self.path, body, headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+        if response.status != 200:
+            raise RpcError({"code": response.status, "message": data.decode(errors="replace")})
+        return json.loads(data)
+
+    def _connect(self):
+        if self._connection is None:
+            connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self._connection = connection_class(self.host, self.port, timeout=self.timeout)
+        return self._connection
+
+
+def selector(signature):
+    """4 byte function selector of e.g. 'didDocuments(address)'."""
+    return keccak(signature.encode())[:4]
+
+
+def event_topic(signature):
+    return "0x" + keccak(signature.encode()).hex()
+
+
+def encode_call(signature, types, args):
+    return "0x" + (selector(signature) + encode(types, args)).hex()
+
+
+def decode_result(types, result):
+    return decode(types, bytes.fromhex(result[2:]))
+
+
+def block_tag(block):
+    return block if isinstance(block, str) else hex(block)
+
+
+def topic_address(topic):
+    # indexed addresses are left padded to 32 bytes
+    return "0x" + topic[-40:]
+
+
+def topic_int(topic):
+    return int(topic, 16)
@@ -0,0 +1,294 @@
+# Declarative definitions of the gas cost figures rendered by plot_gas_cost.py.
+#
+# Every figure is a plain dict. The series it needs are named by (method, voter counts, metric)
+# and extracted once from the results by plot_gas_cost.extract_series, so figures sharing
+# a series also share the extracted array. Adding a governance method to a comparison
+# means adding one entry to `bars` (and to `prices` if the USD line should be drawn).
+#
+# Figure keys:
+#   filename        output file inside visualizations/
+#   title           axes title
+#   voters          x-axis voter counts, bars may override them with their own `voters`
+#   metric          results metric drawn as bars (default totalProcessGas)
+#   bars            [{method, label, color, voters?, offset?}], offsets default to centered bars
+#   prices          [{method, label, color, marker}] USD lines on a twin axis, optional
+#   figsize, width, xlabel, xlabel_pad, ylabel, legend, price_legend, bar_values, separators,
+#   tick_labels, zorder, subplots_right  layout details, see plot_gas_cost.draw_figure
+#   (separator offsets are in x-axis units relative to each voter group)
+
+VOTERS = [5, 10, 20, 30, 40, 50]  # x-axis values
+CONTROLLERS = [10, 20, 40, 60, 80, 100]
+SELECTED_VOTERS = [10, 20, 30, 40]  # Selected voter numbers
+SELECTED_CONTROLLERS = [20, 40, 60, 80]  # Corresponding controller numbers (doubled)
+PENDING_PROPOSALS = [0, 1, 5, 10, 25, 50]  # other pending proposals of the did when one gets approved
+
+
+def bar(method, label, color, **extra):
+    return dict(method=method, label=label, color=color, **extra)
+
+
+def price(method, label, color, marker='o'):
+    return dict(method=method, label=label, color=color, marker=marker)
+
+
+FIGURES = [
+    # First plot: Three types of weighted majority costs
+    dict(
+        filename='weighted_majority_comparison.png',
+        title='Weighted Majority Governance Gas Costs Comparison',
+        voters=VOTERS,
+        bars=[
+            bar('WeightedMajorityController', 'Weighted Majority', '#2196F3'),
+            bar('WeightedMajorityToken', 'Weighted Majority Token', '#4CAF50'),
+            bar('WeightedMajorityVC', 'Weighted Majority VC', '#FFC107'),
+        ],
+        prices=[
+            price('WeightedMajorityController', 'Weighted Majority Controller (USD)', '#2196F3'),
+            price('WeightedMajorityToken', 'Weighted Majority Token (USD)', '#4CAF50'),
+            price('WeightedMajorityVC', 'Weighted Majority VC (USD)', '#FFC107'),
+        ],
+    ),
+    # Single controller votes vs one batched transaction of signed votes
+    dict(
+        filename='weighted_majority_batch_comparison.png',
+        title='Weighted Majority Single vs Batched Votes Gas Costs',
+        voters=VOTERS,
+        metric='totalVotingGas',
+        ylabel='Total Voting Gas (millions)',
+        bars=[
+            bar('WeightedMajority', 'Weighted Majority (one transaction per vote)', '#2196F3'),
+            bar('WeightedMajorityBatch', 'Weighted Majority (batched votes)', '#0D47A1'),
+        ],
+    ),
+    # Second plot: Time Limited vs NofM
+    dict(
+        filename='time_nofm_comparison.png',
+        title='Time Limited vs NofM Governance Gas Costs',
+        voters=VOTERS,
+        bars=[
+            bar('TimeLimited', 'Time Limited', '#FF5733'),
+            bar('NofM', 'N of M', '#33FF57'),
+        ],
+        prices=[
+            price('TimeLimited', 'Time Limited (USD)', '#FF5733'),
+            price('NofM', 'N of M (USD)', '#33FF57'),
+        ],
+    ),
+    # Controller lists stored on-chain vs only their merkle root with a proof per vote
+    dict(
+        filename='merkle_controllers_comparison.png',
+        title='Controller List vs Merkle Root Gas Costs',
+        voters=VOTERS,
+        width=0.2,
+        bars=[
+            bar('NofM', 'N of M', '#33FF57'),
+            bar('NofMMerkle', 'N of M (merkle root)', '#1B5E20'),
+            bar('TimeLimited', 'Time Limited', '#FF5733'),
+            bar('TimeLimitedMerkle', 'Time Limited (merkle root)', '#B71C1C'),
+        ],
+    ),
+    # Documents stored in full vs only their hash with the document in the DocumentPayload event
+    dict(
+        filename='committed_documents_comparison.png',
+        title='Stored vs Hash-Committed DID Document Proposal Gas Costs',
+        voters=VOTERS,
+        metric='initialCreateGas',
+        ylabel='Proposal Creation Gas (millions)',
+        bars=[
+            bar('NofM', 'N of M (stored document)', '#33FF57'),
+            bar('NofMCommitted', 'N of M (committed document)', '#00796B'),
+        ],
+    ),
+    # Third plot: Independent Governance
+    dict(
+        filename='independent_governance.png',
+        title='Independent Governance Gas Costs',
+        voters=CONTROLLERS,
+        figsize=(10, 6),
+        width=0.8,
+        xlabel='Number of Controllers',
+        legend=None,
+        bar_values=True,  # Add value labels on bars
+        bars=[bar('Independent', None, '#9C27B0')],
+        prices=[price('Independent', 'Independent (USD)', '#9C27B0')],
+    ),
+    # Approval gas while other proposals of the did are pending, they are invalidated in constant gas
+    dict(
+        filename='proposal_invalidation.png',
+        title='Proposal Approval Gas Costs with Pending Proposals',
+        voters=PENDING_PROPOSALS,
+        metric='totalVotingGas',
+        figsize=(10, 6),
+        width=0.8,
+        xlabel='Number of other pending Proposals',
+        ylabel='Approving Vote Gas (millions)',
+        legend=None,
+        bar_values=True,
+        bars=[bar('ProposalInvalidation', None, '#607D8B')],
+    ),
+    # Fourth plot: Weighted Majority Token vs VC
+    dict(
+        filename='weighted_token_vs_vc.png',
+        title='Weighted Majority Token vs VC Gas Costs',
+        voters=VOTERS,
+        bars=[
+            bar('WeightedMajorityToken', 'Weighted Majority Token', '#4CAF50'),
+            bar('WeightedMajorityVC', 'Weighted Majority VC', '#FFC107'),
+        ],
+        prices=[
+            price('WeightedMajorityToken', 'Weighted Majority Token (USD)', '#4CAF50'),
+            price('WeightedMajorityVC', 'Weighted Majority VC (USD)', '#FFC107'),
+        ],
+    ),
+    # Fifth plot: Offchain
+    dict(
+        filename='offchain_comparison.png',
+        title='Offchain Governance Gas Costs Comparison',
+        voters=VOTERS,
+        bars=[
+            bar('OffChainController', 'Offchain', '#2196F3'),
+            bar('OffChainToken', 'Offchain Token', '#4CAF50'),
+            bar('OffChainVC', 'Offchain VC', '#FFC107'),
+        ],
+        prices=[
+            price('OffChainController', 'Offchain Controller (USD)', '#2196F3'),
+            price('OffChainToken', 'Offchain Token (USD)', '#4CAF50'),
+            price('OffChainVC', 'Offchain VC (USD)', '#FFC107'),
+        ],
+    ),
+    # Per voter gas of one credential signature per vote vs one signed credential list per issuer
+    dict(
+        filename='offchain_aggregated_comparison.png',
+        title='Offchain Per Voter Gas Costs with Aggregated Credential Signatures',
+        voters=VOTERS,
+        width=0.2,
+        metric='averageVoteGas',
+        ylabel='Average Vote Gas (millions)',
+        bars=[
+            bar('OffChainToken', 'Offchain Token', '#4CAF50'),
+            bar('OffChainTokenAggregated', 'Offchain Token (aggregated)', '#1B5E20'),
+            bar('OffChainVC', 'Offchain VC', '#FFC107'),
+            bar('OffChainVCAggregated', 'Offchain VC (aggregated)', '#FF6F00'),
+        ],
+    ),
+    # Sixth plot: Offchain VC vs Token comparison
+    dict(
+        filename='offchain_token_vc_comparison.png',
+        title='Offchain Token vs VC Gas Costs Comparison',
+        voters=VOTERS,
+        bars=[
+            bar('OffChainToken', 'Offchain Token', '#4CAF50'),
+            bar('OffChainVC', 'Offchain VC', '#FFC107'),
+        ],
+        prices=[
+            price('OffChainToken', 'Offchain Token (USD)', '#4CAF50'),
+            price('OffChainVC', 'Offchain VC (USD)', '#FFC107'),
+        ],
+    ),
+    # Seventh plot: Weighted Majority vs Offchain comparison
+    dict(
+        filename='weighted_offchain_comparison.png',
+        title='Weighted Majority vs Offchain Governance Comparison',
+        voters=VOTERS,
+        figsize=(15, 8),
+        width=0.15,  # Narrower width since we have 6 bars
+        legend=dict(loc='upper left'),
+        price_legend=dict(bbox_to_anchor=(0, 0.65), loc='center left'),
+        subplots_right=0.85,
+        bars=[
+            bar('WeightedMajorityController', 'Weighted Majority Controller', '#1976D2'),
+            bar('OffChainController', 'Offchain Controller', '#2196F3'),
+            bar('WeightedMajorityToken', 'Weighted Majority Token', '#2E7D32'),
+            bar('OffChainToken', 'Offchain Token', '#4CAF50'),
+            bar('WeightedMajorityVC', 'Weighted Majority VC', '#FFA000'),
+            bar('OffChainVC', 'Offchain VC', '#FFC107'),
+        ],
+        prices=[
+            price('WeightedMajorityController', 'Weighted Majority Controller (USD)', '#1976D2'),
+            price('OffChainController', 'Offchain Controller (USD)', '#2196F3', marker='s'),
+            price('WeightedMajorityToken', 'Weighted Majority Token (USD)', '#2E7D32'),
+            price('OffChainToken', 'Offchain Token (USD)', '#4CAF50', marker='s'),
+            price('WeightedMajorityVC', 'Weighted Majority VC (USD)', '#FFA000'),
+            price('OffChainVC', 'Offchain VC (USD)', '#FFC107', marker='s'),
+        ],
+    ),
+    # Eighth plot (unified version): Comprehensive comparison
+    dict(
+        filename='comprehensive_comparison_unified.png',
+        title='Comprehensive Governance Implementation Comparison',
+        voters=SELECTED_VOTERS,
+        figsize=(15, 8),
+        width=0.1,  # Slightly narrower to accommodate spacing
+        xlabel='Number of Voters (Controllers for Independent)',
+        xlabel_pad=10,
+        legend=dict(bbox_to_anchor=(0, 1), loc='upper left'),
+        # Add a light gray vertical line to separate Independent
+        separators=[dict(offset=0.35)],
+        # Create double x-axis labels
+        tick_labels=[f'{v}\n({c})' for v, c in zip(SELECTED_VOTERS, SELECTED_CONTROLLERS)],
+        zorder=2,
+        subplots_right=0.85,
+        bars=[
+            # Group 1: Weighted Majority (Blues)
+            bar('WeightedMajorityController', 'Weighted Majority Controller', '#1976D2'),
+            bar('WeightedMajorityToken', 'Weighted Majority Token', '#2196F3'),
+            bar('WeightedMajorityVC', 'Weighted Majority VC', '#64B5F6'),
+            # Group 2: Offchain (Greens)
+            bar('OffChainController', 'Offchain Controller', '#2E7D32'),
+            bar('OffChainToken', 'Offchain Token', '#4CAF50'),
+            bar('OffChainVC', 'Offchain VC', '#81C784'),
+            # N of M (Purple)
+            bar('NofM', 'N of M Controller', '#9C27B0'),
+            # Independent (Orange) - separated by small gap
+            bar('Independent', 'Independent Controller', '#FF9800', voters=SELECTED_CONTROLLERS, offset=4.5),
+        ],
+    ),
+    # Ninth plot (corrected): Eight governance methods comparison
+    dict(
+        filename='eight_governance_comparison.png',
+        title='Governance Implementation Comparison',
+        voters=SELECTED_VOTERS,
+        figsize=(15, 8),
+        width=0.1,  # Adjusted width for 8 bars
+        legend=dict(bbox_to_anchor=(0, 1), loc='upper left'),
+        subplots_right=0.85,
+        bars=[
+            # Group 1: Weighted Majority (Blues)
+            bar('WeightedMajorityController', 'Weighted Majority Controller', '#1976D2'),
+            bar('WeightedMajorityToken', 'Weighted Majority Token', '#2196F3'),
+            bar('WeightedMajorityVC', 'Weighted Majority VC', '#64B5F6'),
+            # Group 2: Offchain (Greens)
+            bar('OffChainController', 'Offchain Controller', '#2E7D32'),
+            bar('OffChainToken', 'Offchain Token', '#4CAF50'),
+            bar('OffChainVC', 'Offchain VC', '#81C784'),
+            # Time Limited (Red) and N of M (Purple)
+            bar('TimeLimited', 'Time Limited Controller', '#D32F2F'),
+            bar('NofM', 'N of M Controller', '#9C27B0'),
+        ],
+    ),
+    # Ninth plot (alternative grouping): Eight governance methods comparison
+    dict(
+        filename='eight_governance_comparison_regrouped.png',
+        title='Governance Implementation Comparison (Grouped by Architecture)',
+        voters=SELECTED_VOTERS,
+        figsize=(15, 8),
+        width=0.1,  # Width for 8 bars
+        legend=dict(bbox_to_anchor=(0, 1), loc='upper left'),
+        # Add subtle vertical separators between groups
+        separators=[dict(offset=-0.1, alpha=0.3), dict(offset=0.2, alpha=0.3)],
+        subplots_right=0.85,
+        bars=[
+            # Group 1: Controller-based (Blues/Purples)
+            bar('WeightedMajorityController', 'Weighted Majority Controller', '#1976D2'),
+            bar('OffChainController', 'Offchain Controller', '#2196F3'),
+            bar('TimeLimited', 'Time Limited Controller', '#D32F2F'),
+            bar('NofM', 'N of M Controller', '#9C27B0'),
+            # Group 2: Token-based (Greens)
+            bar('WeightedMajorityToken', 'Weighted Majority Token', '#2E7D32'),
+            bar('OffChainToken', 'Offchain Token', '#4CAF50'),
+            # Group 3: VC-based (Oranges)
+            bar('WeightedMajorityVC', 'Weighted Majority VC', '#FF9800'),
+            bar('OffChainVC', 'Offchain VC', '#FFA726'),
+        ],
+    ),
+]
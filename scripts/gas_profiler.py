@@ -0,0 +1,411 @@
+import argparse
+import glob
+import json
+import os
+from collections import Counter
+
+from eth_rpc import DEFAULT_RPC_URL, JsonRpcClient
+
+CREATES = {"CREATE", "CREATE2"}
+UNKNOWN = "<unknown>"
+MAX_SLOT_OFFSET = 256  # struct members and array elements searched above a hashed slot
+DISPATCH = "<dispatch>"  # code outside of any function: selector dispatch, ABI decoding, compiler helpers
+
+
+def decompress_source_map(source_map):
+    """Expands the compressed solc source map into one (start, length, file, jump) per instruction."""
+    entries = []
+    start, length, file, jump = -1, -1, -1, "-"
+    for item in source_map.split(";"):
+        fields = item.split(":")
+        if len(fields) > 0 and fields[0]:
+            start = int(fields[0])
+        if len(fields) > 1 and fields[1]:
+            length = int(fields[1])
+        if len(fields) > 2 and fields[2]:
+            file = int(fields[2])
+        if len(fields) > 3 and fields[3]:
+            jump = fields[3]
+        entries.append((start, length, file, jump))
+    return entries
+
+
+def instruction_offsets(code):
+    """Byte offset (pc) of every instruction, PUSH1..PUSH32 carry their immediate bytes."""
+    offsets = []
+    pc = 0
+    while pc < len(code):
+        offsets.append(pc)
+        op = code[pc]
+        pc += 1 + (op - 0x5f if 0x60 <= op <= 0x7f else 0)
+    return offsets
+
+
+def strip_metadata(code):
+    # the CBOR metadata at the end differs between otherwise equal builds, its length is in the last 2 bytes
+    if len(code) > 2:
+        length = int.from_bytes(code[-2:], "big") + 2
+        if length <= len(code):
+            return code[:-length]
+    return code
+
+
+def function_ranges(ast):
+    """(start, end, label) of every function and modifier of a source unit, labels are Contract.function."""
+    ranges = []
+
+    def visit(node, contract):
+        if isinstance(node, dict):
+            node_type = node.get("nodeType")
+            if node_type == "ContractDefinition":
+                contract = node["name"]
+            elif node_type in ("FunctionDefinition", "ModifierDefinition"):
+                start, length, _ = (int(part) for part in node["src"].split(":"))
+                name = node.get("name") or node.get("kind", "function")  # constructor, fallback, receive
+                ranges.append((start, start + length, f"{contract}.{name}" if contract else name))
+            for value in node.values():
+                if isinstance(value, (dict, list)):
+                    visit(value, contract)
+        elif isinstance(node, list):
+            for item in node:
+                visit(item, contract)
+
+    visit(ast, None)
+    return ranges
+
+
+class CodeMap:
+    """Function label and jump type of every pc of one compiled bytecode (runtime or creation)."""
+
+    def __init__(self, name, code, source_map, ranges_by_file):
+        self.name = name
+        self.labels = {}
+        self.jumps = {}
+        entries = decompress_source_map(source_map) if source_map else []
+        for pc, (start, length, file, jump) in zip(instruction_offsets(code), entries):
+            self.labels[pc] = self._label(start, start + length, ranges_by_file.get(file))
+            if jump in ("i", "o"):
+                self.jumps[pc] = jump
+
+    def _label(self, start, end, ranges):
+        # innermost function whose source range contains the instruction
+        best = None
+        for first, last, label in ranges or ():
+            if first <= start and end <= last and (best is None or last - first < best[1] - best[0]):
+                best = (first, last, label)
+        return best[2] if best else f"{self.name}.{DISPATCH}"
+
+    def label(self, pc):
+        return self.labels.get(pc, f"{self.name}.{DISPATCH}")
+
+
+class ContractInfo:
+    def __init__(self, name, runtime, creation, storage):
+        self.name = name
+        self.runtime = runtime
+        self.creation = creation
+        self.storage = storage  # slot -> name of the statically placed state variables, from the storageLayout
+
+
+def static_slots(layout):
+    """Name of every slot of the state variables, slots after the first one of a struct are 'variable+k'."""
+    types = layout.get("types") or {}
+    slots = {}
+    for entry in layout.get("storage", []):
+        slot = int(entry["slot"])
+        size = int(types.get(entry["type"], {}).get("numberOfBytes", 32))
+        slots.setdefault(slot, entry["label"])  # packed variables share the slot of the first one
+        for k in range(1, (size + 31) // 32):
+            slots.setdefault(slot + k, f"{entry['label']}+{k}")
+    return slots
+
+
+def format_key(key):
+    # mapping keys are left padded words, small ones are indexes or ids, the rest addresses or hashes
+    return str(key) if key < 2 ** 64 else hex(key)
+
+
+def load_build_info(project_root):
+    """Source maps of every contract compiled by hardhat, keyed by their runtime code without metadata."""
+    contracts = {}
+    for path in glob.glob(os.path.join(project_root, "artifacts", "build-info", "*.json")):
+        with open(path, "r") as f:
+            build = json.load(f)
+        output = build["output"]
+        ranges_by_file = {source["id"]: function_ranges(source["ast"]) for source in output["sources"].values()}
+        for source_contracts in output.get("contracts", {}).values():
+            for name, compiled in source_contracts.items():
+                evm = compiled.get("evm", {})
+                runtime = bytes.fromhex(evm.get("deployedBytecode", {}).get("object", ""))
+                creation = bytes.fromhex(evm.get("bytecode", {}).get("object", ""))
+                if not runtime:
+                    continue  # interfaces and abstract contracts
+                storage = static_slots(compiled.get("storageLayout", {}))
+                contracts[strip_metadata(runtime)] = ContractInfo(
+                    name,
+                    CodeMap(name, runtime, evm["deployedBytecode"].get("sourceMap"), ranges_by_file),
+                    CodeMap(name, creation, evm["bytecode"].get("sourceMap"), ranges_by_file),
+                    storage,
+                )
+    return contracts
+
+
+class Frame:
+    """One call frame of a trace: the code running in it and its internal function call stack."""
+
+    def __init__(self, prefix, code_map, storage_owner, info):
+        self.prefix = prefix  # folded stack of the calling frames
+        self.code_map = code_map
+        self.storage_owner = storage_owner  # DELEGATECALL runs other code on the caller's storage
+        self.info = info
+        self.internal = []
+        self.call_step = None  # (stack, gas before the call, storage key) while a child frame runs
+        self.spent = 0  # gas charged to this frame and the frames it called
+
+    def stack(self, pc):
+        label = self.code_map.label(pc) if self.code_map else UNKNOWN
+        names = self.internal + ([label] if not self.internal or self.internal[-1] != label else [])
+        return self.prefix + names
+
+    def jump(self, pc):
+        jump = self.code_map.jumps.get(pc) if self.code_map else None
+        if jump == "i":
+            self.internal.append(self.code_map.label(pc))
+        elif jump == "o" and self.internal:
+            self.internal.pop()
+
+
+class GasProfiler:
+    """Attributes the gas of traced transactions to (nested) contract functions and storage slots.
+
+    Every step of a debug_traceTransaction trace costs the difference to the gas of the next
+    step of its frame; a call step is charged what the call took minus the gas its callee frame
+    spent itself, so the callee's gas is only counted in the callee's stacks.
+
+    Storage slots are named after their state variable. Mapping entries and array elements live
+    at keccak hashes, the 32 and 64 byte inputs of the SHA3 steps are read from the traced memory
+    to name them 'variable[key]' and 'variable[]' (plus '+k' for struct members and elements).
+    Without memory (trace_memory=False) those slots stay hex.
+    """
+
+    def __init__(self, client, contracts, trace_memory=True):
+        self.client = client
+        self.contracts = contracts
+        self.trace_memory = trace_memory
+        self.folded = Counter()  # 'A.f;B.g' -> self gas
+        self.storage = Counter()  # (contract, slot, op) -> gas
+        self.transactions = 0
+        self.gas_used = 0
+        self.refunds = 0
+        self._code = {}
+        self._preimages = {}  # keccak hash -> (key or None for arrays, base slot)
+        self._slot_names = {}
+
+    def contract_at(self, address):
+        address = address.lower()
+        if address not in self._code:
+            code = bytes.fromhex(self.client.request("eth_getCode", [address, "latest"])[2:])
+            self._code[address] = self.contracts.get(strip_metadata(code)) if code else None
+        return self._code[address]
+
+    def profile(self, tx_hash):
+        tx = self.client.request("eth_getTransactionByHash", [tx_hash])
+        receipt = self.client.request("eth_getTransactionReceipt", [tx_hash])
+        # hardhat reads disableMemory, geth enableMemory
+        options = {"disableMemory": not self.trace_memory, "enableMemory": self.trace_memory, "disableStorage": True}
+        trace = self.client.request("debug_traceTransaction", [tx_hash, options])
+        steps = trace["structLogs"]
+
+        if tx["to"] is None:
+            info = self.contract_at(receipt["contractAddress"])
+            root = Frame([], info.creation if info else None, receipt["contractAddress"], info)
+        else:
+            info = self.contract_at(tx["to"])
+            root = Frame([], info.runtime if info else None, tx["to"], info)
+        gas_used = int(receipt["gasUsed"], 16)
+        # the gas missing before the first step is paid up front (21000 plus calldata)
+        intrinsic = int(tx["gas"], 16) - steps[0]["gas"] if steps else gas_used
+        self.folded[(info.name if info else UNKNOWN) + ".<intrinsic>"] += intrinsic
+
+        frames = [root]
+        for i, step in enumerate(steps):
+            frame = frames[-1]
+            nxt = steps[i + 1] if i + 1 < len(steps) else None
+            pc, op = step["pc"], step["op"]
+            stack = frame.stack(pc)
+            if op in ("SHA3", "KECCAK256") and nxt is not None and "memory" in step:
+                self._record_hash(step, nxt)
+
+            if nxt is not None and nxt["depth"] > step["depth"]:
+                # entering a child frame, its cost is settled when it returns
+                frame.call_step = (stack, step["gas"], self._storage_key(frame, step))
+                frames.append(self._child(frame, step, stack))
+                continue
+            if nxt is not None and nxt["depth"] == step["depth"]:
+                cost = step["gas"] - nxt["gas"]
+            else:
+                cost = step["gasCost"]  # last step of a frame
+            self._charge(frame, stack, cost, self._storage_key(frame, step))
+            frame.jump(pc)
+
+            if nxt is not None and nxt["depth"] < step["depth"]:
+                finished = frames.pop()
+                caller = frames[-1]
+                call_stack, gas_before, key = caller.call_step
+                self._charge(caller, call_stack, gas_before - nxt["gas"] - finished.spent, key)
+                caller.spent += finished.spent
+                caller.call_step = None
+
+        self.refunds += max(intrinsic + root.spent - gas_used, 0)
+        self.transactions += 1
+        self.gas_used += gas_used
+
+    def _child(self, frame, step, stack):
+        op = step["op"]
+        prefix = stack
+        if op in CREATES:
+            child = Frame(prefix + ["<create>"], None, None, None)
+        else:
+            target = "0x" + format(int(step["stack"][-2], 16), "040x")
+            info = self.contract_at(target)
+            owner = frame.storage_owner if op in ("DELEGATECALL", "CALLCODE") else target
+            child = Frame(prefix, info.runtime if info else None, owner, info)
+            if info is None:
+                child.prefix = prefix + [target]
+        return child
+
+    def _charge(self, frame, stack, cost, storage_key):
+        self.folded[";".join(stack)] += cost
+        frame.spent += cost
+        if storage_key is not None:
+            self.storage[storage_key] += cost
+
+    def _record_hash(self, step, nxt):
+        offset, length = int(step["stack"][-1], 16), int(step["stack"][-2], 16)
+        if length not in (32, 64):
+            return  # slots only hash a mapping key with its base slot or the slot of an array
+        memory = step["memory"]
+        first, last = offset // 32, (offset + length + 31) // 32
+        data = bytes.fromhex("".join(memory[first:last])).ljust((last - first) * 32, b"\0")
+        data = data[offset % 32:offset % 32 + length]
+        words = [int.from_bytes(data[i:i + 32], "big") for i in range(0, length, 32)]
+        self._preimages[int(nxt["stack"][-1], 16)] = (words[0], words[1]) if length == 64 else (None, words[0])
+
+    def slot_name(self, info, slot, depth=0):
+        """'variable', 'variable+k', 'variable[key]+k' or 'variable[]+k' of a slot, hex when unknown."""
+        key = (info.name if info else None, slot)
+        name = self._slot_names.get(key) or self._resolve_slot(info, slot, depth)
+        if not name.startswith("0x"):
+            self._slot_names[key] = name  # hex ones may still be named by a later hash
+        return name
+
+    def _resolve_slot(self, info, slot, depth):
+        if info and slot in info.storage:
+            return info.storage[slot]
+        if depth < 8:
+            for k in range(MAX_SLOT_OFFSET):
+                preimage = self._preimages.get(slot - k)
+                if preimage is None:
+                    continue
+                mapping_key, base = preimage
+                name = self.slot_name(info, base, depth + 1)
+                name += "[]" if mapping_key is None else f"[{format_key(mapping_key)}]"
+                return name + (f"+{k}" if k else "")
+        return hex(slot)
+
+    def _storage_key(self, frame, step):
+        if step["op"] not in ("SLOAD", "SSTORE"):
+            return None
+        slot = int(step["stack"][-1], 16)
+        info = self.contract_at(frame.storage_owner) if frame.storage_owner else None
+        owner = info.name if info else frame.storage_owner
+        return owner, self.slot_name(info, slot), step["op"]
+
+    def variables(self):
+        """Storage gas per contract state variable, the slots of mapping entries and elements summed up."""
+        totals = Counter()
+        for (owner, slot, op), gas in self.storage.items():
+            totals[(owner, slot.split("[")[0].split("+")[0], op)] += gas
+        return totals
+
+    def functions(self):
+        """(self gas, inclusive gas) per function, derived from the folded stacks."""
+        exclusive = Counter()
+        inclusive = Counter()
+        for stack, gas in self.folded.items():
+            names = stack.split(";")
+            exclusive[names[-1]] += gas
+            for name in set(names):
+                inclusive[name] += gas
+        return exclusive, inclusive
+
+    def write_folded(self, path):
+        """Writes 'frame;frame;frame gas' lines, the input of flamegraph.pl, inferno or speedscope."""
+        with open(path, "w") as f:
+            for stack, gas in sorted(self.folded.items()):
+                if gas > 0:
+                    f.write(f"{stack} {gas}\n")
+
+    def report(self, top=30):
+        exclusive, inclusive = self.functions()
+        lines = [f"{self.transactions} transactions, {self.gas_used} gas used, {self.refunds} gas refunded", "",
+                 f"{'function':<60}{'self gas':>14}{'self %':>8}{'incl. gas':>14}"]
+        for name, gas in exclusive.most_common(top):
+            lines.append(f"{name:<60}{gas:>14}{gas / max(self.gas_used, 1):>8.1%}{inclusive[name]:>14}")
+        for title, totals in (("storage variable", self.variables()), ("storage slot", self.storage)):
+            lines += ["", f"{title:<60}{'op':>8}{'gas':>14}"]
+            for (owner, slot, op), gas in totals.most_common(top):
+                lines.append(f"{f'{owner}.{slot}':<60}{op:>8}{gas:>14}")
+        return "\n".join(lines)
+
+
+def block_transactions(client, first, last):
+    hashes = []
+    for number in range(first, last + 1):
+        block = client.request("eth_getBlockByNumber", [hex(number), False])
+        hashes.extend(block["transactions"])
+    return hashes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Attribute the gas of transactions to contract functions and storage slots',
+        epilog='Storage slots are named after their state variable, mapping entries and array elements as '
+               'variable[key] and variable[] from the hash inputs in the traced memory. Names need artifacts '
+               'compiled with the storageLayout output of hardhat.config.js (npx hardhat compile --force).')
+    parser.add_argument('--rpc', default=DEFAULT_RPC_URL,
+                        help='JSON-RPC url of the node the transactions ran on, e.g. the sweep run with --network localhost')
+    parser.add_argument('--tx', action='append', default=[], help='transaction hash to profile (repeatable)')
+    parser.add_argument('--blocks', default=None, help="profile every transaction of the blocks 'first-last'")
+    parser.add_argument('--folded', default='gas_profile.folded', help='output file of the folded stacks')
+    parser.add_argument('--top', type=int, default=30, help='rows of the function and storage tables')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='trace without memory, smaller traces but mapping and array slots stay hex')
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    contracts = load_build_info(project_root)
+    if not contracts:
+        parser.error('no build info in artifacts/build-info, run `npx hardhat compile` first')
+
+    client = JsonRpcClient(args.rpc, timeout=600)  # traces of large sweeps take a while
+    hashes = list(args.tx)
+    if args.blocks:
+        first, _, last = args.blocks.partition('-')
+        hashes += block_transactions(client, int(first), int(last or first))
+    if not hashes:
+        parser.error('nothing to profile, pass --tx or --blocks')
+
+    profiler = GasProfiler(client, contracts, trace_memory=not args.no_memory)
+    for i, tx_hash in enumerate(hashes):
+        profiler.profile(tx_hash)
+        if (i + 1) % 100 == 0:
+            print(f"profiled {i + 1}/{len(hashes)} transactions")
+    profiler.write_folded(args.folded)
+    print(profiler.report(args.top))
+    print(f"\nwrote folded stacks to {args.folded}")
+
+
+if __name__ == '__main__':
+    main()
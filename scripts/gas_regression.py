@@ -0,0 +1,262 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from gas_results import METRICS, load_gas_results
+
+DEFAULT_BLOCK_GAS_LIMIT = 30_000_000
+PROJECTED_VOTERS = 1000
+# metric whose gas has to fit into one block, the votes of the batch and off-chain methods are one transaction
+LIMIT_METRIC = "totalVotingGas"
+
+# relative increase that counts as a regression, per compared quantity
+DEFAULT_THRESHOLDS = dict(marginal=0.02, fixed=0.05, projected=0.02)
+
+
+class ScalingModel:
+    """gas = fixed + marginal * voters, fitted per (method, metric) to a gas sweep.
+
+    `fixed`, `marginal`, `r2` and `points` are (methods, metrics) arrays. Methods measured
+    at a single voter count have no marginal cost (NaN) and are left out of comparisons.
+    """
+
+    def __init__(self, methods, metrics, fixed, marginal, r2, points):
+        self.methods = np.asarray(methods, dtype=str)
+        self.metrics = list(metrics)
+        self.fixed = np.asarray(fixed, dtype=np.float64)
+        self.marginal = np.asarray(marginal, dtype=np.float64)
+        self.r2 = np.asarray(r2, dtype=np.float64)
+        self.points = np.asarray(points, dtype=np.int64)
+
+    def predict(self, voters):
+        """(methods, metrics, len(voters)) array of the modelled gas."""
+        voters = np.asarray(voters, dtype=np.float64)
+        return self.fixed[..., None] + self.marginal[..., None] * voters
+
+    def voters_at(self, gas_limit):
+        """Largest voter count whose modelled gas stays within `gas_limit`, inf without marginal cost."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            voters = np.floor((gas_limit - self.fixed) / self.marginal)
+        voters[~(self.marginal > 0)] = np.inf
+        return np.maximum(voters, 0)
+
+    def metric_index(self, metric):
+        return self.metrics.index(metric)
+
+    def to_json(self):
+        return {
+            metric: {
+                str(method): dict(
+                    fixed=float(self.fixed[i, k]),
+                    marginal=float(self.marginal[i, k]),
+                    r2=float(self.r2[i, k]),
+                    points=int(self.points[i, k]),
+                )
+                for i, method in enumerate(self.methods)
+            }
+            for k, metric in enumerate(self.metrics)
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        metrics = list(data)
+        methods = sorted({method for by_method in data.values() for method in by_method})
+        shape = (len(methods), len(metrics))
+        arrays = {name: np.full(shape, np.nan) for name in ("fixed", "marginal", "r2")}
+        points = np.zeros(shape, dtype=np.int64)
+        for k, metric in enumerate(metrics):
+            for i, method in enumerate(methods):
+                entry = data[metric].get(method)
+                if entry is None:
+                    continue
+                for name in arrays:
+                    arrays[name][i, k] = entry[name]
+                points[i, k] = entry["points"]
+        return cls(methods, metrics, arrays["fixed"], arrays["marginal"], arrays["r2"], points)
+
+
+def fit_scaling(table, metrics=METRICS):
+    """Least squares fit of every method and metric of a ResultTable at once.
+
+    The rows of one method are contiguous in the table, so the sums of the normal equations
+    are segment sums (np.add.reduceat) over all metrics together, no loop per method.
+    """
+    methods, starts = np.unique(table.methods, return_index=True)
+    x = table.voters.astype(np.float64)[:, None]
+    y = np.stack([table.column(metric).astype(np.float64) for metric in metrics], axis=1)
+
+    def segment_sum(values):
+        return np.add.reduceat(values, starts, axis=0)
+
+    n = segment_sum(np.ones_like(x))
+    sx, sxx = segment_sum(x), segment_sum(x * x)
+    sy, sxy, syy = segment_sum(y), segment_sum(x * y), segment_sum(y * y)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominator = n * sxx - sx * sx
+        marginal = np.where(denominator > 0, (n * sxy - sx * sy) / denominator, np.nan)
+        fixed = np.where(denominator > 0, (sy - marginal * sx) / n, sy / n)
+        # r2 = 1 - SSres / SStot, both expanded into the same sums
+        ss_tot = syy - sy * sy / n
+        ss_res = syy - fixed * sy - marginal * sxy
+        r2 = np.where(ss_tot > 0, 1 - ss_res / ss_tot, 1.0)
+    points = np.broadcast_to(n, fixed.shape).astype(np.int64)
+    return ScalingModel(methods, metrics, fixed, marginal, r2, points)
+
+
+def compare(current, baseline, voters=PROJECTED_VOTERS, thresholds=DEFAULT_THRESHOLDS):
+    """Aligns both models on their common methods and metrics and computes the relative changes.
+
+    Returns a dict of (methods, metrics) arrays plus the method and metric names, and
+    the methods only one of the models knows.
+    """
+    methods, current_rows, baseline_rows = np.intersect1d(current.methods, baseline.methods, return_indices=True)
+    metrics = [metric for metric in current.metrics if metric in baseline.metrics]
+    current_cols = [current.metric_index(metric) for metric in metrics]
+    baseline_cols = [baseline.metric_index(metric) for metric in metrics]
+
+    quantities = {}
+    for name, extract in (
+            ("marginal", lambda model: model.marginal),
+            ("fixed", lambda model: model.fixed),
+            ("projected", lambda model: model.predict([voters])[..., 0]),
+    ):
+        new = extract(current)[np.ix_(current_rows, current_cols)]
+        old = extract(baseline)[np.ix_(baseline_rows, baseline_cols)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = np.where(np.abs(old) > 0, (new - old) / np.abs(old), np.where(new > old, np.inf, 0.0))
+        change[np.abs(change) < 1e-9] = 0.0  # rounding noise of the fit, gas itself is deterministic
+        comparable = np.isfinite(new) & np.isfinite(old)
+        quantities[name] = dict(
+            new=new,
+            old=old,
+            change=np.where(comparable, change, np.nan),
+            regressed=comparable & (change > thresholds[name]),
+        )
+    return dict(
+        methods=methods,
+        metrics=metrics,
+        quantities=quantities,
+        added=sorted(set(current.methods) - set(baseline.methods)),
+        removed=sorted(set(baseline.methods) - set(current.methods)),
+    )
+
+
+def format_projection(model, voters=PROJECTED_VOTERS, block_gas_limit=DEFAULT_BLOCK_GAS_LIMIT):
+    metric = LIMIT_METRIC if LIMIT_METRIC in model.metrics else model.metrics[0]
+    k = model.metric_index(metric)
+    projected = model.predict([voters])[:, k, 0]
+    at_limit = model.voters_at(block_gas_limit)[:, k]
+    lines = [
+        f"{metric}: fixed + marginal * voters, projected to {voters} voters and to a {block_gas_limit} gas block",
+        f"{'method':<28}{'fixed':>14}{'marginal':>12}{'r2':>8}{f'@{voters}':>16}{'max voters':>12}",
+    ]
+    for i, method in enumerate(model.methods):
+        limit = "-" if np.isinf(at_limit[i]) else f"{int(at_limit[i])}"
+        lines.append(f"{method:<28}{model.fixed[i, k]:>14.0f}{model.marginal[i, k]:>12.0f}{model.r2[i, k]:>8.4f}"
+                     f"{projected[i]:>16.0f}{limit:>12}")
+    return "\n".join(lines)
+
+
+def format_diff(comparison, show_all=False):
+    """Diff report of the comparison, only changed quantities unless `show_all`."""
+    lines = [f"{'method':<28}{'metric':<18}{'quantity':<11}{'baseline':>14}{'current':>14}{'change':>10}"]
+    for i, method in enumerate(comparison["methods"]):
+        for k, metric in enumerate(comparison["metrics"]):
+            for name, quantity in comparison["quantities"].items():
+                change = quantity["change"][i, k]
+                if np.isnan(change) or (change == 0 and not show_all):
+                    continue
+                flag = "  REGRESSION" if quantity["regressed"][i, k] else ""
+                lines.append(f"{method:<28}{metric:<18}{name:<11}{quantity['old'][i, k]:>14.0f}"
+                             f"{quantity['new'][i, k]:>14.0f}{change:>+10.2%}{flag}")
+    if len(lines) == 1:
+        lines.append("no changes")
+    for method in comparison["added"]:
+        lines.append(f"{method}: not in the baseline")
+    for method in comparison["removed"]:
+        lines.append(f"{method}: in the baseline but not measured")
+    return "\n".join(lines)
+
+
+def regressions(comparison):
+    return sum(int(quantity["regressed"].sum()) for quantity in comparison["quantities"].values())
+
+
+def current_commit(project_root):
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_baseline(path, model, commit=None):
+    with open(path, "w") as f:
+        json.dump(dict(commit=commit, models=model.to_json()), f, indent=2)
+
+
+def load_baseline(path):
+    with open(path, "r") as f:
+        data = json.load(f)
+    return ScalingModel.from_json(data["models"]), data.get("commit")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit gas scaling curves to a GasCost sweep and check them against a baseline')
+    parser.add_argument('--results', default=None,
+                        help='gas results, test_results.json or the streamed test_results.jsonl')
+    parser.add_argument('--baseline', default=None, help='stored baseline (default: test/gas_baseline.json)')
+    parser.add_argument('--update-baseline', action='store_true', help='store the current fit as the new baseline')
+    parser.add_argument('--metrics', default=','.join(METRICS), help='comma separated metrics to fit')
+    parser.add_argument('--voters', type=int, default=PROJECTED_VOTERS, help='voter count to extrapolate to')
+    parser.add_argument('--block-gas-limit', type=int, default=DEFAULT_BLOCK_GAS_LIMIT)
+    for name, value in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f'--{name}-threshold', type=float, default=value,
+                            help=f'relative increase of the {name} gas that fails the check (default {value})')
+    parser.add_argument('--report', default=None, help='also write the report to this file')
+    parser.add_argument('--all', action='store_true', help='list unchanged quantities in the diff as well')
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    results_path = args.results or os.path.join(project_root, 'test', 'test_results.json')
+    baseline_path = args.baseline or os.path.join(project_root, 'test', 'gas_baseline.json')
+    metrics = args.metrics.split(',')
+    unknown = sorted(set(metrics) - set(METRICS))
+    if unknown:
+        parser.error(f"unknown metrics: {', '.join(unknown)}")
+
+    model = fit_scaling(load_gas_results(results_path), metrics)
+    report = [format_projection(model, args.voters, args.block_gas_limit)]
+
+    if args.update_baseline:
+        save_baseline(baseline_path, model, current_commit(project_root))
+        print("\n".join(report))
+        print(f"stored baseline in {baseline_path}")
+        return
+    if not os.path.exists(baseline_path):
+        parser.error(f"no baseline at {baseline_path}, create one with --update-baseline")
+
+    baseline, baseline_commit = load_baseline(baseline_path)
+    thresholds = {name: getattr(args, f'{name}_threshold') for name in DEFAULT_THRESHOLDS}
+    comparison = compare(model, baseline, args.voters, thresholds)
+    failed = regressions(comparison)
+    report.append(f"\ncompared with the baseline of {baseline_commit or 'an unknown commit'}")
+    report.append(format_diff(comparison, args.all))
+    report.append(f"\n{failed} regressions" if failed else "\nno regressions")
+
+    text = "\n".join(report)
+    print(text)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(text + "\n")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
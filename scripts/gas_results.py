@@ -0,0 +1,209 @@
+import json
+
+import numpy as np
+
+# metrics written by test/GasCost.test.js for every (governance method, voter count) pair
+METRICS = (
+    "initialCreateGas",
+    "totalVotingGas",
+    "averageVoteGas",
+    "newProposalGas",
+    "totalProcessGas",
+)
+
+
+class ResultTable:
+    """Columnar view of a gas sweep.
+
+    Rows are (method, voters) pairs sorted by method and voter count, every metric is
+    one NumPy column of the same length. Rows of one method are contiguous, so a series
+    lookup is a slice plus a searchsorted instead of nested dict lookups.
+    """
+
+    def __init__(self, methods, voters, columns):
+        self.methods = np.asarray(methods, dtype=str)
+        self.voters = np.asarray(voters, dtype=np.int64)
+        self.columns = {name: np.asarray(col) for name, col in columns.items()}
+
+        order = np.lexsort((self.voters, self.methods))
+        self.methods = self.methods[order]
+        self.voters = self.voters[order]
+        self.columns = {name: col[order] for name, col in self.columns.items()}
+
+        # method -> slice of its contiguous block of rows
+        self._blocks = {}
+        names, starts, counts = np.unique(self.methods, return_index=True, return_counts=True)
+        for name, start, count in zip(names, starts, counts):
+            self._blocks[str(name)] = slice(int(start), int(start + count))
+
+    def __len__(self):
+        return len(self.voters)
+
+    def __contains__(self, method):
+        return method in self._blocks
+
+    def method_names(self):
+        return list(self._blocks)
+
+    def voter_counts(self, method):
+        return self.voters[self._block(method)]
+
+    def column(self, metric):
+        if metric not in self.columns:
+            raise KeyError(f"Unknown metric '{metric}'")
+        return self.columns[metric]
+
+    def rows(self, method, voters):
+        """Returns the row indices of `method` for every entry of `voters`."""
+        block = self._block(method)
+        available = self.voters[block]
+        voters = np.asarray(voters, dtype=np.int64)
+        positions = np.searchsorted(available, voters)
+        found = positions < len(available)
+        found[found] = available[positions[found]] == voters[found]
+        if not found.all():
+            missing = voters[~found].tolist()
+            raise KeyError(f"No results for {method} with voters {missing}")
+        return positions + block.start
+
+    def series(self, method, voters, metric="totalProcessGas"):
+        """Returns `metric` of `method` at the given voter counts as one array."""
+        return self.column(metric)[self.rows(method, voters)]
+
+    def matrix(self, methods, voters, metric="totalProcessGas"):
+        """Returns a (len(methods), len(voters)) array of `metric`."""
+        return np.stack([self.series(method, voters, metric) for method in methods])
+
+    def _block(self, method):
+        if method not in self._blocks:
+            raise KeyError(f"No results for governance method '{method}'")
+        return self._blocks[method]
+
+
+def _parse_column(values, dtype):
+    # gas values are serialized as decimal strings, parse a whole column in one go
+    if not values:
+        return np.empty(0, dtype=dtype)
+    if dtype == np.int64:
+        return np.array(values, dtype=str).astype(np.int64)
+    return np.array(values, dtype=np.float64)
+
+
+def _keep_last(methods, voters, columns):
+    """Drops all but the last row of every (method, voters) pair, e.g. after a re-run."""
+    keys = np.char.add(np.char.add(np.asarray(methods, dtype=str), ":"), np.asarray(voters).astype(str))
+    _, first_in_reversed = np.unique(keys[::-1], return_index=True)
+    keep = np.sort(len(keys) - 1 - first_in_reversed)
+    return (
+        np.asarray(methods, dtype=str)[keep],
+        np.asarray(voters, dtype=np.int64)[keep],
+        {name: np.asarray(col)[keep] for name, col in columns.items()},
+    )
+
+
+def concat_tables(tables):
+    """Merges tables into one, rows of later tables replace equal (method, voters) rows of earlier ones."""
+    tables = [table for table in tables if table is not None]
+    if len(tables) == 1:
+        return tables[0]
+    metrics = tables[0].columns.keys()
+    methods, voters, columns = _keep_last(
+        np.concatenate([table.methods for table in tables]),
+        np.concatenate([table.voters for table in tables]),
+        {metric: np.concatenate([table.column(metric) for table in tables]) for metric in metrics},
+    )
+    return ResultTable(methods, voters, columns)
+
+
+def table_from_results(results, dtype=np.int64, metrics=METRICS):
+    """Converts the nested {method: {voters: {metric: value}}} dict into a ResultTable.
+
+    Every value is parsed exactly once. Metrics that a method does not report
+    (e.g. the Independent method has no voting) are stored as 0.
+    """
+    methods = []
+    voters = []
+    raw = {metric: [] for metric in metrics}
+    for method, by_voters in results.items():
+        for count, entry in by_voters.items():
+            methods.append(method)
+            voters.append(int(count))
+            for metric in metrics:
+                raw[metric].append(entry.get(metric, 0))
+
+    columns = {metric: _parse_column(values, dtype) for metric, values in raw.items()}
+    return ResultTable(methods, voters, columns)
+
+
+class JsonlResultReader:
+    """Incrementally reads the JSON-Lines records that test/GasCost.test.js appends per measurement.
+
+    The reader remembers how far it got, so calling read() again while a sweep is running only
+    parses the newly appended lines. Records are converted to columns in chunks of `chunk_size`,
+    the file is never loaded as a whole. A trailing line without newline (a record that is still
+    being written) is left for the next call.
+    """
+
+    def __init__(self, path, commit=None, chunk_size=65536, metrics=METRICS):
+        self.path = path
+        self.commit = commit
+        self.chunk_size = chunk_size
+        self.metrics = metrics
+        self.offset = 0
+        self.records = 0  # records read so far, re-measured cases count again
+        self.table = None
+
+    def read(self):
+        """Parses the records appended since the last call and merges them into self.table."""
+        chunks = []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            methods, voters, raw = self._empty_chunk()
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self.offset += len(line)
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if self.commit is not None and record.get("commit") != self.commit:
+                    continue
+                self.records += 1
+                methods.append(record["method"])
+                voters.append(int(record["voters"]))
+                for metric in self.metrics:
+                    raw[metric].append(record.get(metric, 0))
+                if len(methods) >= self.chunk_size:
+                    chunks.append(self._chunk_table(methods, voters, raw))
+                    methods, voters, raw = self._empty_chunk()
+            if methods:
+                chunks.append(self._chunk_table(methods, voters, raw))
+
+        if chunks:
+            self.table = concat_tables([self.table] + chunks)
+        return self.table
+
+    def _empty_chunk(self):
+        return [], [], {metric: [] for metric in self.metrics}
+
+    def _chunk_table(self, methods, voters, raw):
+        columns = {metric: _parse_column(values, np.int64) for metric, values in raw.items()}
+        methods, voters, columns = _keep_last(methods, voters, columns)
+        return ResultTable(methods, voters, columns)
+
+
+def load_gas_results(path, commit=None):
+    """Loads test_results.json or the streamed test_results.jsonl into an int64 ResultTable."""
+    if path.endswith(".jsonl"):
+        table = JsonlResultReader(path, commit=commit).read()
+        if table is None:
+            raise ValueError(f"No gas results in {path}")
+        return table
+    with open(path, "r") as f:
+        return table_from_results(json.load(f), dtype=np.int64)
+
+
+def load_price_results(path):
+    """Loads price_test.json (USD per metric) into a float64 ResultTable."""
+    with open(path, "r") as f:
+        return table_from_results(json.load(f), dtype=np.float64)
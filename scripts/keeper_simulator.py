@@ -0,0 +1,288 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from eth_abi import decode
+
+from deployment import deploy, did_address, load_bytecode
+from did_indexer import DID_DOCUMENT, GOVERNANCE_METHOD
+from eth_rpc import DEFAULT_RPC_URL, JsonRpcClient, RpcError, decode_result, encode_call, event_topic, topic_int
+
+CREATE_DID = f"createDIDDocument(string,string,{GOVERNANCE_METHOD}[])"
+CREATE_PROPOSAL = f"createProposalWithControllers(address,uint256,uint256,{DID_DOCUMENT},{GOVERNANCE_METHOD}[])"
+PROPOSAL_CREATED = event_topic("ProposalCreated(uint256,address)")
+PROPOSAL_FINALIZED = event_topic("ProposalFinalized(uint256,uint8)")
+DOCUMENT_EDIT_RIGHTS = 3  # EditRightsLevel.Document, approvals leave the governance methods of the did untouched
+# two more controllers than the proposer, so a single yes vote keeps the process pending until it expires
+EXTRA_CONTROLLERS = ["0x" + f"{i:040x}" for i in (1, 2)]
+PROPOSAL_GAS = 800_000
+UPKEEP_GAS = 15_000_000
+
+
+class LocalChain:
+    """Hardhat node with automine turned off, every block is mined explicitly at a chosen time.
+
+    Blocks need strictly increasing timestamps, so the simulated clock advances at least
+    one second per block, also when a batch of transactions needs several blocks.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.block_times = {}
+        latest = client.request("eth_getBlockByNumber", ["latest", False])
+        self.timestamp = int(latest["timestamp"], 16)
+        client.request("evm_setAutomine", [False])
+
+    def mine(self, timestamp=0):
+        self.timestamp = max(self.timestamp + 1, timestamp)
+        self.client.request("evm_mine", [self.timestamp])
+        latest = self.client.request("eth_getBlockByNumber", ["latest", False])
+        self.block_times[int(latest["number"], 16)] = int(latest["timestamp"], 16)
+        return self.timestamp
+
+    def send_all(self, txs):
+        """Sends the transactions, mines until all of them are included and returns their receipts in order."""
+        hashes = self.client.batch([("eth_sendTransaction", [tx]) for tx in txs])
+        for result in hashes:
+            if isinstance(result, RpcError):
+                raise result
+        receipts = [None] * len(hashes)
+        while any(receipt is None for receipt in receipts):
+            self.mine()
+            missing = [i for i, receipt in enumerate(receipts) if receipt is None]
+            fetched = self.client.batch([("eth_getTransactionReceipt", [hashes[i]]) for i in missing])
+            for i, receipt in zip(missing, fetched):
+                receipts[i] = receipt
+        for receipt in receipts:
+            if receipt["status"] != "0x1":
+                raise RuntimeError(f"transaction {receipt['transactionHash']} reverted")
+        return receipts
+
+    def block_time(self, receipt):
+        return self.block_times[int(receipt["blockNumber"], 16)]
+
+    def call(self, to, signature, types=(), args=(), result_types=()):
+        data = encode_call(signature, list(types), list(args))
+        return decode_result(list(result_types), self.client.request("eth_call", [{"to": to, "data": data}, "latest"]))
+
+    def close(self):
+        self.client.request("evm_setAutomine", [True])
+
+
+def create_dids(client, registry, governance, count, durations):
+    """DIDs with one TimeLimited governance method per voting period, created from impersonated accounts."""
+    dids = [did_address(i) for i in range(count)]
+    setup = [("hardhat_impersonateAccount", [did]) for did in dids]
+    setup += [("hardhat_setBalance", [did, hex(10 ** 21)]) for did in dids]
+    txs = [("eth_sendTransaction", [{
+        "from": did,
+        "to": registry,
+        "gas": hex(5_000_000),
+        "data": encode_call(CREATE_DID, ["string", "string", f"{GOVERNANCE_METHOD}[]"], [
+            "publicKey", "authMethod",
+            [(f"TimeLimited{duration}", 0, [did] + EXTRA_CONTROLLERS, [], [], governance, "publicKey123", [duration],
+              [], [], DOCUMENT_EDIT_RIGHTS, 0, 0) for duration in durations],
+        ]),
+    }]) for did in dids]
+    for result in client.batch(setup) + client.batch(txs):
+        if isinstance(result, RpcError):
+            raise result
+    return dids
+
+
+class KeeperSimulation:
+    """Creates proposals at a steady rate and runs a keeper that polls checkUpkeep every `poll` seconds.
+
+    Every proposal picks a random did and voting period, a fraction of them gets one yes vote
+    and is approved when it expires, which invalidates the other pending proposals of its did.
+    """
+
+    def __init__(self, chain, router, governance, dids, durations, keeper, rng, approve_fraction=0.05):
+        self.chain = chain
+        self.router = router.lower()
+        self.governance = governance.lower()
+        self.dids = dids
+        self.durations = durations
+        self.keeper = keeper
+        self.rng = rng
+        self.approve_fraction = approve_fraction
+        self.expiries = {}  # proposalId => end of its voting period
+        self.latencies = []  # seconds between the end of the voting period and the finalizing block
+        self.upkeeps = []
+        self.polls = []
+
+    def create_proposals(self, count):
+        dids = self.rng.integers(len(self.dids), size=count)
+        methods = self.rng.integers(len(self.durations), size=count)
+        txs = [{
+            "from": self.dids[d],
+            "to": self.router,
+            "gas": hex(PROPOSAL_GAS),
+            "data": encode_call(CREATE_PROPOSAL, ["address", "uint256", "uint256", DID_DOCUMENT, f"{GOVERNANCE_METHOD}[]"], [
+                self.dids[d], int(m), 0, (self.dids[d], f"publicKey{len(self.expiries) + i}", "authMethod", 0), [],
+            ]),
+        } for i, (d, m) in enumerate(zip(dids, methods))]
+        votes = []
+        for receipt, d, m in zip(self.chain.send_all(txs), dids, methods):
+            proposal_id = next(topic_int(log["topics"][1]) for log in receipt["logs"] if log["topics"][0] == PROPOSAL_CREATED)
+            self.expiries[proposal_id] = self.chain.block_time(receipt) + self.durations[m]
+            if self.rng.random() < self.approve_fraction:
+                votes.append({
+                    "from": self.dids[d],
+                    "to": self.governance,
+                    "gas": hex(PROPOSAL_GAS),
+                    "data": encode_call("vote(uint256,bool)", ["uint256", "bool"], [proposal_id, True]),
+                })
+        if votes:
+            self.chain.send_all(votes)
+
+    def queue_length(self):
+        (length,) = self.chain.call(self.governance, "expiryQueueLength()", result_types=["uint256"])
+        return length
+
+    def poll_keeper(self):
+        """One keeper round, performs upkeeps until checkUpkeep reports nothing left to do."""
+        check = {"to": self.governance, "data": encode_call("checkUpkeep(bytes)", ["bytes"], [b""])}
+        poll = dict(time=self.chain.timestamp, queueLength=self.queue_length(),
+                    checkGas=int(self.chain.client.request("eth_estimateGas", [check]), 16), upkeeps=0)
+        while True:
+            needed, perform_data = self.chain.call(self.governance, "checkUpkeep(bytes)", ["bytes"], [b""],
+                                                   ["bool", "bytes"])
+            if not needed:
+                break
+            (receipt,) = self.chain.send_all([{
+                "from": self.keeper,
+                "to": self.governance,
+                "gas": hex(UPKEEP_GAS),
+                "data": encode_call("performUpkeep(bytes)", ["bytes"], [perform_data]),
+            }])
+            finalized_at = self.chain.block_time(receipt)
+            finalized = 0
+            for log in receipt["logs"]:
+                if log["address"].lower() == self.governance and log["topics"][0] == PROPOSAL_FINALIZED:
+                    proposal_id, _ = decode(["uint256", "uint8"], bytes.fromhex(log["data"][2:]))
+                    self.latencies.append(finalized_at - self.expiries[proposal_id])
+                    finalized += 1
+            self.upkeeps.append(dict(time=finalized_at, gasUsed=int(receipt["gasUsed"], 16), finalized=finalized,
+                                     requested=decode(["uint256"], perform_data)[0]))
+            poll["upkeeps"] += 1
+        self.polls.append(poll)
+
+    def run(self, proposals, rate, poll_interval):
+        start = self.chain.timestamp
+        created = 0
+        now = start
+        while created < proposals or self.queue_length() > 0:
+            now += poll_interval
+            due = min(proposals, int((now - start) * rate)) - created
+            if due > 0:
+                self.create_proposals(due)
+                created += due
+            if self.chain.timestamp < now:
+                self.chain.mine(now)
+            self.poll_keeper()
+            if self.chain.timestamp > now:
+                now = self.chain.timestamp  # mining the batches moved the clock
+        return self.chain.timestamp - start
+
+
+def summary(simulation, span):
+    latencies = np.asarray(simulation.latencies, dtype=np.float64)
+    upkeep_gas = np.asarray([u["gasUsed"] for u in simulation.upkeeps], dtype=np.float64)
+    per_upkeep = np.asarray([u["finalized"] for u in simulation.upkeeps], dtype=np.float64)
+    check_gas = np.asarray([p["checkGas"] for p in simulation.polls], dtype=np.float64)
+    queue = np.asarray([p["queueLength"] for p in simulation.polls], dtype=np.float64)
+
+    def stats(values):
+        if values.size == 0:
+            return dict(mean=None, p50=None, p99=None, max=None)
+        p50, p99 = np.percentile(values, [50, 99])
+        return dict(mean=float(values.mean()), p50=float(p50), p99=float(p99), max=float(values.max()))
+
+    return dict(
+        proposals=len(simulation.expiries),
+        finalized=int(latencies.size),
+        upkeeps=len(simulation.upkeeps),
+        simulatedSeconds=span,
+        latencySeconds=stats(latencies),
+        upkeepGas=stats(upkeep_gas),
+        finalizedPerUpkeep=stats(per_upkeep),
+        gasPerFinalized=float(upkeep_gas.sum() / latencies.size) if latencies.size else None,
+        checkGas=stats(check_gas),
+        maxQueueLength=int(queue.max()) if queue.size else 0,
+    )
+
+
+def format_summary(result):
+    def row(label, values, unit=""):
+        if values["mean"] is None:
+            return f"{label:<24}-"
+        return (f"{label:<24}mean {values['mean']:>12,.0f}{unit}  p50 {values['p50']:>12,.0f}{unit}"
+                f"  p99 {values['p99']:>12,.0f}{unit}  max {values['max']:>12,.0f}{unit}")
+
+    return "\n".join([
+        f"{result['proposals']} proposals, {result['finalized']} finalized by {result['upkeeps']} upkeeps "
+        f"over {result['simulatedSeconds']} simulated seconds, up to {result['maxQueueLength']} queued",
+        row("finalization latency", result["latencySeconds"], "s"),
+        row("performUpkeep gas", result["upkeepGas"]),
+        row("finalized per upkeep", result["finalizedPerUpkeep"]),
+        row("checkUpkeep gas", result["checkGas"]),
+        f"{'gas per finalized':<24}{result['gasPerFinalized'] or 0:,.0f}",
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate a Chainlink keeper finalizing TimeLimitedGovernance proposals '
+                                                 'on a local hardhat node with time warping')
+    parser.add_argument('--rpc', default=DEFAULT_RPC_URL, help='JSON-RPC url of a hardhat node (npx hardhat node)')
+    parser.add_argument('--proposals', type=int, default=10000, help='number of proposals to create')
+    parser.add_argument('--dids', type=int, default=100, help='number of DIDs the proposals are spread over')
+    parser.add_argument('--durations', default='300,900,3600', help='comma separated voting periods in seconds')
+    parser.add_argument('--rate', type=float, default=2.0, help='proposals created per simulated second')
+    parser.add_argument('--poll', type=int, default=60, help='seconds between two checkUpkeep calls of the keeper')
+    parser.add_argument('--approve-fraction', type=float, default=0.05,
+                        help='fraction of proposals that get a yes vote and are approved when they expire')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='write the summary, polls and upkeeps to this JSON file')
+    args = parser.parse_args()
+    durations = [int(duration) for duration in args.durations.split(',')]
+    if min(durations) < 300:
+        parser.error("TimeLimitedGovernance needs voting periods of at least 300 seconds")
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    client = JsonRpcClient(args.rpc)
+    deployer = client.request("eth_accounts")[0]
+    registry = deploy(client, deployer, load_bytecode(project_root, 'DIDRegistry.sol', 'DIDRegistry'))
+    credentials = deploy(client, deployer, load_bytecode(project_root, 'utils/Credentials.sol', 'Credentials'))
+    router = deploy(client, deployer, load_bytecode(project_root, 'DIDRegistryRouter.sol', 'DIDRegistryRouter'),
+                    ['address', 'address'], [registry, credentials])
+    governance = deploy(client, deployer,
+                        load_bytecode(project_root, 'governance/TimeLimitedGovernance.sol', 'TimeLimitedGovernance'),
+                        ['address'], [registry])
+    client.request("eth_sendTransaction", [{
+        "from": deployer, "to": registry,
+        "data": encode_call("setDIDRegistryRouterAddress(address)", ["address"], [router]),
+    }])
+    dids = create_dids(client, registry, governance, args.dids, durations)
+
+    chain = LocalChain(client)
+    simulation = KeeperSimulation(chain, router, governance, dids, durations, deployer,
+                                  np.random.default_rng(args.seed), args.approve_fraction)
+    started = time.perf_counter()
+    try:
+        span = simulation.run(args.proposals, args.rate, args.poll)
+    finally:
+        chain.close()
+    result = summary(simulation, span)
+    print(format_summary(result))
+    print(f"simulated in {time.perf_counter() - started:.1f}s")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(dict(summary=result, polls=simulation.polls, upkeeps=simulation.upkeeps), f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,476 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from eth_abi import decode, encode
+from eth_account import Account
+from eth_hash.auto import keccak
+
+from deployment import deploy, load_bytecode
+from did_indexer import DID_DOCUMENT, GOVERNANCE_METHOD
+from eth_rpc import DEFAULT_RPC_URL, JsonRpcClient, encode_call, event_topic, topic_int
+from vote_bundles import (DEFAULT_CREDENTIAL, PATHS, credential_hash, generate_voters, sign_hash, sign_votes,
+                          submission_args)
+
+# end-to-end governance flows, each one creates a DID, a proposal for it and votes until it is resolved
+FLOW_KINDS = ("nofm", "controller", "token", "vc")
+DEFAULT_MIX = "nofm=1,controller=1,token=1,vc=1"
+CREATE_DID = f"createDIDDocument(string,string,{GOVERNANCE_METHOD}[])"
+PROPOSE_WITH_CONTROLLERS = f"createProposalWithControllers(address,uint256,uint256,{DID_DOCUMENT},{GOVERNANCE_METHOD}[])"
+PROPOSE_WITH_TOKEN = f"createProposalWithToken(address,uint256,{DID_DOCUMENT},{GOVERNANCE_METHOD}[],uint256,string,bytes)"
+# AgeVerifier.createProposal checks the credential and calls DIDRegistryRouter.createProposalWithVC
+PROPOSE_WITH_VC = (f"createProposal(address,uint256,{DID_DOCUMENT},{GOVERNANCE_METHOD}[],"
+                   "string[],uint256[],bool[],address[],bytes,address,uint256)")
+PROPOSAL_CREATED = event_topic("ProposalCreated(uint256,address)")  # DIDRegistry and NofM process id
+OFF_CHAIN_PROPOSAL_CREATED = event_topic("ProposalCreated(uint256,address,bytes32,uint256)")
+DID_DOCUMENT_UPDATED = event_topic("DIDDocumentUpdated(address,uint256)")
+GAS_MARGIN = 1.2  # on top of eth_estimateGas
+GWEI = 10 ** 9
+
+
+class AsyncRpc:
+    """asyncio front of a pool of keep-alive JsonRpcClient connections, every request runs in a worker thread."""
+
+    def __init__(self, url, connections=8):
+        self.clients = asyncio.Queue()
+        for _ in range(connections):
+            self.clients.put_nowait(JsonRpcClient(url))
+        self.executor = ThreadPoolExecutor(connections)
+
+    async def _run(self, name, *args):
+        client = await self.clients.get()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, getattr(client, name), *args)
+        finally:
+            self.clients.put_nowait(client)
+
+    async def request(self, method, params=()):
+        return await self._run("request", method, params)
+
+    async def batch(self, calls):
+        return await self._run("batch", calls)
+
+    def close(self):
+        while not self.clients.empty():
+            self.clients.get_nowait().close()
+        self.executor.shutdown()
+
+
+class NonceManager:
+    """Hands out consecutive nonces per sender without asking the node for every transaction.
+
+    The first nonce of a sender is its pending transaction count. The sends of one sender are
+    serialized until the node accepted the transaction, so a rejected transaction hands its
+    nonce to the next one before any later nonce is in flight and leaves no gap.
+    """
+
+    def __init__(self, rpc):
+        self.rpc = rpc
+        self.next = {}
+        self.locks = defaultdict(asyncio.Lock)
+
+    async def send(self, address, submit):
+        """Awaits submit(nonce) with the next nonce of `address`, which is only used up if it returns."""
+        async with self.locks[address]:
+            if address not in self.next:
+                self.next[address] = int(await self.rpc.request("eth_getTransactionCount", [address, "pending"]), 16)
+            nonce = self.next[address]
+            result = await submit(nonce)
+            self.next[address] = nonce + 1
+            return result
+
+
+class BlockWatcher:
+    """Follows new blocks and resolves the receipts of the transactions waiting for confirmation.
+
+    Confirmation latency is measured up to the moment the block is seen, which is what a
+    client polling the node would observe.
+    """
+
+    def __init__(self, rpc, first_block, poll=0.05):
+        self.rpc = rpc
+        self.next_block = first_block
+        self.poll = poll
+        self.waiting = {}  # tx hash => future of its receipt
+        self.blocks = []
+
+    def expect(self, tx_hash):
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[tx_hash.lower()] = future
+        return future
+
+    def forget(self, tx_hash):
+        """Stops waiting for a transaction the node did not accept."""
+        self.waiting.pop(tx_hash.lower(), None)
+
+    async def run(self):
+        while True:
+            latest = int(await self.rpc.request("eth_blockNumber"), 16)
+            while self.next_block <= latest:
+                await self._process(self.next_block)
+                self.next_block += 1
+            await asyncio.sleep(self.poll)
+
+    async def _process(self, number):
+        block = await self.rpc.request("eth_getBlockByNumber", [hex(number), False])
+        seen = time.perf_counter()
+        tracked = [tx_hash for tx_hash in block["transactions"] if tx_hash.lower() in self.waiting]
+        receipts = await self.rpc.batch([("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tracked])
+        for tx_hash, receipt in zip(tracked, receipts):
+            future = self.waiting.pop(tx_hash.lower())
+            if isinstance(receipt, Exception):
+                future.set_exception(receipt)
+            else:
+                future.set_result((receipt, seen))
+        self.blocks.append(dict(
+            number=number,
+            timestamp=int(block["timestamp"], 16),
+            gasUsed=int(block["gasUsed"], 16),
+            gasLimit=int(block["gasLimit"], 16),
+            transactions=len(block["transactions"]),
+            didUpdates=sum(1 for receipt in receipts if not isinstance(receipt, Exception)
+                           for log in receipt["logs"] if log["topics"] and log["topics"][0] == DID_DOCUMENT_UPDATED),
+        ))
+
+
+class FlowError(Exception):
+    pass
+
+
+class LoadContext:
+    """Deployed contracts, keys and the transaction pipeline shared by all flows."""
+
+    def __init__(self, rpc, watcher, nonces, chain_id, contracts, voter_keys, issuer_key, max_fee, priority_fee,
+                 confirm_timeout=60.0):
+        self.rpc = rpc
+        self.watcher = watcher
+        self.nonces = nonces
+        self.chain_id = chain_id
+        self.contracts = contracts
+        self.voter_keys = voter_keys
+        self.voters = [Account.from_key(key).address for key in voter_keys]
+        self.issuer_key = issuer_key
+        self.issuer = Account.from_key(issuer_key).address
+        self.max_fee = max_fee
+        self.priority_fee = priority_fee
+        self.confirm_timeout = confirm_timeout  # seconds a sent transaction may take to show up in a block
+        self.transactions = []
+
+    async def send(self, key, to, data, step):
+        """Signs and sends one transaction and waits for its receipt, every confirmation is recorded."""
+        sender = Account.from_key(key).address
+        gas = int(await self.rpc.request("eth_estimateGas", [{"from": sender, "to": to, "data": data}]), 16)
+
+        async def submit(nonce):
+            signed = Account.sign_transaction({
+                "type": 2,
+                "chainId": self.chain_id,
+                "nonce": nonce,
+                "to": to,
+                "data": data,
+                "value": 0,
+                "gas": int(gas * GAS_MARGIN),
+                "maxFeePerGas": self.max_fee,
+                "maxPriorityFeePerGas": self.priority_fee,
+            }, key)
+            raw = bytes(signed.raw_transaction)
+            tx_hash = "0x" + keccak(raw).hex()
+            confirmation = self.watcher.expect(tx_hash)  # before sending, the block may come first
+            sent = time.perf_counter()
+            try:
+                await self.rpc.request("eth_sendRawTransaction", ["0x" + raw.hex()])
+            except Exception:
+                self.watcher.forget(tx_hash)
+                raise
+            return tx_hash, confirmation, sent
+
+        tx_hash, confirmation, sent = await self.nonces.send(sender, submit)
+        try:
+            receipt, seen = await asyncio.wait_for(confirmation, self.confirm_timeout)
+        except asyncio.TimeoutError:
+            self.watcher.forget(tx_hash)  # dropped or stuck in the pool, the flow fails instead of hanging
+            raise FlowError(f"{step} transaction {tx_hash} not confirmed within {self.confirm_timeout}s")
+        self.transactions.append(dict(step=step, latency=seen - sent, gasUsed=int(receipt["gasUsed"], 16),
+                                      block=int(receipt["blockNumber"], 16)))
+        if receipt["status"] != "0x1":
+            raise FlowError(f"{step} transaction {receipt['transactionHash']} reverted")
+        return receipt
+
+    def governance_method(self, kind, did, threshold):
+        contract = self.contracts[kind]
+        if kind in ("nofm", "controller"):
+            return ("LoadTest", 0, [did] + self.voters[:threshold], [], [], contract, "publicKey123", [threshold],
+                    [], [], 0, 0, 0)
+        if kind == "token":
+            return ("LoadTest", 1, [], [], [self.issuer], contract, "publicKey123", [threshold], [], [], 0, 0, 0)
+        return ("LoadTest", 3, [], [self.contracts["ageVerifier"]], [self.issuer], contract, "publicKey123",
+                [threshold], [], [], 0, 0, 0)
+
+    def proposal_call(self, kind, did, method):
+        document = (did, "newPublicKey", "newAuthMethod", 0)
+        if kind in ("nofm", "controller"):
+            return self.contracts["router"], encode_call(
+                PROPOSE_WITH_CONTROLLERS, ["address", "uint256", "uint256", DID_DOCUMENT, f"{GOVERNANCE_METHOD}[]"],
+                [did, 0, 0, document, [method]])
+        if kind == "token":
+            token = f"load-token-{did}"
+            signature = sign_hash(self.issuer_key, keccak(encode(["string"], [token])))
+            return self.contracts["router"], encode_call(
+                PROPOSE_WITH_TOKEN,
+                ["address", "uint256", DID_DOCUMENT, f"{GOVERNANCE_METHOD}[]", "uint256", "string", "bytes"],
+                [did, 0, document, [method], 0, token, signature])
+        strings, numbers, bools = DEFAULT_CREDENTIAL
+        signature = sign_hash(self.issuer_key, credential_hash(strings, numbers, bools, [did]))
+        return self.contracts["ageVerifier"], encode_call(
+            PROPOSE_WITH_VC,
+            ["address", "uint256", DID_DOCUMENT, f"{GOVERNANCE_METHOD}[]", "string[]", "uint256[]", "bool[]",
+             "address[]", "bytes", "address", "uint256"],
+            [did, 0, document, [method], strings, numbers, bools, [did], signature, self.issuer, 0])
+
+
+async def run_flow(ctx, kind, did_key, threshold):
+    """createDIDDocument, proposal, votes or submitVotes, until the registry resolved the proposal."""
+    did = Account.from_key(did_key).address
+    started = time.perf_counter()
+    method = ctx.governance_method(kind, did, threshold)
+    await ctx.send(did_key, ctx.contracts["registry"], encode_call(
+        CREATE_DID, ["string", "string", f"{GOVERNANCE_METHOD}[]"], ["publicKey", "authMethod", [method]]),
+        "createDIDDocument")
+    to, data = ctx.proposal_call(kind, did, method)
+    receipt = await ctx.send(did_key, to, data, "createProposal")
+
+    if kind == "nofm":
+        registry = ctx.contracts["registry"].lower()
+        process_id = next(topic_int(log["topics"][1]) for log in receipt["logs"]
+                          if log["address"].lower() == registry and log["topics"][0] == PROPOSAL_CREATED)
+
+        def vote(i):  # voter i is controller i + 1, the DID itself is controller 0
+            return ctx.send(ctx.voter_keys[i], ctx.contracts["nofm"], encode_call(
+                "vote(uint256,uint256)", ["uint256", "uint256"], [process_id, i + 1]), "vote")
+
+        # the last vote resolves the proposal, it is estimated once the others are in
+        await asyncio.gather(*(vote(i) for i in range(threshold - 1)))
+        receipt = await vote(threshold - 1)
+    else:
+        governance = ctx.contracts[kind].lower()
+        (_, proposal_hash, _) = next(decode(["uint256", "bytes32", "uint256"], bytes.fromhex(log["data"][2:]))
+                                     for log in receipt["logs"] if log["address"].lower() == governance and
+                                     log["topics"][0] == OFF_CHAIN_PROPOSAL_CREATED)
+        voters = [{"key": key, "vote": True} for key in ctx.voter_keys[:threshold]]
+        rows = await asyncio.to_thread(sign_votes, kind, proposal_hash, voters, ctx.issuer_key, 1)
+        path = PATHS[kind]
+        # the index of the proposal in the governance contract, every flow has its own DID
+        data = encode_call(path.signature, path.arg_types,
+                           submission_args(kind, rows, 0, did, ctx.issuer, 0, ctx.issuer_key))
+        receipt = await ctx.send(did_key, ctx.contracts[kind], data, "submitVotes")
+
+    if not any(log["topics"] and log["topics"][0] == DID_DOCUMENT_UPDATED for log in receipt["logs"]):
+        raise FlowError(f"proposal of {did} was not resolved")
+    return time.perf_counter() - started
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(','):
+        kind, _, weight = part.partition('=')
+        if kind not in FLOW_KINDS:
+            raise ValueError(f"unknown flow kind '{kind}', known: {', '.join(FLOW_KINDS)}")
+        weights[kind] = float(weight or 1)
+    return weights
+
+
+def deploy_contracts(client, project_root, kinds):
+    """Registry, router and the governance contracts the mix needs, deployed from the first node account."""
+    deployer = client.request("eth_accounts")[0]
+
+    def bytecode(source, name):
+        return load_bytecode(project_root, source, name)
+
+    contracts = dict(
+        credentials=deploy(client, deployer, bytecode('utils/Credentials.sol', 'Credentials')),
+        registry=deploy(client, deployer, bytecode('DIDRegistry.sol', 'DIDRegistry')),
+    )
+    contracts["router"] = deploy(client, deployer, bytecode('DIDRegistryRouter.sol', 'DIDRegistryRouter'),
+                                 ['address', 'address'], [contracts["registry"], contracts["credentials"]])
+    client.request("eth_sendTransaction", [{
+        "from": deployer, "to": contracts["registry"],
+        "data": encode_call("setDIDRegistryRouterAddress(address)", ["address"], [contracts["router"]]),
+    }])
+    if "nofm" in kinds:
+        contracts["nofm"] = deploy(client, deployer, bytecode('governance/NofMGovernance.sol', 'NofMGovernance'),
+                                   ['address'], [contracts["registry"]])
+    off_chain = dict(controller=('OffChainGovernanceController.sol', 'OffChainGovernanceController'),
+                     token=('OffChainGovernanceToken.sol', 'OffChainGovernanceToken'),
+                     vc=('OffChainVC.sol', 'OffChainVC'))
+    for kind, (source, name) in off_chain.items():
+        if kind in kinds:
+            contracts[kind] = deploy(client, deployer, bytecode(f'governance/{source}', name),
+                                     ['address', 'address'], [contracts["credentials"], contracts["registry"]])
+    if "vc" in kinds:
+        contracts["ageVerifier"] = deploy(client, deployer, bytecode('verifiers/AgeVerifier.sol', 'AgeVerifier'),
+                                          ['address', 'address'], [contracts["router"], contracts["credentials"]])
+    return contracts
+
+
+def node_namespace(client):
+    """Prefix of the dev methods of the node, hardhat_setBalance or anvil_setBalance."""
+    return "anvil" if "anvil" in client.request("web3_clientVersion").lower() else "hardhat"
+
+
+def percentiles(values):
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return dict(mean=None, p50=None, p99=None, max=None)
+    p50, p99 = np.percentile(values, [50, 99])
+    return dict(mean=float(values.mean()), p50=float(p50), p99=float(p99), max=float(values.max()))
+
+
+def summarize(flows, transactions, blocks, seconds):
+    completed = [flow for flow in flows if flow["error"] is None]
+    # only blocks that carried load, the idle ones before the first and after the last flow are left out
+    loaded = [block for block in blocks if block["transactions"]]
+    return dict(
+        flows=len(flows),
+        completed=len(completed),
+        failed=len(flows) - len(completed),
+        seconds=seconds,
+        flowsPerSecond=len(completed) / seconds if seconds else None,
+        transactionsPerSecond=len(transactions) / seconds if seconds else None,
+        flowSeconds={kind: percentiles([f["seconds"] for f in completed if f["kind"] == kind])
+                     for kind in sorted({f["kind"] for f in flows})},
+        confirmationSeconds={step: percentiles([t["latency"] for t in transactions if t["step"] == step])
+                             for step in sorted({t["step"] for t in transactions})},
+        gasPerStep={step: percentiles([t["gasUsed"] for t in transactions if t["step"] == step])
+                    for step in sorted({t["step"] for t in transactions})},
+        blocks=len(loaded),
+        gasPerBlock=percentiles([b["gasUsed"] for b in loaded]),
+        blockUtilization=percentiles([b["gasUsed"] / b["gasLimit"] for b in loaded]),
+        transactionsPerBlock=percentiles([b["transactions"] for b in loaded]),
+        didUpdatesPerBlock=percentiles([b["didUpdates"] for b in loaded]),
+        errors=dict(Counter(flow["error"].split(':')[0] for flow in flows if flow["error"])),
+    )
+
+
+def format_summary(result):
+    def row(label, values, scale=1.0, unit=""):
+        if values["mean"] is None:
+            return f"  {label:<22}-"
+        return (f"  {label:<22}mean {values['mean'] * scale:>11,.2f}{unit}  p50 {values['p50'] * scale:>11,.2f}{unit}"
+                f"  p99 {values['p99'] * scale:>11,.2f}{unit}  max {values['max'] * scale:>11,.2f}{unit}")
+
+    lines = [
+        f"{result['completed']}/{result['flows']} flows in {result['seconds']:.1f}s: "
+        f"{result['flowsPerSecond'] or 0:.2f} flows/s, {result['transactionsPerSecond'] or 0:.2f} tx/s",
+        "flow duration (s)",
+    ]
+    lines += [row(kind, values) for kind, values in result["flowSeconds"].items()]
+    lines.append("confirmation latency (ms)")
+    lines += [row(step, values, 1000) for step, values in result["confirmationSeconds"].items()]
+    lines.append("gas per transaction")
+    lines += [row(step, values) for step, values in result["gasPerStep"].items()]
+    lines.append(f"{result['blocks']} blocks with load")
+    lines += [
+        row("gas per block", result["gasPerBlock"]),
+        row("block utilization", result["blockUtilization"], 100, "%"),
+        row("transactions per block", result["transactionsPerBlock"]),
+        row("DID updates per block", result["didUpdatesPerBlock"]),
+    ]
+    for error, count in result["errors"].items():
+        lines.append(f"{count} flows failed: {error}")
+    return "\n".join(lines)
+
+
+async def run(args, project_root):
+    weights = parse_mix(args.mix)
+    kinds = list(weights)
+    probabilities = np.asarray([weights[kind] for kind in kinds]) / sum(weights.values())
+    flow_kinds = np.random.default_rng(args.seed).choice(kinds, size=args.flows, p=probabilities)
+    threshold = args.voters // 2 + 1
+
+    client = JsonRpcClient(args.rpc)
+    contracts = deploy_contracts(client, project_root, set(kinds))
+    did_keys = [voter["key"] for voter in generate_voters(args.flows, seed=f"load-did-{args.seed}")]
+    voter_keys = [voter["key"] for voter in generate_voters(args.voters, seed=f"load-voter-{args.seed}")]
+    issuer_key = "0x" + keccak(f"load-issuer-{args.seed}".encode()).hex()
+    namespace = node_namespace(client)
+    funded = [Account.from_key(key).address for key in did_keys + voter_keys]
+    for start in range(0, len(funded), 500):
+        client.batch([(f"{namespace}_setBalance", [address, hex(10 ** 24)]) for address in funded[start:start + 500]])
+    if args.block_time:
+        client.request("evm_setAutomine", [False])
+        client.request("evm_setIntervalMining", [int(args.block_time * 1000)])
+    chain_id = int(client.request("eth_chainId"), 16)
+    first_block = int(client.request("eth_blockNumber"), 16) + 1
+
+    rpc = AsyncRpc(args.rpc, args.connections)
+    watcher = BlockWatcher(rpc, first_block, args.poll)
+    ctx = LoadContext(rpc, watcher, NonceManager(rpc), chain_id, contracts, voter_keys, issuer_key,
+                      int(args.max_fee_gwei * GWEI), int(args.priority_fee_gwei * GWEI), args.confirm_timeout)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    flows = []
+
+    async def guarded(kind, did_key):
+        async with semaphore:
+            flow = dict(kind=kind, seconds=None, error=None)
+            try:
+                flow["seconds"] = await run_flow(ctx, kind, did_key, threshold)
+            except Exception as error:
+                flow["error"] = f"{type(error).__name__}: {error}"
+            flows.append(flow)
+
+    watching = asyncio.create_task(watcher.run())
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(guarded(str(kind), key) for kind, key in zip(flow_kinds, did_keys)))
+        seconds = time.perf_counter() - started
+    finally:
+        watching.cancel()
+        rpc.close()
+        if args.block_time:
+            client.request("evm_setIntervalMining", [0])
+            client.request("evm_setAutomine", [True])
+        client.close()
+    return summarize(flows, ctx.transactions, watcher.blocks, seconds), flows, watcher.blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive concurrent end-to-end governance flows against a local '
+                                                 'hardhat or anvil node and measure throughput')
+    parser.add_argument('--rpc', default=DEFAULT_RPC_URL, help='JSON-RPC url of the node (npx hardhat node or anvil)')
+    parser.add_argument('--flows', type=int, default=200, help='number of flows, each on its own DID')
+    parser.add_argument('--concurrency', type=int, default=50, help='flows running at the same time')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"weights of the flow kinds ({', '.join(FLOW_KINDS)})")
+    parser.add_argument('--voters', type=int, default=5, help='voters of every governance method, a majority votes')
+    parser.add_argument('--block-time', type=float, default=1.0,
+                        help='switch the node to interval mining with this many seconds per block, 0 keeps its mode')
+    parser.add_argument('--connections', type=int, default=16, help='pooled JSON-RPC connections')
+    parser.add_argument('--poll', type=float, default=0.05, help='seconds between two new block checks')
+    parser.add_argument('--confirm-timeout', type=float, default=60.0,
+                        help='seconds to wait for the receipt of a transaction before its flow counts as failed')
+    parser.add_argument('--max-fee-gwei', type=float, default=1000.0)
+    parser.add_argument('--priority-fee-gwei', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='write the summary, flows and blocks to this JSON file')
+    args = parser.parse_args()
+    try:
+        parse_mix(args.mix)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.voters < 1:
+        parser.error("--voters must be at least 1")
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    result, flows, blocks = asyncio.run(run(args, os.path.dirname(script_dir)))
+    print(format_summary(result))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(dict(summary=result, flows=flows, blocks=blocks), f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import json
+
+from eth_abi import encode
+from eth_hash.auto import keccak
+
+# stringArgs[0] that switches NofMGovernance and TimeLimitedGovernance to merkle mode
+MERKLE_MODE = "merkle"
+
+
+def controller_leaf(address):
+    """keccak256(abi.encode(address)), the leaf NofMGovernance and TimeLimitedGovernance check proofs against."""
+    return keccak(encode(["address"], [address]))
+
+
+def hash_pair(a, b):
+    # OpenZeppelin MerkleProof hashes every pair in sorted order, so proofs need no left/right flags
+    return keccak(a + b) if a < b else keccak(b + a)
+
+
+class ControllersTree:
+    """Merkle tree over the controllers that may vote in a governance process.
+
+    Leaves are sorted, every level hashes neighbouring pairs and an odd last node is
+    carried up unchanged, the layout MerkleProof.verify of OpenZeppelin accepts.
+    """
+
+    def __init__(self, addresses):
+        if not addresses:
+            raise ValueError("A controllers tree needs at least one address")
+        self.leaves = sorted({controller_leaf(address) for address in addresses})
+        self.levels = [self.leaves]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            self.levels.append([
+                hash_pair(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+                for i in range(0, len(level), 2)
+            ])
+        self._index = {leaf: i for i, leaf in enumerate(self.leaves)}
+
+    @property
+    def root(self):
+        return self.levels[-1][0]
+
+    def proof(self, address):
+        """Returns the sibling hashes from the leaf of `address` up to the root."""
+        leaf = controller_leaf(address)
+        if leaf not in self._index:
+            raise KeyError(f"{address} is not a controller of this tree")
+        index = self._index[leaf]
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append(level[sibling])
+            index //= 2
+        return proof
+
+    def verify(self, address, proof):
+        computed = controller_leaf(address)
+        for sibling in proof:
+            computed = hash_pair(computed, sibling)
+        return computed == self.root
+
+
+def governance_args(tree, first_int_arg, controllers_count=None):
+    """intArgs and stringArgs of a governance method in merkle mode.
+
+    NofM takes [threshold, root], TimeLimited [duration, root, number of voters].
+    """
+    int_args = [first_int_arg, int.from_bytes(tree.root, "big")]
+    if controllers_count is not None:
+        int_args.append(controllers_count)
+    return int_args, [MERKLE_MODE]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the controllers merkle root and the vote proofs of a governance method')
+    parser.add_argument('addresses', nargs='*', help='controller addresses')
+    parser.add_argument('--file', help='file with one controller address per line')
+    args = parser.parse_args()
+
+    addresses = list(args.addresses)
+    if args.file:
+        with open(args.file, 'r') as f:
+            addresses += [line.strip() for line in f if line.strip()]
+    if not addresses:
+        parser.error('no controller addresses given')
+
+    tree = ControllersTree(addresses)
+    print(json.dumps({
+        'root': '0x' + tree.root.hex(),
+        'rootIntArg': str(int.from_bytes(tree.root, 'big')),
+        'proofs': {address: ['0x' + node.hex() for node in tree.proof(address)] for address in addresses},
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+FULL_DPI = 300
+PREVIEW_DPI = 72
+CACHE_FILE = '.render_cache.json'
+
+
+class FigureJob:
+    """One output image: the function that draws it and the series it is drawn from.
+
+    `draw` is called as draw(path, dpi, **inputs) in a worker process, so it has to be
+    a module level function and `inputs` must only hold picklable values (arrays, lists,
+    numbers, JSON-like dicts).
+    """
+
+    def __init__(self, filename, draw, inputs):
+        self.filename = filename
+        self.draw = draw
+        self.inputs = inputs
+
+    def content_hash(self, dpi):
+        h = hashlib.sha256()
+        h.update(self.filename.encode())
+        h.update(str(dpi).encode())
+        # the drawing code is part of the spec: editing a figure invalidates only that figure
+        h.update(inspect.getsource(self.draw).encode())
+        for name in sorted(self.inputs):
+            value = self.inputs[name]
+            h.update(name.encode())
+            if isinstance(value, np.ndarray):
+                h.update(str(value.dtype).encode())
+                h.update(str(value.shape).encode())
+                h.update(np.ascontiguousarray(value).tobytes())
+            else:
+                # plain values such as figure specs are hashed by their JSON form
+                h.update(json.dumps(value, sort_keys=True, default=str).encode())
+        return h.hexdigest()
+
+
+def _run_job(job, path, dpi):
+    job.draw(path, dpi, **job.inputs)
+    return job.filename
+
+
+def _load_cache(output_dir):
+    try:
+        with open(os.path.join(output_dir, CACHE_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(output_dir, cache):
+    with open(os.path.join(output_dir, CACHE_FILE), 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def render_all(jobs, output_dir, dpi=FULL_DPI, workers=None, force=False):
+    """Renders every job whose inputs changed since the last run, in parallel.
+
+    Returns (rendered, skipped) lists of file names.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cache = _load_cache(output_dir)
+
+    pending = []
+    skipped = []
+    for job in jobs:
+        digest = job.content_hash(dpi)
+        path = os.path.join(output_dir, job.filename)
+        if not force and cache.get(job.filename) == digest and os.path.exists(path):
+            skipped.append(job.filename)
+        else:
+            pending.append((job, path, digest))
+
+    rendered = []
+    try:
+        if workers == 1 or len(pending) <= 1:
+            for job, path, digest in pending:
+                _run_job(job, path, dpi)
+                cache[job.filename] = digest
+                rendered.append(job.filename)
+                print(f'rendered {job.filename}')
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_run_job, job, path, dpi): (job, digest) for job, path, digest in pending}
+                for future in as_completed(futures):
+                    job, digest = futures[future]
+                    future.result()
+                    cache[job.filename] = digest
+                    rendered.append(job.filename)
+                    print(f'rendered {job.filename}')
+    finally:
+        # figures that did render stay cached even if another job failed
+        if rendered:
+            _save_cache(output_dir, cache)
+
+    for filename in skipped:
+        print(f'unchanged {filename}')
+    return rendered, skipped
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from gas_results import JsonlResultReader, concat_tables
+
+# governance methods measured by test/GasCost.test.js
+METHODS = (
+    "OffChainController",
+    "OffChainToken",
+    "OffChainVC",
+    "OffChainTokenAggregated",
+    "OffChainVCAggregated",
+    "WeightedMajority",
+    "WeightedMajorityBatch",
+    "WeightedMajorityVC",
+    "WeightedMajorityToken",
+    "NofM",
+    "NofMCommitted",
+    "NofMMerkle",
+    "TimeLimited",
+    "TimeLimitedMerkle",
+    "Independent",
+    "ProposalInvalidation",
+)
+DEFAULT_VOTERS = "9,19,39,59,79,99"
+DEFAULT_CONTROLLERS = "10,20,40,60,80,100"
+DEFAULT_PENDING = "0,1,5,10,25,50"
+
+# methods swept over something else than voter counts, with the env variable of their count list
+SWEPT_COUNTS = {
+    "Independent": "GAS_CONTROLLER_COUNTS",
+    "ProposalInvalidation": "GAS_PENDING_COUNTS",
+}
+TEST_FILE = os.path.join("test", "GasCost.test.js")
+
+
+def parse_counts(text):
+    """Parses '9,19,39' or ranges like '1-500' (inclusive) into a sorted list of counts."""
+    counts = set()
+    for part in text.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            counts.update(range(int(first), int(last) + 1))
+        else:
+            counts.add(int(part))
+    return sorted(counts)
+
+
+def build_grid(methods, voters, controllers, pending):
+    counts = {"Independent": controllers, "ProposalInvalidation": pending}
+    return [(method, count) for method in methods for count in counts.get(method, voters)]
+
+
+def shard_grid(grid, shards):
+    """Splits the grid into `shards` lists of cases with roughly equal runtime.
+
+    A case costs about one transaction per voter, so cases are handed out largest first
+    to the shard with the least voters so far.
+    """
+    shards = [[] for _ in range(min(shards, len(grid)))]
+    load = [0] * len(shards)
+    for case in sorted(grid, key=lambda case: (-case[1], case[0])):
+        target = load.index(min(load))
+        shards[target].append(case)
+        load[target] += case[1]
+    return shards
+
+
+class Shard:
+    """One `hardhat test` process with its own in-process Hardhat network and result files."""
+
+    def __init__(self, index, cases, shard_dir):
+        self.index = index
+        self.cases = cases
+        self.jsonl_path = os.path.join(shard_dir, f"shard-{index}.jsonl")
+        self.json_path = os.path.join(shard_dir, f"shard-{index}.json")
+        self.log_path = os.path.join(shard_dir, f"shard-{index}.log")
+        self.reader = JsonlResultReader(self.jsonl_path)
+        self.process = None
+
+    def start(self, project_root, hardhat):
+        # each count list only holds the counts of this shard, so the test file defines no cases it skips
+        counts = {name: set() for name in ["GAS_VOTER_COUNTS", *SWEPT_COUNTS.values()]}
+        for method, count in self.cases:
+            counts[SWEPT_COUNTS.get(method, "GAS_VOTER_COUNTS")].add(count)
+        env = dict(
+            os.environ,
+            GAS_CASES=",".join(f"{method}:{count}" for method, count in self.cases),
+            **{name: ",".join(map(str, sorted(values))) for name, values in counts.items()},
+            GAS_RESULTS_JSONL=self.jsonl_path,
+            GAS_RESULTS_JSON=self.json_path,
+            # 1 owner, 1 issuer and one account per voter or controller
+            HARDHAT_ACCOUNTS=str(max(102, max(count for _, count in self.cases) + 2)),
+        )
+        env.pop("GAS_RESUME", None)
+        open(self.jsonl_path, "w").close()
+        log = open(self.log_path, "w")
+        self.process = subprocess.Popen(hardhat + ["test", "--no-compile", TEST_FILE],
+                                        cwd=project_root, env=env, stdout=log, stderr=subprocess.STDOUT)
+        log.close()
+
+    def poll(self):
+        self.reader.read()
+        return self.process.poll()
+
+
+def run_sweep(grid, workers, project_root, shard_dir, hardhat=("npx", "hardhat"), interval=5.0):
+    """Measures every (method, count) case of `grid` on `workers` parallel Hardhat networks.
+
+    Returns (table, shards): the merged ResultTable and the finished shards.
+    """
+    hardhat = list(hardhat)
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    os.makedirs(shard_dir)
+
+    # compile once up front, parallel compiles would race on the shared artifacts directory
+    subprocess.run(hardhat + ["compile"], cwd=project_root, check=True)
+
+    shards = [Shard(index, cases, shard_dir) for index, cases in enumerate(shard_grid(grid, workers))]
+    for shard in shards:
+        shard.start(project_root, hardhat)
+    print(f"measuring {len(grid)} cases on {len(shards)} hardhat networks, logs in {shard_dir}")
+
+    started = time.monotonic()
+    running = set(range(len(shards)))
+    while running:
+        time.sleep(interval)
+        for shard in shards:
+            if shard.index in running and shard.poll() is not None:
+                running.discard(shard.index)
+                status = "done" if shard.process.returncode == 0 else f"failed ({shard.process.returncode})"
+                print(f"shard {shard.index} {status}, see {shard.log_path}")
+        measured = sum(shard.reader.records for shard in shards)
+        elapsed = time.monotonic() - started
+        print(f"{measured}/{len(grid)} cases measured, {len(running)} shards running, {elapsed:.0f}s elapsed")
+
+    for shard in shards:
+        shard.reader.read()
+    return concat_tables([shard.reader.table for shard in shards]), shards
+
+
+def merge_shards(shards, results_json, results_jsonl):
+    """Writes the shard results into test_results.json and appends their records to test_results.jsonl."""
+    results = {}
+    for shard in shards:
+        if not os.path.exists(shard.json_path):
+            continue
+        with open(shard.json_path, "r") as f:
+            for method, by_voters in json.load(f).items():
+                results.setdefault(method, {}).update(by_voters)
+    with open(results_json, "w") as f:
+        json.dump(results, f, indent=2)
+
+    with open(results_jsonl, "ab") as out:
+        for shard in shards:
+            with open(shard.jsonl_path, "rb") as f:
+                shutil.copyfileobj(f, out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the GasCost.test.js sweep sharded over parallel Hardhat networks')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of parallel hardhat processes')
+    parser.add_argument('--methods', default=','.join(METHODS), help='comma separated governance methods')
+    parser.add_argument('--voters', default=DEFAULT_VOTERS, help="voter counts, e.g. '9,19,39' or '1-500'")
+    parser.add_argument('--controllers', default=DEFAULT_CONTROLLERS, help='controller counts of the Independent method')
+    parser.add_argument('--pending', default=DEFAULT_PENDING,
+                        help='numbers of other pending proposals of the ProposalInvalidation case')
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    test_dir = os.path.join(project_root, 'test')
+
+    methods = args.methods.split(',')
+    unknown = sorted(set(methods) - set(METHODS))
+    if unknown:
+        parser.error(f"unknown governance methods: {', '.join(unknown)}")
+    grid = build_grid(methods, parse_counts(args.voters), parse_counts(args.controllers), parse_counts(args.pending))
+
+    table, shards = run_sweep(grid, args.workers, project_root, os.path.join(test_dir, 'gas_shards'))
+    merge_shards(shards, os.path.join(test_dir, 'test_results.json'), os.path.join(test_dir, 'test_results.jsonl'))
+    print(f"merged {0 if table is None else len(table)} results into test/test_results.json")
+
+    failed = [shard.index for shard in shards if shard.process.returncode != 0]
+    if failed:
+        print(f"shards {', '.join(map(str, failed))} failed")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+from eth_hash.auto import keccak
+
+from deployment import deploy, load_bytecode, send_transaction
+from did_indexer import DID_DOCUMENT, GOVERNANCE_METHOD
+from eth_rpc import DEFAULT_RPC_URL, JsonRpcClient, RpcError, encode_call, event_topic, topic_int
+from gas_results import METRICS, load_gas_results
+
+CREATE_DID = f"createDIDDocument(string,string,{GOVERNANCE_METHOD}[])"
+PROPOSE = f"createProposalWithControllers(address,uint256,uint256,{DID_DOCUMENT},{GOVERNANCE_METHOD}[])"
+PROPOSAL_CREATED = event_topic("ProposalCreated(uint256,address)")
+CALLS = {"CALL", "STATICCALL", "DELEGATECALL", "CALLCODE", "CREATE", "CREATE2"}
+# storage structs of the registry and the governance contracts, reported when the build has storage layouts
+STRUCTS = ("GovernanceMethod", "Proposal", "DIDDocument", "GovernanceProcess", "OffChainProposal")
+
+
+def struct_slots(project_root):
+    """Slots of every storage struct by name, from the storageLayout of the hardhat build-info.
+
+    hardhat.config.js asks solc for the layouts, artifacts compiled without it give an empty
+    dict until `npx hardhat compile --force` rebuilds them.
+    """
+    slots = {}
+    for path in glob.glob(os.path.join(project_root, "artifacts", "build-info", "*.json")):
+        with open(path, "r") as f:
+            output = json.load(f)["output"]
+        for source_contracts in output.get("contracts", {}).values():
+            for name, compiled in source_contracts.items():
+                for entry in (compiled.get("storageLayout", {}).get("types") or {}).values():
+                    struct = entry["label"].split(".")[-1]
+                    if entry["label"].startswith("struct ") and struct in STRUCTS:
+                        slots[f"{name}.{struct}"] = int(entry["numberOfBytes"]) // 32
+    return slots
+
+
+def touched_slots(client, tx_hash):
+    """(contract, slot) of every SSTORE of a transaction, the contract being the storage owner of the frame."""
+    tx = client.request("eth_getTransactionByHash", [tx_hash])
+    trace = client.request("debug_traceTransaction", [tx_hash, {"disableMemory": True, "disableStorage": True}])
+    steps = trace["structLogs"]
+    owners = [tx["to"].lower()]
+    touched = set()
+    for i, step in enumerate(steps):
+        op = step["op"]
+        if op == "SSTORE":
+            touched.add((owners[-1], int(step["stack"][-1], 16)))
+        nxt = steps[i + 1] if i + 1 < len(steps) else None
+        if nxt is None:
+            break
+        if nxt["depth"] > step["depth"] and op in CALLS:
+            if op in ("DELEGATECALL", "CALLCODE"):
+                owners.append(owners[-1])
+            elif op in ("CREATE", "CREATE2"):
+                owners.append(None)  # the address is only known once the creation returns
+            else:
+                owners.append("0x" + format(int(step["stack"][-2], 16), "040x"))
+        elif nxt["depth"] < step["depth"]:
+            owners.pop()
+    return sorted((owner, slot) for owner, slot in touched if owner is not None)
+
+
+def slot_changes(client, receipt):
+    """Slots the transaction of `receipt` allocated (0 -> value), rewrote and cleared (value -> 0), per contract.
+
+    Values are read before and after the block of the transaction, which has to be the
+    only transaction of its block (automine) for the counts to belong to it alone.
+    """
+    block = int(receipt["blockNumber"], 16)
+    touched = touched_slots(client, receipt["transactionHash"])
+    calls = [("eth_getStorageAt", [owner, hex(slot), hex(number)])
+             for owner, slot in touched for number in (block - 1, block)]
+    values = client.batch(calls)
+    changes = {}
+    for i, (owner, _) in enumerate(touched):
+        before, after = values[2 * i], values[2 * i + 1]
+        for value in (before, after):
+            if isinstance(value, RpcError):
+                raise value
+        before, after = int(before, 16), int(after, 16)
+        counts = changes.setdefault(owner, dict(allocated=0, rewritten=0, cleared=0))
+        if before == 0 and after != 0:
+            counts["allocated"] += 1
+        elif before != 0 and after == 0:
+            counts["cleared"] += 1
+        elif before != after:
+            counts["rewritten"] += 1
+    return changes
+
+
+def governance_method(controllers, nofm):
+    return ("NofM", 0, controllers, [], [], nofm, "publicKey123", [1], [], [], 0, 0, 0)
+
+
+def measure_lifecycle(client, project_root, controllers, methods):
+    """Slot changes of one DID through createDIDDocument, a proposal and the vote that resolves it.
+
+    The DID has `methods` NofM governance methods with `controllers` controllers each (the
+    DID first) and proposes the same methods again. One vote resolves it (threshold 1).
+    """
+    deployer = client.request("eth_accounts")[0]
+    credentials = deploy(client, deployer, load_bytecode(project_root, 'utils/Credentials.sol', 'Credentials'))
+    registry = deploy(client, deployer, load_bytecode(project_root, 'DIDRegistry.sol', 'DIDRegistry'))
+    router = deploy(client, deployer, load_bytecode(project_root, 'DIDRegistryRouter.sol', 'DIDRegistryRouter'),
+                    ['address', 'address'], [registry, credentials])
+    nofm = deploy(client, deployer, load_bytecode(project_root, 'governance/NofMGovernance.sol', 'NofMGovernance'),
+                  ['address'], [registry])
+    send_transaction(client, {"from": deployer, "to": registry, "data": encode_call(
+        "setDIDRegistryRouterAddress(address)", ["address"], [router])})
+    names = {registry.lower(): "DIDRegistry", router.lower(): "DIDRegistryRouter", nofm.lower(): "NofMGovernance"}
+
+    did = "0x" + keccak(b"storage-report-did")[-20:].hex()
+    client.request("hardhat_impersonateAccount", [did])
+    client.request("hardhat_setBalance", [did, hex(10 ** 20)])
+    members = [did] + ["0x" + keccak(f"storage-report-controller-{i}".encode())[-20:].hex()
+                       for i in range(controllers - 1)]
+    method_list = [governance_method(members, nofm) for _ in range(methods)]
+    document = (did, "newPublicKey", "newAuthMethod", 0)
+
+    steps = []
+    receipt = send_transaction(client, {"from": did, "to": registry, "gas": hex(10_000_000), "data": encode_call(
+        CREATE_DID, ["string", "string", f"{GOVERNANCE_METHOD}[]"], ["publicKey", "authMethod", method_list])})
+    steps.append(("createDIDDocument", receipt))
+    receipt = send_transaction(client, {"from": did, "to": router, "gas": hex(10_000_000), "data": encode_call(
+        PROPOSE, ["address", "uint256", "uint256", DID_DOCUMENT, f"{GOVERNANCE_METHOD}[]"],
+        [did, 0, 0, document, method_list])})
+    steps.append(("createProposal", receipt))
+    proposal_id = next(topic_int(log["topics"][1]) for log in receipt["logs"]
+                       if log["address"].lower() == registry.lower() and log["topics"][0] == PROPOSAL_CREATED)
+    receipt = send_transaction(client, {"from": did, "to": nofm, "gas": hex(10_000_000), "data": encode_call(
+        "vote(uint256,uint256)", ["uint256", "uint256"], [proposal_id, 0])})
+    steps.append(("vote (resolves)", receipt))
+
+    rows = []
+    for step, receipt in steps:
+        for owner, counts in sorted(slot_changes(client, receipt).items()):
+            rows.append(dict(step=step, contract=names.get(owner, owner), gasUsed=int(receipt["gasUsed"], 16),
+                             **counts))
+    return rows
+
+
+def format_slots(rows, controllers, methods, struct_sizes):
+    lines = []
+    if struct_sizes:
+        lines.append("struct sizes (fixed slots, dynamic arrays and strings are stored elsewhere)")
+        lines += [f"  {name:<44}{size:>4} slots" for name, size in sorted(struct_sizes.items())]
+        lines.append("")
+    else:
+        lines += ["no storage layouts in artifacts/build-info, run `npx hardhat compile --force`", ""]
+    lines.append(f"one DID with {methods} governance method(s) of {controllers} controller(s)")
+    lines.append(f"{'step':<20}{'contract':<22}{'gas':>10}{'allocated':>11}{'rewritten':>11}{'cleared':>9}")
+    held = {}
+    for row in rows:
+        lines.append(f"{row['step']:<20}{row['contract']:<22}{row['gasUsed']:>10}{row['allocated']:>11}"
+                     f"{row['rewritten']:>11}{row['cleared']:>9}")
+        held[row["contract"]] = held.get(row["contract"], 0) + row["allocated"] - row["cleared"]
+    lines.append("slots held per DID after the proposal was resolved: " +
+                 ", ".join(f"{contract} {count}" for contract, count in sorted(held.items())))
+    return "\n".join(lines)
+
+
+def compare_sweeps(before, after, metrics=METRICS):
+    """Gas of every metric summed over the (method, voters) rows both sweeps measured.
+
+    Returns (method, metric, before, after, change) rows, methods only one sweep knows are
+    left out.
+    """
+    rows = []
+    for method in sorted(set(before.method_names()) & set(after.method_names())):
+        voters = np.intersect1d(before.voter_counts(method), after.voter_counts(method))
+        if voters.size == 0:
+            continue
+        for metric in metrics:
+            old = int(before.series(method, voters, metric).sum())
+            new = int(after.series(method, voters, metric).sum())
+            rows.append((method, metric, old, new, (new - old) / old if old else 0.0))
+    return rows
+
+
+def format_sweeps(rows):
+    lines = [f"{'method':<28}{'metric':<18}{'before':>14}{'after':>14}{'change':>10}"]
+    for method, metric, old, new, change in rows:
+        lines.append(f"{method:<28}{metric:<18}{old:>14}{new:>14}{change:>+10.2%}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report the storage slots a DID occupies and the gas of two GasCost sweeps')
+    commands = parser.add_subparsers(dest='command', required=True)
+    slots = commands.add_parser('slots', help='trace the lifecycle of one DID on a hardhat node and count its slots')
+    slots.add_argument('--rpc', default=DEFAULT_RPC_URL, help='JSON-RPC url of a hardhat node (npx hardhat node)')
+    slots.add_argument('--controllers', type=int, default=3, help='controllers of every governance method')
+    slots.add_argument('--methods', type=int, default=1, help='governance methods of the DID')
+    gas = commands.add_parser('gas', help='compare the gas of a sweep before and after a storage layout change')
+    gas.add_argument('--before', required=True, help='sweep results of the old layout (json or jsonl)')
+    gas.add_argument('--after', default=None, help='sweep results of the new layout (default: test/test_results.json)')
+    gas.add_argument('--metrics', default=','.join(METRICS), help='comma separated metrics to compare')
+    for command in (slots, gas):
+        command.add_argument('--output', default=None, help='also write the report to this file')
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    if args.command == 'slots':
+        if args.controllers < 1 or args.methods < 1:
+            parser.error("--controllers and --methods must be at least 1")
+        client = JsonRpcClient(args.rpc)
+        try:
+            rows = measure_lifecycle(client, project_root, args.controllers, args.methods)
+        finally:
+            client.close()
+        text = format_slots(rows, args.controllers, args.methods, struct_slots(project_root))
+    else:
+        metrics = args.metrics.split(',')
+        unknown = sorted(set(metrics) - set(METRICS))
+        if unknown:
+            parser.error(f"unknown metrics: {', '.join(unknown)}")
+        after = args.after or os.path.join(project_root, 'test', 'test_results.json')
+        text = format_sweeps(compare_sweeps(load_gas_results(args.before), load_gas_results(after), metrics))
+
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+import argparse
+import heapq
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from eth_abi import encode
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from eth_hash.auto import keccak
+
+from eth_rpc import encode_call
+from gas_results import load_gas_results
+
+CREDENTIAL = "(string[],uint256[],bool[],address[])"
+
+# submit entry point of every off-chain governance contract, with the ABI types of its arguments
+SubmitPath = namedtuple("SubmitPath", "signature arg_types sweep_method per_vote_gas")
+
+PATHS = {
+    # OffChainGovernanceController.submitVotes(proposalId, did, voters, votes, signatures)
+    "controller": SubmitPath(
+        "submitVotes(uint256,address,address[],bool[],bytes[])",
+        ["uint256", "address", "address[]", "bool[]", "bytes[]"],
+        "OffChainController", 45_000,
+    ),
+    # OffChainGovernanceToken.submitVotes(proposalId, did, VoteParams)
+    "token": SubmitPath(
+        "submitVotes(uint256,address,(address[],bool[],bytes[],bytes[],address[],address,uint256))",
+        ["uint256", "address", "(address[],bool[],bytes[],bytes[],address[],address,uint256)"],
+        "OffChainToken", 35_000,
+    ),
+    # OffChainVC.submitVotes(proposalId, did, VoteData[], issuer, issuerIndex)
+    "vc": SubmitPath(
+        "submitVotes(uint256,address,(address,bool,bytes,(string[],uint256[],bool[],address[],bytes))[],address,uint256)",
+        ["uint256", "address", "(address,bool,bytes,(string[],uint256[],bool[],address[],bytes))[]", "address", "uint256"],
+        "OffChainVC", 55_000,
+    ),
+    # OffChainVCAlternative.submitVotesBatch(voters, votes, voteSignatures, credentialSignatures, issuer,
+    # proposalId, did, CredentialData), one credential over all voters of the batch
+    "vc-alternative": SubmitPath(
+        f"submitVotesBatch(address[],bool[],bytes[],bytes[],address,uint256,address,{CREDENTIAL})",
+        ["address[]", "bool[]", "bytes[]", "bytes[]", "address", "uint256", "address", CREDENTIAL],
+        None, 60_000,
+    ),
+}
+
+TX_BASE_GAS = 21_000
+SUBMIT_BASE_GAS = 80_000  # proposal lookup, issuer check, event and the resolution of the last batch
+DEFAULT_BLOCK_GAS_LIMIT = 30_000_000
+SIGNATURE_PLACEHOLDER = b"\x01" * 65  # calldata size of a signature that is only made per chunk
+
+# the credential the tests issue, `addresses` is filled with the voter (vc) or the batch (vc-alternative)
+DEFAULT_CREDENTIAL = (["age_verification"], [18], [True])
+
+# one signed vote: the voter as int (sort key), its address, the vote, the vote signature, the
+# token or credential it carries and the calldata gas its entries add to a submission
+Row = namedtuple("Row", "key voter vote signature extra calldata_gas")
+
+
+def sign_hash(private_key, message_hash):
+    """Signs a 32 byte hash like ethers' signer.signMessage(getBytes(hash)), what Credentials.recoverSigner expects."""
+    return bytes(Account.sign_message(encode_defunct(primitive=message_hash), private_key=private_key).signature)
+
+
+def compute_proposal_hash(proposal_id, proposal_index, did, timestamp):
+    """Hash the off-chain governance contracts store for a proposal, the votes sign it."""
+    return keccak(encode(["uint256", "uint256", "address", "uint256"], [proposal_id, proposal_index, did, timestamp]))
+
+
+def vote_hash(proposal_hash, vote):
+    # keccak256(abi.encodePacked(proposal.hash, vote)), a packed bool is a single byte
+    return keccak(proposal_hash + (b"\x01" if vote else b"\x00"))
+
+
+def token_hash(token):
+    return keccak(encode(["address"], [token]))
+
+
+def credential_hash(strings, numbers, bools, addresses):
+    return keccak(encode(["string[]", "uint256[]", "bool[]", "address[]"], [strings, numbers, bools, addresses]))
+
+
+def calldata_gas(data):
+    # 16 gas per non-zero and 4 per zero byte of calldata
+    return 16 * len(data) - 12 * data.count(0)
+
+
+def _sign_rows(kind, proposal_hash, issuer_key, voters):
+    """Signs a slice of the electorate in a worker process and returns its rows sorted by voter."""
+    hashes = {vote: vote_hash(proposal_hash, vote) for vote in (True, False)}
+    rows = []
+    for voter in voters:
+        account = Account.from_key(voter["key"])
+        vote = voter.get("vote", True)
+        signature = sign_hash(voter["key"], hashes[vote])
+        if kind == "token":
+            token = voter.get("token", account.address)
+            extra = (token, sign_hash(issuer_key, token_hash(token)))
+            entry = encode(["address", "bool", "bytes", "bytes", "address"], [account.address, vote, signature, extra[1], token])
+        elif kind == "vc":
+            strings, numbers, bools = voter.get("credential", DEFAULT_CREDENTIAL)
+            addresses = [account.address]
+            extra = (strings, numbers, bools, addresses,
+                     sign_hash(issuer_key, credential_hash(strings, numbers, bools, addresses)))
+            entry = encode(["(address,bool,bytes,(string[],uint256[],bool[],address[],bytes))"],
+                           [(account.address, vote, signature, extra)])
+        elif kind == "vc-alternative":
+            # the credential signature is made per chunk, only its size is known here
+            extra = None
+            entry = encode(["address", "bool", "bytes", "bytes", "address"],
+                           [account.address, vote, signature, SIGNATURE_PLACEHOLDER, account.address])
+        else:
+            extra = None
+            entry = encode(["address", "bool", "bytes"], [account.address, vote, signature])
+        rows.append(Row(int(account.address, 16), account.address, vote, signature, extra, calldata_gas(entry)))
+    rows.sort(key=lambda row: row.key)
+    return rows
+
+
+def sign_votes(kind, proposal_hash, voters, issuer_key=None, workers=None, slice_size=256):
+    """Signs every vote (and token or credential) across a process pool.
+
+    Workers sort their slices, the sorted slices are merged in one pass, so the rows come
+    back in the ascending voter order every submitVotes path checks.
+    """
+    if kind not in PATHS:
+        raise ValueError(f"Unknown submit path '{kind}'")
+    if kind != "controller" and issuer_key is None:
+        raise ValueError(f"The {kind} path needs the issuer key")
+    slices = [voters[i:i + slice_size] for i in range(0, len(voters), slice_size)]
+    if workers == 1 or len(slices) <= 1:
+        sorted_slices = [_sign_rows(kind, proposal_hash, issuer_key, part) for part in slices]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_sign_rows, kind, proposal_hash, issuer_key, part) for part in slices]
+            sorted_slices = [future.result() for future in futures]
+    rows = []
+    for row in heapq.merge(*sorted_slices, key=lambda row: row.key):
+        if rows and rows[-1].key == row.key:
+            raise ValueError(f"Duplicate voter {row.voter}")
+        rows.append(row)
+    return rows
+
+
+def chunk_rows(rows, per_vote_gas, block_gas_limit=DEFAULT_BLOCK_GAS_LIMIT, fill=0.9):
+    """Splits the sorted rows into consecutive chunks whose estimated gas fits `fill` of a block.
+
+    Every chunk stays sorted, so each one is a valid submission of its own.
+    """
+    budget = int(block_gas_limit * fill) - TX_BASE_GAS - SUBMIT_BASE_GAS
+    if per_vote_gas + max((row.calldata_gas for row in rows), default=0) > budget:
+        raise ValueError("A single vote does not fit into the block gas limit")
+    chunks = []
+    current = []
+    used = 0
+    for row in rows:
+        cost = per_vote_gas + row.calldata_gas
+        if current and used + cost > budget:
+            chunks.append(current)
+            current = []
+            used = 0
+        current.append(row)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def submission_args(kind, rows, proposal_id, did, issuer=None, issuer_index=0, issuer_key=None,
+                    credential=DEFAULT_CREDENTIAL):
+    """Arguments of the submit call of one chunk, in the order of PATHS[kind].arg_types."""
+    voters = [row.voter for row in rows]
+    votes = [row.vote for row in rows]
+    signatures = [row.signature for row in rows]
+    if kind == "controller":
+        return [proposal_id, did, voters, votes, signatures]
+    if kind == "token":
+        tokens = [row.extra[0] for row in rows]
+        token_signatures = [row.extra[1] for row in rows]
+        return [proposal_id, did, (voters, votes, signatures, token_signatures, tokens, issuer, issuer_index)]
+    if kind == "vc":
+        return [proposal_id, did, [(row.voter, row.vote, row.signature, row.extra) for row in rows], issuer, issuer_index]
+    # vc-alternative: the issuer signs one credential naming every voter of the chunk
+    strings, numbers, bools = credential
+    credential_signature = sign_hash(issuer_key, credential_hash(strings, numbers, bools, voters))
+    return [voters, votes, signatures, [credential_signature] * len(rows), issuer, proposal_id, did,
+            (strings, numbers, bools, voters)]
+
+
+def sweep_per_vote_gas(results_path):
+    """Highest averageVoteGas of every path measured by the GasCost sweep.
+
+    The sweep averages include the calldata and the fixed cost of the submission, so
+    estimates based on them err on the safe side.
+    """
+    table = load_gas_results(results_path)
+    per_vote = {}
+    for kind, path in PATHS.items():
+        if path.sweep_method in table:
+            block = table.series(path.sweep_method, table.voter_counts(path.sweep_method), "averageVoteGas")
+            per_vote[kind] = int(block.max())
+    return per_vote
+
+
+def build_bundles(kind, proposal_id, did, proposal_hash, voters, issuer_key=None, issuer_index=0,
+                  block_gas_limit=DEFAULT_BLOCK_GAS_LIMIT, per_vote_gas=None, workers=None):
+    """Signs, sorts and chunks the votes of `voters` and returns one submission per chunk.
+
+    Every submission is a dict with the voter count, the estimated gas and the calldata of the
+    submit call, ready for eth_sendTransaction to the governance contract.
+    """
+    path = PATHS[kind]
+    per_vote_gas = path.per_vote_gas if per_vote_gas is None else per_vote_gas
+    issuer = Account.from_key(issuer_key).address if issuer_key is not None else None
+    rows = sign_votes(kind, proposal_hash, voters, issuer_key, workers)
+
+    bundles = []
+    for chunk in chunk_rows(rows, per_vote_gas, block_gas_limit):
+        data = encode_call(path.signature, path.arg_types,
+                           submission_args(kind, chunk, proposal_id, did, issuer, issuer_index, issuer_key))
+        payload = bytes.fromhex(data[2:])
+        bundles.append({
+            "voters": len(chunk),
+            "firstVoter": chunk[0].voter,
+            "lastVoter": chunk[-1].voter,
+            "estimatedGas": TX_BASE_GAS + SUBMIT_BASE_GAS + per_vote_gas * len(chunk) + calldata_gas(payload),
+            "data": data,
+        })
+    return bundles
+
+
+def generate_voters(count, seed="vote-bundles", vote=True):
+    """Deterministic throwaway voter keys, e.g. for benchmarking large electorates."""
+    return [{"key": "0x" + keccak(f"{seed}-{i}".encode()).hex(), "vote": vote} for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build sorted, signed and gas-chunked vote bundles for submitVotes')
+    parser.add_argument('kind', choices=sorted(PATHS), help='governance contract the votes are submitted to')
+    parser.add_argument('--did', required=True, help='DID the proposal belongs to')
+    parser.add_argument('--proposal-id', type=int, default=0, help='proposal index in the governance contract')
+    parser.add_argument('--proposal-hash', required=True, help='hash stored for the proposal by the governance contract')
+    parser.add_argument('--voters', help='JSON file with [{"key", "vote", "token", "credential"}, ...] per voter')
+    parser.add_argument('--generate', type=int, default=0, help='sign for this many generated voters instead')
+    parser.add_argument('--issuer-key', default=os.environ.get('ISSUER_KEY'),
+                        help='private key of the token or credential issuer (or ISSUER_KEY)')
+    parser.add_argument('--issuer-index', type=int, default=0, help='index of the issuer in the governance method')
+    parser.add_argument('--block-gas-limit', type=int, default=DEFAULT_BLOCK_GAS_LIMIT)
+    parser.add_argument('--per-vote-gas', type=int, default=None, help='execution gas per vote of the chunk estimate')
+    parser.add_argument('--results', default=None,
+                        help='test_results.json(l) of a gas sweep to take the per vote gas from')
+    parser.add_argument('--workers', type=int, default=None, help='signing processes (default: one per CPU)')
+    parser.add_argument('--output', default=None, help='write the bundles to this JSON file')
+    args = parser.parse_args()
+
+    if args.voters:
+        with open(args.voters, 'r') as f:
+            voters = json.load(f)
+    elif args.generate:
+        voters = generate_voters(args.generate)
+    else:
+        parser.error('either --voters or --generate is required')
+    per_vote_gas = args.per_vote_gas
+    if per_vote_gas is None and args.results:
+        per_vote_gas = sweep_per_vote_gas(args.results).get(args.kind)
+
+    started = time.perf_counter()
+    bundles = build_bundles(args.kind, args.proposal_id, args.did, bytes.fromhex(args.proposal_hash.removeprefix('0x')),
+                            voters, args.issuer_key, args.issuer_index, args.block_gas_limit, per_vote_gas, args.workers)
+    elapsed = time.perf_counter() - started
+
+    for i, bundle in enumerate(bundles):
+        print(f"bundle {i}: {bundle['voters']} votes, ~{bundle['estimatedGas']} gas, {len(bundle['data']) // 2 - 1} bytes")
+    print(f"built {len(bundles)} bundles for {len(voters)} voters in {elapsed:.2f}s ({len(voters) / elapsed:.0f} voters/s)")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(bundles, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -616,4 +616,264 @@ describe("DIDRegistry", function() {
     expect(updateGovMethods[2].methodName).to.equal(delegatesGovmethods[0].methodName);
     expect(updateGovMethods[3].methodName).to.equal(delegatesGovmethods[1].methodName);
   })
+
+  it("Approving a proposal should invalidate all other pending proposals of the did", async function() {
+    const governanceMethod = {
+      methodName: "SimpleVoting",
+      controllers: [controller1.address, controller2.address],
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [1],
+      stringArgs: ["arg1"],
+      boolArgs: [true],
+      governanceMethodType: 0, verifierContracts: [], issuers: [], expiresAt: 0, blockedUntil: 0, editRightsLevel: 0
+    };
+    await didRegistry.createDIDDocument("publicKey1", "authMethod1", [governanceMethod]);
+
+    // three pending proposals with ids 0, 1 and 2
+    for (let i = 0; i < 3; i++) {
+      const newDidDocument = {
+        owner: owner.address,
+        publicKey: `newPublicKey${i}`,
+        authenticationMethod: "newAuthMethod",
+        lastChanged: await ethers.provider.getBlockNumber()
+      };
+      await didRegistryRouter.connect(controller1).createProposalWithControllers(
+        owner.address, 0, 0, newDidDocument, [governanceMethod]
+      );
+    }
+    expect(await didRegistry.getProposalCount(owner.address)).to.equal(3);
+
+    await expect(governance.connect(controller1).vote(1, 0))
+      .to.emit(didRegistry, "ProposalsInvalidated")
+      .withArgs(owner.address, 1);
+
+    const updatedDid = await didRegistry.didDocuments(owner.address);
+    expect(updatedDid.publicKey).to.equal("newPublicKey1");
+    expect(await didRegistry.didEpochs(owner.address)).to.equal(1);
+    expect(await didRegistry.getProposalCount(owner.address)).to.equal(0);
+
+    // the other proposals got rejected with the approval and can not be resolved anymore
+    await expect(governance.connect(controller1).vote(0, 0)).to.be.revertedWith("Proposal is not pending anymore");
+
+    // proposals of the new epoch are indexed from 0 again
+    await didRegistryRouter.connect(controller1).createProposalWithControllers(
+      owner.address,
+      0,
+      0,
+      {
+        owner: owner.address,
+        publicKey: "finalPublicKey",
+        authenticationMethod: "newAuthMethod",
+        lastChanged: await ethers.provider.getBlockNumber()
+      },
+      [governanceMethod]
+    );
+    const proposal = await didRegistry.proposals(owner.address, 0);
+    expect(proposal.id).to.equal(3);
+    expect(proposal.newDidDocument.publicKey).to.equal("finalPublicKey");
+
+    // a stale proposal pointing to an index that is used again in the new epoch
+    await expect(governance.connect(controller1).vote(0, 0)).to.be.revertedWith("Proposal ids must match");
+    await expect(governance.connect(controller1).vote(2, 0)).to.be.revertedWith("Proposal is not pending anymore");
+    await governance.connect(controller1).vote(3, 0);
+    expect((await didRegistry.didDocuments(owner.address)).publicKey).to.equal("finalPublicKey");
+  })
+  it("Committed DID documents store only the hash of the document and emit the document", async function() {
+    const governanceMethod = {
+      methodName: "SimpleVoting",
+      controllers: [controller1.address, controller2.address],
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [1],
+      stringArgs: ["arg1"],
+      boolArgs: [true],
+      governanceMethodType: 0, verifierContracts: [], issuers: [], expiresAt: 0, blockedUntil: 0, editRightsLevel: 0
+    };
+    const tx = await didRegistry.createCommittedDIDDocument("publicKey1", "authMethod1", [governanceMethod]);
+    const receipt = await tx.wait();
+    const document = [owner.address, "publicKey1", "authMethod1", receipt.blockNumber];
+    const documentHash = await didRegistry.hashDIDDocument(document);
+    const payloadData = ethers.AbiCoder.defaultAbiCoder().encode(["(address,string,string,uint256)"], [document]);
+    // the commitment is the keccak256 of the event data, this is what off-chain verifiers recompute
+    expect(documentHash).to.equal(ethers.keccak256(payloadData));
+
+    await expect(tx).to.emit(didRegistry, "DocumentPayload").withArgs(owner.address, documentHash, document);
+    await expect(tx).to.emit(didRegistry, "DIDDocumentCommitted").withArgs(owner.address, documentHash);
+    expect(await didRegistry.didDocumentHashes(owner.address)).to.equal(documentHash);
+
+    const storedDid = await didRegistry.didDocuments(owner.address);
+    expect(storedDid.owner).to.equal(owner.address);
+    expect(storedDid.publicKey).to.equal("");
+    expect(storedDid.authenticationMethod).to.equal("");
+    expect(storedDid.lastChanged).to.equal(receipt.blockNumber);
+    expect((await didRegistry.getGovernanceMethods(owner.address))[0].methodName).to.equal(governanceMethod.methodName);
+
+    await expect(didRegistry.createCommittedDIDDocument("publicKey1", "authMethod1", [governanceMethod]))
+      .to.be.revertedWith("DID document already exists");
+  })
+
+  it("Approving a proposal of a committed DID document updates the document hash", async function() {
+    const governanceMethod = {
+      methodName: "SimpleVoting",
+      controllers: [controller1.address, controller2.address],
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [1],
+      stringArgs: ["arg1"],
+      boolArgs: [true],
+      governanceMethodType: 0, verifierContracts: [], issuers: [], expiresAt: 0, blockedUntil: 0, editRightsLevel: 0
+    };
+    await didRegistry.createCommittedDIDDocument("publicKey1", "authMethod1", [governanceMethod]);
+    const createdHash = await didRegistry.didDocumentHashes(owner.address);
+
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: await ethers.provider.getBlockNumber()
+    };
+    const newDocumentHash = await didRegistry.hashDIDDocument(newDidDocument);
+    await expect(didRegistryRouter.connect(controller1).createProposalWithControllers(
+      owner.address, 0, 0, newDidDocument, [governanceMethod]
+    )).to.emit(didRegistry, "DocumentPayload")
+      .withArgs(owner.address, newDocumentHash,
+        [newDidDocument.owner, newDidDocument.publicKey, newDidDocument.authenticationMethod, newDidDocument.lastChanged]);
+
+    // the pending proposal keeps only owner and lastChanged of the proposed document
+    const proposal = await didRegistry.getProposal(owner.address, 0);
+    expect(proposal.newDidDocument.owner).to.equal(owner.address);
+    expect(proposal.newDidDocument.publicKey).to.equal("");
+    expect(proposal.newDidDocument.authenticationMethod).to.equal("");
+    expect(await didRegistry.proposedDocumentHash(owner.address, 0)).to.equal(newDocumentHash);
+    expect(await didRegistry.didDocumentHashes(owner.address)).to.equal(createdHash);
+
+    await expect(governance.connect(controller1).vote(0, 0))
+      .to.emit(didRegistry, "DIDDocumentCommitted")
+      .withArgs(owner.address, newDocumentHash);
+
+    expect(await didRegistry.didDocumentHashes(owner.address)).to.equal(newDocumentHash);
+    const updatedDid = await didRegistry.didDocuments(owner.address);
+    expect(updatedDid.owner).to.equal(owner.address);
+    expect(updatedDid.publicKey).to.equal("");
+    expect(updatedDid.lastChanged).to.equal(newDidDocument.lastChanged);
+  })
+
+  it("Rejected proposals of committed DID documents drop their proposed document hash", async function() {
+    const expiresAt = await ethers.provider.getBlock().then(block => block.timestamp) + 1000
+    const governanceMethod = {
+      methodName: "SimpleVoting",
+      controllers: [controller1.address, controller2.address],
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [1],
+      stringArgs: ["arg1"],
+      boolArgs: [true],
+      governanceMethodType: 0, verifierContracts: [], issuers: [], expiresAt: expiresAt, blockedUntil: 0, editRightsLevel: 0
+    };
+    await didRegistry.createCommittedDIDDocument("publicKey1", "authMethod1", [governanceMethod]);
+    const createdHash = await didRegistry.didDocumentHashes(owner.address);
+
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: await ethers.provider.getBlockNumber()
+    };
+    await didRegistryRouter.connect(controller1).createProposalWithControllers(
+      owner.address, 0, 0, newDidDocument, [governanceMethod]
+    );
+    expect(await didRegistry.proposedDocumentHash(owner.address, 0))
+      .to.equal(await didRegistry.hashDIDDocument(newDidDocument));
+
+    // the governance method expires before the vote, so the approval turns into a rejection
+    await ethers.provider.send("evm_increaseTime", [1001])
+    await ethers.provider.send("evm_mine", [])
+    await expect(governance.connect(controller1).vote(0, 0)).to.not.emit(didRegistry, "DIDDocumentCommitted");
+
+    expect(await didRegistry.proposedDocumentHash(owner.address, 0)).to.equal(ethers.ZeroHash);
+    expect(await didRegistry.didDocumentHashes(owner.address)).to.equal(createdHash);
+  })
+
+  it("DID documents created without commitment keep storing the full document", async function() {
+    const governanceMethod = {
+      methodName: "SimpleVoting",
+      controllers: [controller1.address, controller2.address],
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [1],
+      stringArgs: ["arg1"],
+      boolArgs: [true],
+      governanceMethodType: 0, verifierContracts: [], issuers: [], expiresAt: 0, blockedUntil: 0, editRightsLevel: 0
+    };
+    await expect(didRegistry.createDIDDocument("publicKey1", "authMethod1", [governanceMethod]))
+      .to.not.emit(didRegistry, "DocumentPayload");
+    expect(await didRegistry.didDocumentHashes(owner.address)).to.equal(ethers.ZeroHash);
+
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: await ethers.provider.getBlockNumber()
+    };
+    await expect(didRegistryRouter.connect(controller1).createProposalWithControllers(
+      owner.address, 0, 0, newDidDocument, [governanceMethod]
+    )).to.not.emit(didRegistry, "DocumentPayload");
+    expect((await didRegistry.getProposal(owner.address, 0)).newDidDocument.publicKey).to.equal("newPublicKey");
+    expect(await didRegistry.proposedDocumentHash(owner.address, 0)).to.equal(ethers.ZeroHash);
+
+    await expect(governance.connect(controller1).vote(0, 0)).to.not.emit(didRegistry, "DIDDocumentCommitted");
+    expect((await didRegistry.didDocuments(owner.address)).publicKey).to.equal("newPublicKey");
+    expect(await didRegistry.didDocumentHashes(owner.address)).to.equal(ethers.ZeroHash);
+  })
+
+  it("Proposals and governance methods are stored in the packed layout", async function() {
+    const expiresAt = await ethers.provider.getBlock().then(block => block.timestamp) + 2000
+    const governanceMethod = {
+      methodName: "SimpleVoting",
+      controllers: [controller1.address, controller2.address],
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [2],
+      stringArgs: [],
+      boolArgs: [],
+      governanceMethodType: 0, verifierContracts: [], issuers: [], expiresAt: expiresAt, blockedUntil: 1, editRightsLevel: 0
+    };
+    await didRegistry.createDIDDocument("publicKey1", "authMethod1", [governanceMethod, governanceMethod]);
+    const storedMethod = await didRegistry.getGovernanceMethod(owner.address, 1);
+    expect(storedMethod.expiresAt).to.equal(expiresAt);
+    expect(storedMethod.blockedUntil).to.equal(1);
+
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: await ethers.provider.getBlockNumber()
+    };
+    const tx = await didRegistryRouter.connect(controller1).createProposalWithControllers(
+      owner.address, 1, 0, newDidDocument, [governanceMethod]
+    );
+    const timestamp = await tx.getBlock().then(block => block.timestamp);
+    await didRegistryRouter.connect(controller2).createProposalWithControllers(
+      owner.address, 0, 1, newDidDocument, [governanceMethod]
+    );
+    const proposal = await didRegistry.getProposal(owner.address, 0);
+    expect(proposal.governanceMethodIndex).to.equal(1);
+    expect(proposal.id).to.equal(0);
+    expect(proposal.timestamp).to.equal(timestamp);
+
+    // epochProposals is the 4th state variable: did => epoch => Proposal[], a Proposal takes 7 slots
+    const coder = ethers.AbiCoder.defaultAbiCoder();
+    const didSlot = ethers.keccak256(coder.encode(["address", "uint256"], [owner.address, 3]));
+    const arraySlot = ethers.keccak256(coder.encode(["uint256", "bytes32"], [0, didSlot]));
+    const first = BigInt(ethers.keccak256(arraySlot));
+    const slot = async (offset) => BigInt(await ethers.provider.getStorage(didRegistry.target, first + BigInt(offset)));
+    // status | governanceMethodIndex << 8 | caller << 72
+    expect(await slot(5)).to.equal(0n | (1n << 8n) | (BigInt(proposal.caller) << 72n));
+    // id | timestamp << 64
+    expect(await slot(6)).to.equal(0n | (BigInt(timestamp) << 64n));
+    // the second proposal starts right after
+    expect(await slot(7)).to.equal(BigInt(owner.address));
+    expect(await slot(7 + 6)).to.equal(1n | (BigInt(await ethers.provider.getBlock().then(block => block.timestamp)) << 64n));
+  })
 });
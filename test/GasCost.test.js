@@ -1,20 +1,102 @@
 const { expect } = require("chai");
-const { ethers } = require("hardhat");
+const { ethers, network } = require("hardhat");
+const fs = require("fs");
+const path = require("path");
+const { execSync } = require("child_process");
+const { controllersMerkleTree } = require("./helpers/merkle");
 
 describe("Gas Measurements", function() {
   const results = {
     WeightedMajority: {},
+    WeightedMajorityBatch: {},
     WeightedMajorityVC: {},
     WeightedMajorityToken: {},
     NofM: {},
+    NofMCommitted: {},
+    NofMMerkle: {},
     TimeLimited: {},
+    TimeLimitedMerkle: {},
     Independent: {},
     OffChainController: {},
     OffChainToken: {},
-    OffChainVC: {}
+    OffChainVC: {},
+    OffChainTokenAggregated: {},
+    OffChainVCAggregated: {},
+    ProposalInvalidation: {}
 
   };
 
+  // Every measurement is appended to this file as one JSON line as soon as it is taken,
+  // so a crash late in the sweep keeps everything measured before it.
+  // Run with GAS_RESUME=1 to skip the cases that already have a record for the current commit.
+  const resultsJsonlPath = process.env.GAS_RESULTS_JSONL || path.join(__dirname, "test_results.jsonl");
+  const commit = currentCommit();
+  const measured = process.env.GAS_RESUME ? loadMeasured(resultsJsonlPath) : new Set();
+
+  function currentCommit() {
+    try {
+      return execSync("git rev-parse HEAD", { stdio: ["ignore", "pipe", "ignore"] }).toString().trim();
+    } catch (error) {
+      return "unknown";
+    }
+  }
+
+  // reads back the records of the current commit, they also go into the final test_results.json
+  function loadMeasured(file) {
+    const done = new Set();
+    if (!fs.existsSync(file)) {
+      return done;
+    }
+    for (const line of fs.readFileSync(file, "utf8").split("\n")) {
+      if (!line.trim()) {
+        continue;
+      }
+      const { method, voters, configuredVoters, commit: recordCommit, timestamp, ...entry } = JSON.parse(line);
+      if (recordCommit === commit) {
+        done.add(`${method}:${configuredVoters}`);
+        results[method] = results[method] || {};
+        results[method][voters] = entry;
+      }
+    }
+    return done;
+  }
+
+  // scripts/run_gas_sweep.py runs shards of the (method, voters) grid in parallel, each shard
+  // is a separate hardhat process that only defines its own cases, e.g. GAS_CASES=NofM:9,TimeLimited:19
+  const shardCases = process.env.GAS_CASES ? new Set(process.env.GAS_CASES.split(",")) : null;
+
+  function countsFromEnv(name, defaults) {
+    const value = process.env[name];
+    if (value === undefined) {
+      return defaults;
+    }
+    return value ? value.split(",").map(Number) : [];
+  }
+
+  // defines the measurement only if it belongs to this shard and was not measured yet,
+  // so skipped cases do not pay for the deployments in beforeEach
+  function measureCase(method, configuredVoters, title, fn) {
+    const key = `${method}:${configuredVoters}`;
+    if (measured.has(key) || (shardCases && !shardCases.has(key))) {
+      return;
+    }
+    it(title, fn);
+  }
+
+  // voters is the key used in test_results.json, configuredVoters the numVoters of the sweep loop
+  function recordResult(method, voters, configuredVoters, entry) {
+    results[method][voters] = entry;
+    const record = {
+      method,
+      voters: Number(voters),
+      configuredVoters,
+      ...entry,
+      commit,
+      timestamp: new Date().toISOString()
+    };
+    fs.appendFileSync(resultsJsonlPath, JSON.stringify(record) + "\n");
+  }
+
   function sortVoteDataToken(addresses, voteSignatures, tokenSignatures, tokens) {
     let voteData = addresses.map((addr, i) => ({
       address: addr,
@@ -83,11 +165,25 @@ describe("Gas Measurements", function() {
     return ethers.keccak256(encoded)
   }
 
+  // The issuer signs the same tokens and credentials for a voter in every case (they do not
+  // depend on chain state), so each message is signed once and shared by all cases and voter counts.
+  // Vote signatures cover the proposal timestamp and are still signed per case.
+  const signatureCache = new Map();
+
+  function signOnce(signer, message) {
+    const key = `${signer.address}:${ethers.hexlify(message)}`;
+    if (!signatureCache.has(key)) {
+      signatureCache.set(key, signer.signMessage(message));
+    }
+    return signatureCache.get(key);
+  }
+
   let DIDRegistry, DIDRegistryRouter, WeightedMajorityGovernance, NofMGovernance, TimeLimitedGovernance, IndependentGovernance;
   let didRegistry, didRegistryRouter, weightedGov, nofmGov, timeLimitedGov, independentgov;
   let owner, controller1, voters;
-  const numberOfVotersToTest = [9, 19, 39, 59, 79, 99];
-  const numberofIndependent = [10, 20, 40, 60, 80, 100];
+  const numberOfVotersToTest = countsFromEnv("GAS_VOTER_COUNTS", [9, 19, 39, 59, 79, 99]);
+  const numberofIndependent = countsFromEnv("GAS_CONTROLLER_COUNTS", [10, 20, 40, 60, 80, 100]);
+  const numberOfPendingProposals = countsFromEnv("GAS_PENDING_COUNTS", [0, 1, 5, 10, 25, 50]);
   const MAX_VOTERS = 100;
 
   async function measureGas(tx) {
@@ -95,7 +191,7 @@ describe("Gas Measurements", function() {
     return receipt.gasUsed;
   }
 
-  beforeEach(async function() {
+  async function deployContracts() {
     [owner, controller1, ...voters] = await ethers.getSigners();
 
     // Deploy all contracts
@@ -126,6 +222,22 @@ describe("Gas Measurements", function() {
     offChainToken = await OffChainToken.deploy(credentials.target, didRegistry.target);
 
     await didRegistry.setDIDRegistryRouterAddress(didRegistryRouter.target);
+  }
+
+  // The contract suite is deployed once and snapshotted, every case reverts to that snapshot
+  // instead of redeploying. All cases start from the same chain state, so deployment addresses
+  // and nonces (and with them the calldata gas) do not depend on which cases ran before.
+  let deployedSnapshot;
+
+  beforeEach(async function() {
+    if (deployedSnapshot === undefined) {
+      await network.provider.send("hardhat_reset");
+      await deployContracts();
+    } else {
+      await network.provider.send("evm_revert", [deployedSnapshot]);
+    }
+    // a snapshot can only be reverted to once, take it again for the next case
+    deployedSnapshot = await network.provider.send("evm_snapshot");
   });
 
   // Setup functions for each governance type
@@ -209,7 +321,7 @@ describe("Gas Measurements", function() {
     };
 
     const proposalTokenjsHash = hashStringToken("access");
-    const proposalTokenSignature = await controller1.signMessage(ethers.toBeArray(proposalTokenjsHash))
+    const proposalTokenSignature = await signOnce(controller1, ethers.toBeArray(proposalTokenjsHash))
 
     const createTx = await didRegistryRouter.connect(controller1).createProposalWithToken(
       owner.address,
@@ -264,7 +376,7 @@ describe("Gas Measurements", function() {
     const proposalAddresses = [owner.address];
 
     const proposalCredHash = hashCredentials(proposalStrings, proposalNumbers, proposalBools, proposalAddresses);
-    const proposalCredSignature = await controller1.signMessage(ethers.getBytes(proposalCredHash));
+    const proposalCredSignature = await signOnce(controller1, ethers.getBytes(proposalCredHash));
 
 
     const createTx = await ageVerifier.connect(controller1).createProposal(
@@ -366,7 +478,7 @@ describe("Gas Measurements", function() {
     const boolArr = [true];
     const addrArr = [owner.address];
     const jsHash = hashCredentials(strArr, numArr, boolArr, addrArr);
-    const signature = await controller1.signMessage(ethers.toBeArray(jsHash));
+    const signature = await signOnce(controller1, ethers.toBeArray(jsHash));
 
     const createTx = await ageVerifier.connect(owner).createProposal(
       owner.address,
@@ -425,7 +537,7 @@ describe("Gas Measurements", function() {
 
 
     const token = hashStringToken("access");
-    const signature = await controller1.signMessage(ethers.toBeArray(token))
+    const signature = await signOnce(controller1, ethers.toBeArray(token))
 
     const createTx = await didRegistryRouter.connect(controller1).createProposalWithToken(
       owner.address, 0, newDidDocument, [initialGovMethod], 0, "access", signature
@@ -434,7 +546,8 @@ describe("Gas Measurements", function() {
     return { votersList, createTx };
   }
 
-  async function setupInitialNofMGovernance(numVoters) {
+  // committed: the did stores only the hash of its document, see DIDRegistry.createCommittedDIDDocument
+  async function setupInitialNofMGovernance(numVoters, committed = false) {
     const votersList = voters.slice(0, numVoters);
     const threshold = Math.floor(numVoters / 2) + 1;
 
@@ -454,7 +567,8 @@ describe("Gas Measurements", function() {
       issuers: []
     };
 
-    await didRegistry.connect(owner).createDIDDocument(
+    const createDIDDocument = committed ? "createCommittedDIDDocument" : "createDIDDocument";
+    await didRegistry.connect(owner)[createDIDDocument](
       "initialKey",
       "initialAuth",
       [initialGovMethod]
@@ -514,6 +628,89 @@ describe("Gas Measurements", function() {
     return { votersList, createTx };
   }
 
+  // merkle mode: the process only stores the root of the same voters, votes carry a proof
+  async function setupInitialNofMMerkleGovernance(numVoters) {
+    const votersList = voters.slice(0, numVoters);
+    const threshold = Math.floor(numVoters / 2) + 1;
+    const tree = controllersMerkleTree([owner.address, controller1.address, ...votersList.map(v => v.address)]);
+
+    const initialGovMethod = {
+      methodName: "Initial",
+      controllers: [owner.address],
+      contractAddres: nofmGov.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [threshold, BigInt(tree.root)],
+      stringArgs: ["merkle"],
+      boolArgs: [],
+      governanceMethodType: 0,
+      expiresAt: 0,
+      blockedUntil: 0,
+      editRightsLevel: 0,
+      verifierContracts: [],
+      issuers: []
+    };
+
+    await didRegistry.connect(owner).createDIDDocument(
+      "initialKey",
+      "initialAuth",
+      [initialGovMethod]
+    );
+
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: await ethers.provider.getBlockNumber()
+    };
+
+    const createTx = await didRegistryRouter.connect(owner).createProposalWithControllers(
+      owner.address, 0, 0, newDidDocument, [initialGovMethod]
+    );
+
+    return { votersList, createTx, threshold, govMethod: initialGovMethod, tree };
+  }
+
+  async function setupInitialTimeLimitedMerkleGovernance(numVoters) {
+    const votersList = voters.slice(0, numVoters - 2);
+    const votingPeriod = 3600; // 1 hour in seconds
+    const tree = controllersMerkleTree([owner.address, ...votersList.map(v => v.address)]);
+
+    const initialGovMethod = {
+      methodName: "Initial",
+      controllers: [owner.address],
+      contractAddres: timeLimitedGov.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [votingPeriod, BigInt(tree.root), votersList.length + 1],
+      stringArgs: ["merkle"],
+      boolArgs: [],
+      governanceMethodType: 0,
+      expiresAt: 0,
+      blockedUntil: 0,
+      editRightsLevel: 0,
+      verifierContracts: [],
+      issuers: []
+    };
+
+    await didRegistry.connect(owner).createDIDDocument(
+      "initialKey",
+      "initialAuth",
+      [initialGovMethod]
+    );
+
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: await ethers.provider.getBlockNumber()
+    };
+
+    const createTx = await didRegistryRouter.connect(owner).createProposalWithControllers(
+      owner.address, 0, 0, newDidDocument, [initialGovMethod]
+    );
+
+    return { votersList, createTx, govMethod: initialGovMethod, tree };
+  }
+
   async function setupInitialIndependentGovernance(numVoters) {
     const votersList = voters.slice(0, numVoters);
 
@@ -580,7 +777,7 @@ describe("Gas Measurements", function() {
     const boolArr = [true];
     const addrArr = [controller1.address];
     const jsHash = hashCredentials(strArr, numArr, boolArr, addrArr);
-    const signature = await controller1.signMessage(ethers.toBeArray(jsHash));
+    const signature = await signOnce(controller1, ethers.toBeArray(jsHash));
 
     return await ageVerifier.connect(controller1).createProposal(
       owner.address,
@@ -612,7 +809,7 @@ describe("Gas Measurements", function() {
   }
   // Test cases for each governance type
   for (const numVoters of numberOfVotersToTest) {
-    it(`Measure OffChainController governance process gas costs with ${numVoters} voters`, async function() {
+    measureCase("OffChainController", numVoters, `Measure OffChainController governance process gas costs with ${numVoters} voters`, async function() {
       const { votersList, createTx } = await setupInitialOffChainController(numVoters);
       const initialCreateGas = await measureGas(createTx);
 
@@ -720,7 +917,7 @@ describe("Gas Measurements", function() {
       const voteGas = await measureGas(voteTx);
 
       // Update results
-      results.OffChainController[requiredVotes] = {
+      recordResult("OffChainController", requiredVotes, numVoters, {
         initialCreateGas: initialCreateGas.toString(),
         averageVoteGas: (voteGas / BigInt(votesCount)).toString(),
         totalVotingGas: voteGas.toString(),
@@ -728,10 +925,10 @@ describe("Gas Measurements", function() {
         totalProcessGas: (initialCreateGas + voteGas + newProposalGas).toString(),
         //votesSubmitted: requiredVotes,
         //gasUsed: voteGas.toString()
-      };
+      });
     });
 
-    it(`Measure OffChainToken governance process gas costs with ${numVoters} voters`, async function() {
+    measureCase("OffChainToken", numVoters, `Measure OffChainToken governance process gas costs with ${numVoters} voters`, async function() {
       const { votersList, createTx } = await setupInitialOffChainToken(numVoters);
       const initialCreateGas = await measureGas(createTx);
 
@@ -763,7 +960,7 @@ describe("Gas Measurements", function() {
       };
 
       const proposalTokenjsHash = hashStringToken("access");
-      const proposalTokenSignature = await controller1.signMessage(ethers.toBeArray(proposalTokenjsHash))
+      const proposalTokenSignature = await signOnce(controller1, ethers.toBeArray(proposalTokenjsHash))
 
       const proposalTx = await didRegistryRouter.connect(controller1).createProposalWithToken(
         owner.address,
@@ -806,7 +1003,7 @@ describe("Gas Measurements", function() {
         // Generate token signature
         const addressHash = hashAddressToken(voter.address);
 
-        const tokenSignature = await controller1.signMessage(ethers.getBytes(addressHash));
+        const tokenSignature = await signOnce(controller1, ethers.getBytes(addressHash));
 
         voteData.push({
           address: voter.address,
@@ -855,7 +1052,7 @@ describe("Gas Measurements", function() {
       const voteGas = await measureGas(voteTx);
 
       // Update results
-      results.OffChainToken[requiredVotes] = {
+      recordResult("OffChainToken", requiredVotes, numVoters, {
         initialCreateGas: initialCreateGas.toString(),
         averageVoteGas: (voteGas / BigInt(votesCount)).toString(),
         totalVotingGas: voteGas.toString(),
@@ -863,10 +1060,10 @@ describe("Gas Measurements", function() {
         totalProcessGas: (initialCreateGas + voteGas + newProposalGas).toString(),
         //votesSubmitted: requiredVotes,
         //gasUsed: voteGas.toString()
-      };
+      });
     });
 
-    it(`Measure OffChainVC governance process gas costs with ${numVoters} voters`, async function() {
+    measureCase("OffChainVC", numVoters, `Measure OffChainVC governance process gas costs with ${numVoters} voters`, async function() {
       const { votersList, createTx } = await setupInitialOffChainVC(numVoters);
       const initialCreateGas = await measureGas(createTx);
 
@@ -903,7 +1100,7 @@ describe("Gas Measurements", function() {
       const proposalAddresses = [owner.address];
 
       const proposalCredHash = hashCredentials(proposalStrings, proposalNumbers, proposalBools, proposalAddresses);
-      const proposalCredSignature = await controller1.signMessage(ethers.getBytes(proposalCredHash));
+      const proposalCredSignature = await signOnce(controller1, ethers.getBytes(proposalCredHash));
 
       const proposalTx = await ageVerifier.connect(controller1).createProposal(
         owner.address,
@@ -953,7 +1150,7 @@ describe("Gas Measurements", function() {
         const voterAddresses = [voter.address];
 
         const credHash = hashCredentials(voterStrings, voterNumbers, voterBools, voterAddresses);
-        const credSignature = await controller1.signMessage(ethers.getBytes(credHash));
+        const credSignature = await signOnce(controller1, ethers.getBytes(credHash));
 
         votesData.push({
           voter: voter.address,
@@ -1000,7 +1197,7 @@ describe("Gas Measurements", function() {
       const voteGas = await measureGas(voteTx);
 
       // Update results
-      results.OffChainVC[requiredVotes] = {
+      recordResult("OffChainVC", requiredVotes, numVoters, {
         initialCreateGas: initialCreateGas.toString(),
         averageVoteGas: (voteGas / BigInt(votesCount)).toString(),
         totalVotingGas: voteGas.toString(),
@@ -1008,11 +1205,135 @@ describe("Gas Measurements", function() {
         totalProcessGas: (initialCreateGas + voteGas + newProposalGas).toString(),
         //votesSubmitted: requiredVotes,
         //gasUsed: voteGas.toString()
+      });
+    });
+
+
+    // Aggregated submissions: the issuer signs the token / credential hashes of all voters once,
+    // the cases cast the same votes as OffChainToken and OffChainVC
+    measureCase("OffChainTokenAggregated", numVoters, `Measure OffChainToken aggregated submission gas costs with ${numVoters} voters`, async function() {
+      const { votersList, createTx } = await setupInitialOffChainToken(numVoters);
+      const initialCreateGas = await measureGas(createTx);
+      const createBlock = await ethers.provider.getBlock((await createTx.wait()).blockNumber);
+
+      const governanceMethod = {
+        methodName: "OffChainVoting",
+        controllers: [],
+        contractAddres: offChainToken.target,
+        contractPublicKey: "publicKey123",
+        intArgs: [Math.ceil(numVoters / 2)],
+        stringArgs: [],
+        boolArgs: [],
+        governanceMethodType: 1,
+        verifierContracts: [],
+        issuers: [controller1.address],
+        expiresAt: 0,
+        blockedUntil: 0,
+        editRightsLevel: 0
       };
+      const proposalTokenSignature = await signOnce(controller1, ethers.toBeArray(hashStringToken("access")));
+      const newProposalGas = await measureGas(await createNewProposalToken(governanceMethod, "access", proposalTokenSignature));
+
+      const proposalHash = ethers.keccak256(
+        ethers.AbiCoder.defaultAbiCoder().encode(
+          ["uint", "uint", "address", "uint"],
+          [0, 0, owner.address, createBlock.timestamp]
+        )
+      );
+      const voteMessageHash = ethers.keccak256(ethers.solidityPacked(["bytes32", "bool"], [proposalHash, true]));
+
+      const tokenHashes = votersList.map(v => hashAddressToken(v.address));
+      const listSignature = await signOnce(controller1, ethers.getBytes(ethers.keccak256(ethers.concat(tokenHashes))));
+
+      const requiredVotes = Math.ceil(numVoters / 2);
+      const indexes = [...Array(requiredVotes).keys()]
+        .sort((a, b) => votersList[a].address.toLowerCase().localeCompare(votersList[b].address.toLowerCase()));
+
+      const voteTx = await offChainToken.submitAggregatedVotes(0, owner.address, {
+        voters: indexes.map(i => votersList[i].address),
+        votes: Array(requiredVotes).fill(true),
+        signatures: await Promise.all(indexes.map(i => votersList[i].signMessage(ethers.getBytes(voteMessageHash)))),
+        tokens: indexes.map(i => votersList[i].address),
+        tokenIndexes: indexes,
+        tokenHashes,
+        issuerSignature: listSignature,
+        issuer: controller1.address,
+        issuerIndex: 0
+      });
+      const voteGas = await measureGas(voteTx);
+
+      recordResult("OffChainTokenAggregated", requiredVotes, numVoters, {
+        initialCreateGas: initialCreateGas.toString(),
+        averageVoteGas: (voteGas / BigInt(requiredVotes)).toString(),
+        totalVotingGas: voteGas.toString(),
+        newProposalGas: newProposalGas.toString(),
+        totalProcessGas: (initialCreateGas + voteGas + newProposalGas).toString()
+      });
     });
 
+    measureCase("OffChainVCAggregated", numVoters, `Measure OffChainVC aggregated submission gas costs with ${numVoters} voters`, async function() {
+      const { votersList, createTx } = await setupInitialOffChainVC(numVoters);
+      const initialCreateGas = await measureGas(createTx);
+      const createBlock = await ethers.provider.getBlock((await createTx.wait()).blockNumber);
+
+      const governanceMethod = {
+        methodName: "OffChainVoting",
+        controllers: [],
+        contractAddres: offChainVC.target,
+        contractPublicKey: "publicKey123",
+        intArgs: [Math.ceil(numVoters / 2)],
+        stringArgs: [],
+        boolArgs: [],
+        governanceMethodType: 3,
+        verifierContracts: [ageVerifier.target],
+        issuers: [controller1.address],
+        expiresAt: 0,
+        blockedUntil: 0,
+        editRightsLevel: 0
+      };
+      const newProposalGas = await measureGas(await createNewProposalVC(governanceMethod));
+
+      const proposalHash = ethers.keccak256(
+        ethers.AbiCoder.defaultAbiCoder().encode(
+          ["uint", "uint", "address", "uint"],
+          [0, 0, owner.address, createBlock.timestamp]
+        )
+      );
+      const voteMessageHash = ethers.keccak256(ethers.solidityPacked(["bytes32", "bool"], [proposalHash, true]));
+
+      const credentialHashes = votersList.map(v => hashCredentials(["age_verification"], [18], [true], [v.address]));
+      const listSignature = await signOnce(controller1, ethers.getBytes(ethers.keccak256(ethers.concat(credentialHashes))));
+
+      const requiredVotes = Math.ceil(numVoters / 2);
+      const indexes = [...Array(requiredVotes).keys()]
+        .sort((a, b) => votersList[a].address.toLowerCase().localeCompare(votersList[b].address.toLowerCase()));
+
+      const votesData = await Promise.all(indexes.map(async i => ({
+        voter: votersList[i].address,
+        vote: true,
+        voteSignature: await votersList[i].signMessage(ethers.getBytes(voteMessageHash)),
+        credentialIndex: i,
+        strings: ["age_verification"],
+        numbers: [18],
+        bools: [true],
+        addresses: [votersList[i].address]
+      })));
+
+      const voteTx = await offChainVC.submitAggregatedVotes(
+        0, owner.address, votesData, credentialHashes, listSignature, controller1.address, 0
+      );
+      const voteGas = await measureGas(voteTx);
+
+      recordResult("OffChainVCAggregated", requiredVotes, numVoters, {
+        initialCreateGas: initialCreateGas.toString(),
+        averageVoteGas: (voteGas / BigInt(requiredVotes)).toString(),
+        totalVotingGas: voteGas.toString(),
+        newProposalGas: newProposalGas.toString(),
+        totalProcessGas: (initialCreateGas + voteGas + newProposalGas).toString()
+      });
+    });
 
-    it(`Measure WeightedMajority governance process gas costs with ${numVoters} voters`, async function() {
+    measureCase("WeightedMajority", numVoters, `Measure WeightedMajority governance process gas costs with ${numVoters} voters`, async function() {
       const { votersList, createTx } = await setupInitialWeightedGovernance(numVoters);
       const initialCreateGas = await measureGas(createTx);
 
@@ -1048,16 +1369,74 @@ describe("Gas Measurements", function() {
       });
       const newProposalGas = await measureGas(newProposalTx);
 
-      results.WeightedMajority[votesCount] = {
+      recordResult("WeightedMajority", votesCount, numVoters, {
         initialCreateGas: initialCreateGas.toString(),
         averageVoteGas: (totalVotingGas / BigInt(votesCount)).toString(),
         totalVotingGas: totalVotingGas.toString(),
         newProposalGas: newProposalGas.toString(),
         totalProcessGas: (initialCreateGas + totalVotingGas + newProposalGas).toString()
-      };
+      });
     });
 
-    it(`Measure WeightedMajority governance with VC process gas costs with ${numVoters} voters`, async function() {
+    measureCase("WeightedMajorityBatch", numVoters, `Measure WeightedMajority governance with batched controller votes with ${numVoters} voters`, async function() {
+      const { votersList, createTx } = await setupInitialWeightedGovernance(numVoters);
+      const initialCreateGas = await measureGas(createTx);
+
+      // same weights as the WeightedMajority case, all votes needed for approval go into one transaction
+      const requiredVotes = Math.ceil(numVoters / 2);
+      const proposalHash = await weightedGov.getProposalHash(0);
+      const voteMessageHash = ethers.keccak256(
+        ethers.solidityPacked(["bytes32", "bool"], [proposalHash, true])
+      );
+
+      const voteData = [];
+      for (let i = 0; i < requiredVotes; i++) {
+        const voter = votersList[i];
+        voteData.push({
+          address: voter.address,
+          controllerIndex: i + 2,
+          signature: await voter.signMessage(ethers.getBytes(voteMessageHash))
+        });
+      }
+      voteData.sort((a, b) => a.address.toLowerCase().localeCompare(b.address.toLowerCase()));
+
+      const voteTx = await weightedGov.submitControllerVotes(
+        0,
+        voteData.map(d => d.address),
+        voteData.map(d => d.controllerIndex),
+        Array(voteData.length).fill(true),
+        voteData.map(d => d.signature)
+      );
+      const totalVotingGas = await measureGas(voteTx);
+      const votesCount = voteData.length;
+
+      const newProposalTx = await createNewProposal({
+        methodName: "WeightedVoting",
+        controllers: [owner.address, controller1.address, ...votersList.map(v => v.address)],
+        contractAddres: weightedGov.target,
+        contractPublicKey: "publicKey123",
+        intArgs: Array(numVoters + 2).fill(1),
+        stringArgs: [],
+        boolArgs: [],
+        governanceMethodType: 0,
+        expiresAt: 0,
+        blockedUntil: 0,
+        editRightsLevel: 0,
+        verifierContracts: [],
+        issuers: []
+      });
+      const newProposalGas = await measureGas(newProposalTx);
+
+      recordResult("WeightedMajorityBatch", votesCount, numVoters, {
+        initialCreateGas: initialCreateGas.toString(),
+        averageVoteGas: (totalVotingGas / BigInt(votesCount)).toString(),
+        totalVotingGas: totalVotingGas.toString(),
+        newProposalGas: newProposalGas.toString(),
+        totalProcessGas: (initialCreateGas + totalVotingGas + newProposalGas).toString()
+      });
+    });
+
+    measureCase("WeightedMajorityVC", numVoters, `Measure WeightedMajority governance with VC process gas costs with ${numVoters} voters`, async function() {
       const { votersList, createTx } = await setupInitialWeightedVCGovernance(numVoters);
       const initialCreateGas = await measureGas(createTx);
 
@@ -1070,7 +1449,7 @@ describe("Gas Measurements", function() {
       for (const voter of votersList) {
         const addrArr = [voter.address];
         const jsHash = hashCredentials(strArr, numArr, boolArr, addrArr);
-        const signature = await controller1.signMessage(ethers.toBeArray(jsHash));
+        const signature = await signOnce(controller1, ethers.toBeArray(jsHash));
 
         const isApproved = await weightedGov.isApproved(0);
         if (!isApproved) {
@@ -1111,16 +1490,16 @@ describe("Gas Measurements", function() {
       });
       const newProposalGas = await measureGas(newProposalTx);
 
-      results.WeightedMajorityVC[votesCount] = {
+      recordResult("WeightedMajorityVC", votesCount, numVoters, {
         initialCreateGas: initialCreateGas.toString(),
         averageVoteGas: (totalVotingGas / BigInt(votesCount)).toString(),
         totalVotingGas: totalVotingGas.toString(),
         newProposalGas: newProposalGas.toString(),
         totalProcessGas: (initialCreateGas + totalVotingGas + newProposalGas).toString()
-      };
+      });
     });
 
-    it(`Measure WeightedMajority governance with Token process gas costs with ${numVoters} voters`, async function() {
+    measureCase("WeightedMajorityToken", numVoters, `Measure WeightedMajority governance with Token process gas costs with ${numVoters} voters`, async function() {
       const { votersList, createTx } = await setupInitialWeightedTGovernance(numVoters);
       const initialCreateGas = await measureGas(createTx);
 
@@ -1129,7 +1508,7 @@ describe("Gas Measurements", function() {
 
       for (const voter of votersList) {
         const jsHash = hashAddressWeightToken(voter.address, 20);
-        const signature = await controller1.signMessage(ethers.toBeArray(jsHash))
+        const signature = await signOnce(controller1, ethers.toBeArray(jsHash))
 
         const isApproved = await weightedGov.isApproved(0);
         if (!isApproved) {
@@ -1152,7 +1531,7 @@ describe("Gas Measurements", function() {
       }
 
       const jsHash = hashStringToken("access");
-      const signature = await controller1.signMessage(ethers.toBeArray(jsHash))
+      const signature = await signOnce(controller1, ethers.toBeArray(jsHash))
 
       const newProposalTx = await createNewProposalToken({
         methodName: "Initial",
@@ -1171,42 +1550,90 @@ describe("Gas Measurements", function() {
       }, "access", signature);
       const newProposalGas = await measureGas(newProposalTx);
 
-      results.WeightedMajorityToken[votesCount] = {
+      recordResult("WeightedMajorityToken", votesCount, numVoters, {
         initialCreateGas: initialCreateGas.toString(),
         averageVoteGas: (totalVotingGas / BigInt(votesCount)).toString(),
         totalVotingGas: totalVotingGas.toString(),
         newProposalGas: newProposalGas.toString(),
         totalProcessGas: (initialCreateGas + totalVotingGas + newProposalGas).toString()
-      };
+      });
     });
 
-    it(`Measure NofM governance process gas costs with ${numVoters} voters`, async function() {
-      const { votersList, createTx, threshold } = await setupInitialNofMGovernance(numVoters);
+    // NofMCommitted runs the same process on a did that stores only the hash of its documents
+    for (const [method, committed] of [["NofM", false], ["NofMCommitted", true]]) {
+      measureCase(method, numVoters, `Measure ${method} governance process gas costs with ${numVoters} voters`, async function() {
+        const { votersList, createTx, threshold } = await setupInitialNofMGovernance(numVoters, committed);
+        const initialCreateGas = await measureGas(createTx);
+
+        let totalVotingGas = ethers.getBigInt(0);
+        let votesCount = 2;
+
+        for (const voter of votersList) {
+          if (votesCount < threshold) {
+            const isApproved = await nofmGov.isApproved(0);
+            if (!isApproved) {
+              const voteTx = await nofmGov.connect(voter).vote(0, votesCount);
+              const voteGas = await measureGas(voteTx);
+              totalVotingGas += voteGas;
+              votesCount++;
+            } else {
+              break;
+            }
+          }
+        }
+
+        const newProposalTx = await createNewProposal({
+          methodName: "NofM",
+          controllers: [owner.address, controller1.address, ...votersList.map(v => v.address)],
+          contractAddres: nofmGov.target,
+          contractPublicKey: "publicKey123",
+          intArgs: [Math.floor(numVoters / 2) + 1],
+          stringArgs: [],
+          boolArgs: [],
+          governanceMethodType: 0,
+          expiresAt: 0,
+          blockedUntil: 0,
+          editRightsLevel: 0,
+          verifierContracts: [],
+          issuers: []
+        });
+        const newProposalGas = await measureGas(newProposalTx);
+
+        recordResult(method, votesCount, numVoters, {
+          initialCreateGas: initialCreateGas.toString(),
+          averageVoteGas: (totalVotingGas / BigInt(votesCount)).toString(),
+          totalVotingGas: totalVotingGas.toString(),
+          newProposalGas: newProposalGas.toString(),
+          totalProcessGas: (initialCreateGas + totalVotingGas + newProposalGas).toString()
+        });
+      });
+    }
+
+    measureCase("TimeLimited", numVoters, `Measure TimeLimited governance process gas costs with ${numVoters} voters`, async function() {
+      const { votersList, createTx } = await setupInitialTimeLimitedGovernance(numVoters);
       const initialCreateGas = await measureGas(createTx);
 
       let totalVotingGas = ethers.getBigInt(0);
-      let votesCount = 2;
+      let votesCount = 0;
 
       for (const voter of votersList) {
-        if (votesCount < threshold) {
-          const isApproved = await nofmGov.isApproved(0);
-          if (!isApproved) {
-            const voteTx = await nofmGov.connect(voter).vote(0, votesCount);
-            const voteGas = await measureGas(voteTx);
-            totalVotingGas += voteGas;
-            votesCount++;
-          } else {
-            break;
-          }
+        const isApproved = await timeLimitedGov.isApproved(0);
+        if (!isApproved) {
+          const voteTx = await timeLimitedGov.connect(voter).vote(0, true);
+          const voteGas = await measureGas(voteTx);
+          totalVotingGas += voteGas;
+          votesCount++;
+        } else {
+          break;
         }
       }
 
       const newProposalTx = await createNewProposal({
-        methodName: "NofM",
+        methodName: "TimeLimited",
         controllers: [owner.address, controller1.address, ...votersList.map(v => v.address)],
-        contractAddres: nofmGov.target,
+        contractAddres: timeLimitedGov.target,
         contractPublicKey: "publicKey123",
-        intArgs: [Math.floor(numVoters / 2) + 1],
+        intArgs: [3600],
         stringArgs: [],
         boolArgs: [],
         governanceMethodType: 0,
@@ -1218,64 +1645,76 @@ describe("Gas Measurements", function() {
       });
       const newProposalGas = await measureGas(newProposalTx);
 
-      results.NofM[votesCount] = {
+      recordResult("TimeLimited", votesCount, numVoters, {
         initialCreateGas: initialCreateGas.toString(),
         averageVoteGas: (totalVotingGas / BigInt(votesCount)).toString(),
         totalVotingGas: totalVotingGas.toString(),
         newProposalGas: newProposalGas.toString(),
         totalProcessGas: (initialCreateGas + totalVotingGas + newProposalGas).toString()
-      };
+      });
     });
 
-    it(`Measure TimeLimited governance process gas costs with ${numVoters} voters`, async function() {
-      const { votersList, createTx } = await setupInitialTimeLimitedGovernance(numVoters);
+    measureCase("NofMMerkle", numVoters, `Measure NofM merkle root governance process gas costs with ${numVoters} voters`, async function() {
+      const { votersList, createTx, threshold, govMethod, tree } = await setupInitialNofMMerkleGovernance(numVoters);
       const initialCreateGas = await measureGas(createTx);
 
+      // same votes as the NofM case, each one proves its voter against the stored root
       let totalVotingGas = ethers.getBigInt(0);
-      let votesCount = 0;
+      let votesCount = 2;
 
       for (const voter of votersList) {
-        const isApproved = await timeLimitedGov.isApproved(0);
-        if (!isApproved) {
-          const voteTx = await timeLimitedGov.connect(voter).vote(0, true);
-          const voteGas = await measureGas(voteTx);
-          totalVotingGas += voteGas;
-          votesCount++;
-        } else {
+        if (votesCount >= threshold) {
           break;
         }
+        const voteTx = await nofmGov.connect(voter).voteWithProof(0, tree.proof(voter.address));
+        totalVotingGas += await measureGas(voteTx);
+        votesCount++;
       }
 
-      const newProposalTx = await createNewProposal({
-        methodName: "TimeLimited",
-        controllers: [owner.address, controller1.address, ...votersList.map(v => v.address)],
-        contractAddres: timeLimitedGov.target,
-        contractPublicKey: "publicKey123",
-        intArgs: [3600],
-        stringArgs: [],
-        boolArgs: [],
-        governanceMethodType: 0,
-        expiresAt: 0,
-        blockedUntil: 0,
-        editRightsLevel: 0,
-        verifierContracts: [],
-        issuers: []
+      const newProposalTx = await createNewProposal({ ...govMethod, methodName: "NofMMerkle" });
+      const newProposalGas = await measureGas(newProposalTx);
+
+      recordResult("NofMMerkle", votesCount, numVoters, {
+        initialCreateGas: initialCreateGas.toString(),
+        averageVoteGas: (totalVotingGas / BigInt(votesCount)).toString(),
+        totalVotingGas: totalVotingGas.toString(),
+        newProposalGas: newProposalGas.toString(),
+        totalProcessGas: (initialCreateGas + totalVotingGas + newProposalGas).toString()
       });
+    });
+
+    measureCase("TimeLimitedMerkle", numVoters, `Measure TimeLimited merkle root governance process gas costs with ${numVoters} voters`, async function() {
+      const { votersList, createTx, govMethod, tree } = await setupInitialTimeLimitedMerkleGovernance(numVoters);
+      const initialCreateGas = await measureGas(createTx);
+
+      let totalVotingGas = ethers.getBigInt(0);
+      let votesCount = 0;
+
+      for (const voter of votersList) {
+        if (await timeLimitedGov.isApproved(0)) {
+          break;
+        }
+        const voteTx = await timeLimitedGov.connect(voter).voteWithProof(0, true, tree.proof(voter.address));
+        totalVotingGas += await measureGas(voteTx);
+        votesCount++;
+      }
+
+      const newProposalTx = await createNewProposal({ ...govMethod, methodName: "TimeLimitedMerkle" });
       const newProposalGas = await measureGas(newProposalTx);
 
-      results.TimeLimited[votesCount] = {
+      recordResult("TimeLimitedMerkle", votesCount, numVoters, {
         initialCreateGas: initialCreateGas.toString(),
         averageVoteGas: (totalVotingGas / BigInt(votesCount)).toString(),
         totalVotingGas: totalVotingGas.toString(),
         newProposalGas: newProposalGas.toString(),
         totalProcessGas: (initialCreateGas + totalVotingGas + newProposalGas).toString()
-      };
+      });
     });
 
   }
 
   for (const numVoters of numberofIndependent) {
-    it(`Measure Independent governance process gas costs with ${numVoters} controllers`, async function() {
+    measureCase("Independent", numVoters, `Measure Independent governance process gas costs with ${numVoters} controllers`, async function() {
       const { votersList, createTx } = await setupInitialIndependentGovernance(numVoters);
       const initialCreateGas = await measureGas(createTx);
 
@@ -1296,21 +1735,61 @@ describe("Gas Measurements", function() {
       });
       const newProposalGas = await measureGas(newProposalTx);
 
-      results.Independent[numVoters] = {
+      recordResult("Independent", numVoters, numVoters, {
         initialCreateGas: initialCreateGas.toString(),
         newProposalGas: newProposalGas.toString(),
         totalProcessGas: (initialCreateGas + newProposalGas).toString()
+      });
+    });
+  }
+
+  // Approving a proposal invalidates all other pending proposals of the did by starting a new epoch,
+  // the gas of the approving vote should stay flat however many proposals are pending
+  for (const numPending of numberOfPendingProposals) {
+    measureCase("ProposalInvalidation", numPending, `Measure proposal approval gas costs with ${numPending} other pending proposals`, async function() {
+      const governanceMethod = {
+        methodName: "Initial",
+        controllers: [owner.address, controller1.address],
+        contractAddres: nofmGov.target,
+        contractPublicKey: "publicKey123",
+        intArgs: [1],
+        stringArgs: [],
+        boolArgs: [],
+        governanceMethodType: 0,
+        expiresAt: 0,
+        blockedUntil: 0,
+        editRightsLevel: 0,
+        verifierContracts: [],
+        issuers: []
       };
+
+      await didRegistry.connect(owner).createDIDDocument(
+        "initialKey",
+        "initialAuth",
+        [governanceMethod]
+      );
+
+      // proposals 0..numPending, the last one gets approved
+      for (let i = 0; i <= numPending; i++) {
+        await createNewProposal(governanceMethod);
+      }
+
+      const approveTx = await nofmGov.connect(owner).vote(numPending, 0);
+      const approveGas = await measureGas(approveTx);
+
+      recordResult("ProposalInvalidation", numPending, numPending, {
+        averageVoteGas: approveGas.toString(),
+        totalVotingGas: approveGas.toString(),
+        totalProcessGas: approveGas.toString()
+      });
     });
   }
 
   after(function() {
-    const fs = require('fs');
-    const path = require('path');
     console.log("TEST_RESULTS=" + JSON.stringify(results, null, 2));
 
     // Save results to JSON file
-    const resultsPath = path.join(__dirname, 'test_results.json');
+    const resultsPath = process.env.GAS_RESULTS_JSON || path.join(__dirname, 'test_results.json');
     fs.writeFileSync(resultsPath, JSON.stringify(results, null, 2));
   });
 });
@@ -2,6 +2,7 @@
 const { expect } = require("chai");
 const { Log } = require("ethers");
 const { ethers } = require("hardhat");
+const { controllersMerkleTree } = require("./helpers/merkle");
 
 describe("NofMGovernance", function() {
   let DIDRegistry, CounterLogicGovernance, didRegistry, governance;
@@ -118,6 +119,50 @@ describe("NofMGovernance", function() {
 
 
   });
+  it("Vote with merkle proofs when only the controllers root is stored", async function() {
+    const tree = controllersMerkleTree([controller1, controller2, controller3, controller4, controller5].map(c => c.address));
+    const merkleGovMethod = {
+      methodName: "3 of 5 merkle governance",
+      controllers: [controller1.address], // only proposers, voters are proven against the root
+      contractAddres: governance.target,
+      contractPublicKey: "dddd",
+      intArgs: [3, BigInt(tree.root)], // threshold and controllers root
+      stringArgs: ["merkle"],
+      boolArgs: [],
+      governanceMethodType: 0, verifierContracts: [], issuers: [], expiresAt: 0, blockedUntil: 0, editRightsLevel: 0
+    }
+
+    await didRegistry.createDIDDocument("publicKey1", "authMethod1", [merkleGovMethod]);
+
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: await ethers.provider.getBlockNumber()
+    };
+
+    await didRegistryRouter.connect(controller1).createProposalWithControllers(
+      owner.address, 0, 0, newDidDocument, [merkleGovMethod]
+    )
+
+    const governanceProcess = await governance.governanceProcesses(0);
+    expect(governanceProcess.controllersRoot).to.equal(tree.root);
+
+    // a proof of another controller does not work for a non controller, a controller can vote once
+    await expect(governance.connect(other).voteWithProof(0, tree.proof(controller2.address)))
+      .to.be.revertedWith("Only controllers can vote.");
+    await governance.connect(controller2).voteWithProof(0, tree.proof(controller2.address))
+    await expect(governance.connect(controller2).voteWithProof(0, tree.proof(controller2.address)))
+      .to.be.revertedWith("Controller already voted");
+
+    await governance.connect(controller4).voteWithProof(0, tree.proof(controller4.address))
+    await governance.connect(controller5).voteWithProof(0, tree.proof(controller5.address))
+
+    const updatedDid = await didRegistry.didDocuments(owner.address)
+    expect(updatedDid.publicKey).to.equal(newDidDocument.publicKey);
+    expect(updatedDid.authenticationMethod).to.equal(newDidDocument.authenticationMethod);
+  });
+
   // TODO: create more tests
 
 });
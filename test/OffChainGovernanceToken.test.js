@@ -519,4 +519,110 @@ await expect(
    )
     ).to.be.revertedWith("not correct issuer");
   });
-});
\ No newline at end of file
+
+  it("Should count aggregated votes against one signed token list", async function () {
+    const governanceMethod = {
+      methodName: "OffChainVoting",
+      controllers: [],
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [2],
+      stringArgs: [],
+      boolArgs: [],
+      governanceMethodType: 1, verifierContracts: [], issuers: [controller1.address], expiresAt: 0, blockedUntil: 0, editRightsLevel: 0,
+    };
+
+    await didRegistry.connect(owner).createDIDDocument("publicKey1", "authMethod1", [governanceMethod]);
+
+    const proposalTokenSignature = await controller1.signMessage(ethers.toBeArray(hashStringToken("access")))
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: await ethers.provider.getBlockNumber(),
+    };
+
+    await didRegistryRouter.connect(controller1).createProposalWithToken(
+      owner.address, 0, newDidDocument, [governanceMethod], 0, "access", proposalTokenSignature
+    );
+
+    const block = await ethers.provider.getBlock("latest").then(block => block.timestamp)
+    const proposalHash = ethers.keccak256(
+      ethers.AbiCoder.defaultAbiCoder().encode(
+        ["uint", "uint", "address", "uint"],
+        [0, 0, owner.address, block]
+      )
+    );
+    const voteMessageHash = ethers.keccak256(ethers.solidityPacked(["bytes32", "bool"], [proposalHash, true]));
+
+    // the issuer signs the hashes of all its tokens once instead of every token
+    const holders = [controller2, controller3, other];
+    const tokenHashes = holders.map(h => hashAddressToken(h.address));
+    const listSignature = await controller1.signMessage(ethers.getBytes(ethers.keccak256(ethers.concat(tokenHashes))));
+
+    const sorted = [controller2, controller3].sort((a, b) => a.address.toLowerCase().localeCompare(b.address.toLowerCase()));
+    const voteParams = {
+      voters: sorted.map(v => v.address),
+      votes: [true, true],
+      signatures: await Promise.all(sorted.map(v => v.signMessage(ethers.getBytes(voteMessageHash)))),
+      tokens: sorted.map(v => v.address),
+      tokenIndexes: sorted.map(v => holders.indexOf(v)),
+      tokenHashes,
+      issuerSignature: listSignature,
+      issuer: controller1.address,
+      issuerIndex: 0
+    };
+
+    // the same token twice is rejected by the order check, not by storage
+    await expect(
+      governance.submitAggregatedVotes(0, owner.address, {
+        ...voteParams,
+        voters: [voteParams.voters[0], voteParams.voters[0]],
+        tokenIndexes: [voteParams.tokenIndexes[0], voteParams.tokenIndexes[0]]
+      })
+    ).to.be.revertedWith("Voters must be in ascending order");
+    await expect(
+      governance.submitAggregatedVotes(0, owner.address, { ...voteParams, issuerSignature: proposalTokenSignature })
+    ).to.be.revertedWith("Invalid token list signature");
+
+    const single = (i) => ({
+      ...voteParams,
+      voters: [voteParams.voters[i]],
+      votes: [true],
+      signatures: [voteParams.signatures[i]],
+      tokens: [voteParams.tokens[i]],
+      tokenIndexes: [voteParams.tokenIndexes[i]]
+    });
+    await expect(
+      governance.submitAggregatedVotes(0, owner.address, single(0))
+    ).to.emit(governance, "VotesSubmitted").withArgs(0, owner.address, 1, 0);
+
+    // a used token is public, anyone could replay it with an own vote signature
+    const replay = {
+      ...single(0),
+      voters: [other.address],
+      signatures: [await other.signMessage(ethers.getBytes(voteMessageHash))]
+    };
+    await expect(
+      governance.submitAggregatedVotes(0, owner.address, replay)
+    ).to.be.revertedWith("Token already used");
+    // a token votes once per proposal, the proposal takes no other list of the issuer signed later
+    const longerHashes = [hashAddressToken(owner.address), ...tokenHashes];
+    const longerSignature = await controller1.signMessage(ethers.getBytes(ethers.keccak256(ethers.concat(longerHashes))));
+    await expect(
+      governance.submitAggregatedVotes(0, owner.address, {
+        ...replay,
+        tokenHashes: longerHashes,
+        tokenIndexes: [voteParams.tokenIndexes[0] + 1],
+        issuerSignature: longerSignature
+      })
+    ).to.be.revertedWith("Token list differs from the list of the proposal");
+
+    await expect(
+      governance.submitAggregatedVotes(0, owner.address, single(1))
+    ).to.emit(governance, "ProposalResolved").withArgs(0, owner.address, true);
+
+    const finalProposal = await governance.proposals(owner.address, 0);
+    expect(finalProposal.yesVotes).to.equal(2);
+  });
+});
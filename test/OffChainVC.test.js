@@ -364,4 +364,108 @@ describe("OffChainGovernanceVC", function() {
       )
     ).to.be.revertedWith("VC must be at least 18 years old");
   });
+
+  it("Should count aggregated votes against one signed credential list", async function() {
+    await setupInitialDID();
+
+    const newGovernanceMethod = {
+      methodName: "VCVoting",
+      controllers: [],
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [2],
+      stringArgs: [],
+      boolArgs: [],
+      governanceMethodType: 3,
+      verifierContracts: [ageVerifier.target],
+      issuers: [issuer1.address],
+      expiresAt: 0,
+      blockedUntil: 0,
+      editRightsLevel: 0,
+    };
+
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: await ethers.provider.getBlockNumber(),
+    };
+
+    const proposalStrings = ["age_verification"];
+    const proposalNumbers = [18];
+    const proposalBools = [true];
+    const proposalAddresses = [owner.address];
+
+    const proposalCredHash = hashCredentials(proposalStrings, proposalNumbers, proposalBools, proposalAddresses);
+    const proposalCredSignature = await issuer1.signMessage(ethers.getBytes(proposalCredHash));
+
+    await ageVerifier.connect(issuer1).createProposal(
+      owner.address,
+      0,
+      newDidDocument,
+      [newGovernanceMethod],
+      proposalStrings,
+      proposalNumbers,
+      proposalBools,
+      proposalAddresses,
+      proposalCredSignature,
+      issuer1.address,
+      0
+    );
+
+    const block = await ethers.provider.getBlock("latest");
+    const proposalHash = ethers.keccak256(
+      ethers.AbiCoder.defaultAbiCoder().encode(
+        ["uint", "uint", "address", "uint"],
+        [0, 0, owner.address, block.timestamp]
+      )
+    );
+    const voteHash = ethers.keccak256(ethers.solidityPacked(["bytes32", "bool"], [proposalHash, true]));
+
+    // the issuer signs the hashes of all its credentials once instead of every credential
+    const holders = [voter1, voter2, other];
+    const credentialHashes = holders.map(h => hashCredentials(["age_verification"], [18], [true], [h.address]));
+    const listHash = ethers.keccak256(ethers.concat(credentialHashes));
+    const listSignature = await issuer1.signMessage(ethers.getBytes(listHash));
+
+    const aggregatedVote = async (voter, credentialIndex) => ({
+      voter: voter.address,
+      vote: true,
+      voteSignature: await voter.signMessage(ethers.getBytes(voteHash)),
+      credentialIndex,
+      strings: ["age_verification"],
+      numbers: [18],
+      bools: [true],
+      addresses: [holders[credentialIndex].address]
+    });
+
+    await expect(
+      governance.submitAggregatedVotes(0, owner.address, [await aggregatedVote(voter1, 0)], credentialHashes, listSignature, issuer1.address, 0)
+    ).to.emit(governance, "VotesSubmitted").withArgs(0, owner.address, 1, 0);
+    expect(await governance.verifiedCredentialLists(issuer1.address, listHash)).to.equal(true);
+
+    // a credential votes once per proposal
+    await expect(
+      governance.submitAggregatedVotes(0, owner.address, [await aggregatedVote(voter2, 0)], credentialHashes, "0x", issuer1.address, 0)
+    ).to.be.revertedWith("Credential already used");
+    // a longer list the issuer signed later, where the credential has another index, is refused
+    const longerHashes = [hashCredentials(["age_verification"], [18], [true], [owner.address]), ...credentialHashes];
+    const longerSignature = await issuer1.signMessage(ethers.getBytes(ethers.keccak256(ethers.concat(longerHashes))));
+    await expect(
+      governance.submitAggregatedVotes(0, owner.address, [{ ...(await aggregatedVote(voter2, 0)), credentialIndex: 1 }],
+        longerHashes, longerSignature, issuer1.address, 0)
+    ).to.be.revertedWith("Credential list differs from the list of the proposal");
+    const forged = { ...(await aggregatedVote(voter2, 1)), numbers: [21] };
+    await expect(
+      governance.submitAggregatedVotes(0, owner.address, [forged], credentialHashes, "0x", issuer1.address, 0)
+    ).to.be.revertedWith("not valid credentials");
+
+    // the list signature was verified by the first batch, later batches do not need it
+    await expect(
+      governance.submitAggregatedVotes(0, owner.address, [await aggregatedVote(voter2, 1)], credentialHashes, "0x", issuer1.address, 0)
+    ).to.emit(governance, "ProposalResolved").withArgs(0, owner.address, true);
+
+    const updatedDid = await didRegistry.didDocuments(owner.address);
+    expect(updatedDid.publicKey).to.equal("newPublicKey");
+  });
 });
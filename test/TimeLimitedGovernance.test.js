@@ -1,5 +1,6 @@
 const { expect } = require("chai");
 const { ethers } = require("hardhat");
+const { controllersMerkleTree } = require("./helpers/merkle");
 
 describe("TimeLimitedGovernance", function() {
   let DIDRegistry, CounterLogicGovernance, didRegistry, governance;
@@ -397,10 +398,10 @@ describe("TimeLimitedGovernance", function() {
     // Verify the upkeep results
     expect(upkeepNeeded).to.equal(true);
 
-    // Decode performData
+    // Decode performData, the number of expired governance processes
     const abiCoder = new ethers.AbiCoder();
     const decodedData = abiCoder.decode(["uint256"], performData);
-    expect(decodedData[0]).to.equal(0);
+    expect(decodedData[0]).to.equal(1);
   });
 
   it("Perform Upkeep functions properly", async function() {
@@ -436,7 +437,7 @@ describe("TimeLimitedGovernance", function() {
 
     // Perform upkeep
     const abiCoder = new ethers.AbiCoder();
-    const performData = abiCoder.encode(["uint256"], [0]); // Encode proposalId
+    const performData = abiCoder.encode(["uint256"], [1]); // Encode number of processes to finalize
     await governance.performUpkeep(performData);
 
     const statusOfVote = await governance.isApproved(0);
@@ -447,4 +448,210 @@ describe("TimeLimitedGovernance", function() {
     expect(did.authenticationMethod).to.equal("newAuthMethod");
   });
 
+  it("Vote with merkle proofs when only the controllers root is stored", async function() {
+    const voterAddresses = [controller1, controller2, controller3, controller4, controller5].map(c => c.address);
+    const tree = controllersMerkleTree(voterAddresses);
+    const governanceMethod = {
+      methodName: "MerkleVoting",
+      controllers: [controller1.address], // only proposers, voters are proven against the root
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [600, BigInt(tree.root), voterAddresses.length], // voting period, controllers root, number of voters
+      stringArgs: ["merkle"],
+      boolArgs: [],
+      governanceMethodType: 0, verifierContracts: [], issuers: [], expiresAt: 0, blockedUntil: 0, editRightsLevel: 0
+    };
+
+    await didRegistry.connect(owner).createDIDDocument("publicKey1", "authMethod1", [governanceMethod]);
+
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: await ethers.provider.getBlockNumber()
+    };
+
+    await didRegistryRouter.connect(controller1).createProposalWithControllers(owner.address, 0, 0, newDidDocument, []);
+
+    const proposal = await governance.governanceProcesses(0);
+    expect(proposal.requiredYesVotes).to.equal(3);
+    expect(proposal.controllersRoot).to.equal(tree.root);
+
+    await expect(governance.connect(other).voteWithProof(0, true, tree.proof(controller1.address)))
+      .to.be.revertedWith("Only controllers can vote");
+    // the controllers list of the method is not used for voting in merkle mode
+    await expect(governance.connect(controller1).vote(0, true)).to.be.revertedWith("Only controllers can vote");
+
+    await governance.connect(controller3).voteWithProof(0, true, tree.proof(controller3.address));
+    await expect(governance.connect(controller3).voteWithProof(0, true, tree.proof(controller3.address)))
+      .to.be.revertedWith("Controller already voted");
+    await governance.connect(controller4).voteWithProof(0, false, tree.proof(controller4.address));
+    await governance.connect(controller5).voteWithProof(0, true, tree.proof(controller5.address));
+    expect(await governance.isApproved(0)).to.equal(false);
+    await governance.connect(controller2).voteWithProof(0, true, tree.proof(controller2.address));
+
+    expect(await governance.isApproved(0)).to.equal(true);
+    const did = await didRegistry.didDocuments(owner.address);
+    expect(did.publicKey).to.equal("newPublicKey");
+  });
+
+  it("One upkeep finalizes all expired proposals in order of their expiry", async function() {
+    const governanceMethod = (methodName, duration) => ({
+      methodName,
+      controllers: [controller1.address, controller2.address, controller3.address],
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [duration],
+      stringArgs: ["arg1"],
+      boolArgs: [true],
+      governanceMethodType: 0, verifierContracts: [], issuers: [], expiresAt: 0, blockedUntil: 0, editRightsLevel: 0
+    });
+    await didRegistry.connect(owner).createDIDDocument("publicKey1", "authMethod1", [
+      governanceMethod("Long", 900),
+      governanceMethod("Short", 300)
+    ]);
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: await ethers.provider.getBlockNumber()
+    };
+    // proposal 0 uses the long voting period, proposals 1 and 2 expire before it
+    await didRegistryRouter.connect(controller1).createProposalWithControllers(owner.address, 0, 0, newDidDocument, []);
+    await didRegistryRouter.connect(controller1).createProposalWithControllers(owner.address, 1, 0, newDidDocument, []);
+    await didRegistryRouter.connect(controller1).createProposalWithControllers(owner.address, 1, 0, newDidDocument, []);
+    expect(await governance.expiryQueueLength()).to.equal(3);
+
+    const [notNeeded] = await governance.checkUpkeep("0x");
+    expect(notNeeded).to.equal(false);
+
+    await ethers.provider.send("evm_increaseTime", [400]);
+    await ethers.provider.send("evm_mine");
+
+    const abiCoder = new ethers.AbiCoder();
+    let [upkeepNeeded, performData] = await governance.checkUpkeep("0x");
+    expect(upkeepNeeded).to.equal(true);
+    expect(abiCoder.decode(["uint256"], performData)[0]).to.equal(2);
+
+    const upkeepTx = governance.performUpkeep(performData);
+    await expect(upkeepTx).to.emit(governance, "ProposalFinalized").withArgs(1, 2);
+    await expect(upkeepTx).to.emit(governance, "ProposalFinalized").withArgs(2, 2);
+    expect((await governance.governanceProcesses(0)).governanceStatus).to.equal(0);
+    expect(await governance.expiryQueueLength()).to.equal(1);
+    [upkeepNeeded] = await governance.checkUpkeep("0x");
+    expect(upkeepNeeded).to.equal(false);
+
+    await ethers.provider.send("evm_increaseTime", [600]);
+    await ethers.provider.send("evm_mine");
+    [upkeepNeeded, performData] = await governance.checkUpkeep("0x");
+    expect(abiCoder.decode(["uint256"], performData)[0]).to.equal(1);
+    await governance.performUpkeep(performData);
+    expect((await governance.governanceProcesses(0)).governanceStatus).to.equal(2);
+    expect(await governance.expiryQueueLength()).to.equal(0);
+  });
+
+  it("Upkeep skips proposals that were resolved or invalidated in the meantime", async function() {
+    const governanceMethod = {
+      methodName: "SimpleVoting",
+      controllers: [controller1.address, controller2.address, controller3.address],
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [600],
+      stringArgs: ["arg1"],
+      boolArgs: [true],
+      governanceMethodType: 0, verifierContracts: [], issuers: [], expiresAt: 0, blockedUntil: 0, editRightsLevel: 0
+    };
+    await didRegistry.connect(owner).createDIDDocument("publicKey1", "authMethod1", [governanceMethod]);
+    for (let i = 0; i < 3; i++) {
+      const newDidDocument = {
+        owner: owner.address,
+        publicKey: `newPublicKey${i}`,
+        authenticationMethod: "newAuthMethod",
+        lastChanged: await ethers.provider.getBlockNumber()
+      };
+      await didRegistryRouter.connect(controller1).createProposalWithControllers(
+        owner.address, 0, 0, newDidDocument, [governanceMethod]
+      );
+    }
+    // proposal 0 gets rejected by votes before it expires, proposal 1 is ahead when its period ends
+    await governance.connect(controller1).vote(0, false);
+    await governance.connect(controller2).vote(0, false);
+    await governance.connect(controller1).vote(1, true);
+
+    await ethers.provider.send("evm_increaseTime", [900]);
+    await ethers.provider.send("evm_mine");
+
+    const abiCoder = new ethers.AbiCoder();
+    const [upkeepNeeded, performData] = await governance.checkUpkeep("0x");
+    expect(upkeepNeeded).to.equal(true);
+    expect(abiCoder.decode(["uint256"], performData)[0]).to.equal(3);
+
+    // approving proposal 1 invalidates proposal 2 in the registry, the upkeep must not revert on it
+    const upkeepTx = governance.performUpkeep(performData);
+    await expect(upkeepTx).to.emit(governance, "ProposalFinalized").withArgs(1, 1);
+    await expect(upkeepTx).to.emit(governance, "ProposalFinalized").withArgs(2, 2);
+    expect(await governance.expiryQueueLength()).to.equal(0);
+    expect((await didRegistry.didDocuments(owner.address)).publicKey).to.equal("newPublicKey1");
+  });
+
+  it("Only the registry initiates governance processes", async function() {
+    await expect(
+      governance.connect(other).initiateGovernanceProcess(0, 0, owner.address, 0, other.address)
+    ).to.be.revertedWith("Only DIDRegistry can call this function");
+  });
+
+  it("Upkeep drops the stale entry of a process that was initiated again", async function() {
+    const governanceMethod = {
+      methodName: "SimpleVoting",
+      controllers: [controller1.address, controller2.address, controller3.address],
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [300],
+      stringArgs: ["arg1"],
+      boolArgs: [true],
+      governanceMethodType: 0, verifierContracts: [], issuers: [], expiresAt: 0, blockedUntil: 0, editRightsLevel: 0
+    };
+    await didRegistry.connect(owner).createDIDDocument("publicKey1", "authMethod1", [governanceMethod]);
+    for (let i = 0; i < 3; i++) {
+      const newDidDocument = {
+        owner: owner.address,
+        publicKey: `newPublicKey${i}`,
+        authenticationMethod: "newAuthMethod",
+        lastChanged: await ethers.provider.getBlockNumber()
+      };
+      await didRegistryRouter.connect(controller1).createProposalWithControllers(
+        owner.address, 0, 0, newDidDocument, [governanceMethod]
+      );
+    }
+
+    // the registry starts process 1 again, its first heap entry expires before the process does
+    await ethers.provider.send("evm_increaseTime", [200]);
+    await ethers.provider.send("evm_mine");
+    await ethers.provider.send("hardhat_setBalance", [didRegistry.target, "0x56BC75E2D63100000"]);
+    const registrySigner = await ethers.getImpersonatedSigner(didRegistry.target);
+    await governance.connect(registrySigner).initiateGovernanceProcess(1, 1, owner.address, 0, controller1.address);
+    expect(await governance.expiryQueueLength()).to.equal(4);
+
+    await ethers.provider.send("evm_increaseTime", [200]);
+    await ethers.provider.send("evm_mine");
+    const abiCoder = new ethers.AbiCoder();
+    let [upkeepNeeded, performData] = await governance.checkUpkeep("0x");
+    expect(upkeepNeeded).to.equal(true);
+    expect(abiCoder.decode(["uint256"], performData)[0]).to.equal(3);
+
+    // the stale entry of process 1 must not revert the batch, processes 0 and 2 are still finalized
+    const upkeepTx = governance.performUpkeep(performData);
+    await expect(upkeepTx).to.emit(governance, "ProposalFinalized").withArgs(0, 2);
+    await expect(upkeepTx).to.emit(governance, "ProposalFinalized").withArgs(2, 2);
+    expect((await governance.governanceProcesses(1)).governanceStatus).to.equal(0);
+    expect(await governance.expiryQueueLength()).to.equal(1);
+
+    await ethers.provider.send("evm_increaseTime", [200]);
+    await ethers.provider.send("evm_mine");
+    [upkeepNeeded, performData] = await governance.checkUpkeep("0x");
+    await expect(governance.performUpkeep(performData))
+      .to.emit(governance, "ProposalFinalized").withArgs(1, 2);
+    expect(await governance.expiryQueueLength()).to.equal(0);
+  });
+
 });
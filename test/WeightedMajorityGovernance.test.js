@@ -578,4 +578,159 @@ describe("WeightedMajorityGovernance", function() {
       )
     ).to.be.revertedWith("Invalid governance method configuration");
   });
+
+  async function signVote(signer, proposalId, approve) {
+    const proposalHash = await governance.getProposalHash(proposalId);
+    const messageHash = ethers.keccak256(
+      ethers.solidityPacked(["bytes32", "bool"], [proposalHash, approve])
+    );
+    return signer.signMessage(ethers.getBytes(messageHash));
+  }
+
+  async function createControllerProposal() {
+    const governanceMethod = {
+      methodName: "SimpleVoting",
+      controllers: [controller1.address, controller2.address, controller3.address],
+      contractAddres: governance.target,
+      contractPublicKey: "publicKey123",
+      intArgs: [3, 2, 3, 5, 5],
+      stringArgs: ["arg1"],
+      boolArgs: [true],
+      governanceMethodType: 0, verifierContracts: [], issuers: [], expiresAt: 0, blockedUntil: 0, editRightsLevel: 0
+    };
+
+    await didRegistry.connect(owner).createDIDDocument("publicKey1", "authMethod1", [governanceMethod]);
+
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: await ethers.provider.getBlockNumber()
+    };
+
+    await didRegistryRouter.connect(controller1).createProposalWithControllers(owner.address, 0, 0, newDidDocument, []);
+  }
+
+  it("Approve a proposal with one batch of signed controller votes", async function() {
+    await createControllerProposal();
+
+    // controller1 and controller3 have weight 3 each, 5 is required
+    const votes = [
+      { address: controller1.address, index: 0, signature: await signVote(controller1, 0, true) },
+      { address: controller3.address, index: 2, signature: await signVote(controller3, 0, true) }
+    ];
+    votes.sort((a, b) => a.address.toLowerCase().localeCompare(b.address.toLowerCase()));
+
+    // anyone can submit the signed votes
+    await governance.connect(other).submitControllerVotes(
+      0,
+      votes.map(v => v.address),
+      votes.map(v => v.index),
+      votes.map(() => true),
+      votes.map(v => v.signature)
+    );
+
+    const proposal = await governance.governanceProcesses(0);
+    expect(proposal.yesVotes).to.equal(6);
+    expect(await governance.isApproved(0)).to.equal(true);
+    const did = await didRegistry.didDocuments(owner.address);
+    expect(did.publicKey).to.equal("newPublicKey");
+
+    await expect(governance.connect(controller2).voteWithController(0, true, 1)).to.be.revertedWith(
+      "GovernanceProcess already approved"
+    );
+  });
+
+  it("Should count batched votes together with single votes", async function() {
+    await createControllerProposal();
+
+    await governance.connect(controller2).voteWithController(0, true, 1);
+    await governance.connect(other).submitControllerVotes(
+      0, [controller1.address], [0], [true], [await signVote(controller1, 0, true)]
+    );
+
+    const proposal = await governance.governanceProcesses(0);
+    expect(proposal.yesVotes).to.equal(5);
+    expect(await governance.isApproved(0)).to.equal(true);
+  });
+
+  it("Should reject batched votes that are unsorted, forged or repeated", async function() {
+    await createControllerProposal();
+
+    const votes = [
+      { address: controller1.address, index: 0, signature: await signVote(controller1, 0, true) },
+      { address: controller2.address, index: 1, signature: await signVote(controller2, 0, true) }
+    ];
+    votes.sort((a, b) => b.address.toLowerCase().localeCompare(a.address.toLowerCase()));
+
+    await expect(governance.submitControllerVotes(
+      0,
+      votes.map(v => v.address),
+      votes.map(v => v.index),
+      [true, true],
+      votes.map(v => v.signature)
+    )).to.be.revertedWith("Voters must be in ascending order");
+
+    await expect(governance.submitControllerVotes(
+      0, [controller2.address], [1], [true], [await signVote(other, 0, true)]
+    )).to.be.revertedWith("Invalid vote signature");
+
+    await expect(governance.submitControllerVotes(
+      0, [controller2.address], [1], [true], [await signVote(controller2, 0, false)]
+    )).to.be.revertedWith("Invalid vote signature");
+
+    await governance.connect(controller2).voteWithController(0, true, 1);
+    await expect(governance.submitControllerVotes(
+      0, [controller2.address], [1], [true], [await signVote(controller2, 0, true)]
+    )).to.be.revertedWith("Controller already voted");
+  });
+
+  it("Approve a proposal with one batch of token votes", async function() {
+    const simpleGovMethod = {
+      methodName: "WheightedMajorityGovernance with Token",
+      controllers: [],
+      contractAddres: governance.target,
+      contractPublicKey: "dddd",
+      intArgs: [25, 25],
+      stringArgs: ["xd"],
+      boolArgs: [false],
+      governanceMethodType: 1, // Token governanceMethodType
+      verifierContracts: [],
+      issuers: [issuer1.address],
+      expiresAt: 0, blockedUntil: 0, editRightsLevel: 0
+    }
+    await didRegistry.connect(controller1).createDIDDocument("publicKey1", "authMethod1", [simpleGovMethod]);
+
+    const proposalTokenSignature = await issuer1.signMessage(ethers.toBeArray(hashStringToken("access")))
+    const newDidDocument = {
+      owner: owner.address,
+      publicKey: "newPublicKey",
+      authenticationMethod: "newAuthMethod",
+      lastChanged: 2222
+    };
+    await didRegistryRouter.connect(controller1).createProposalWithToken(
+      controller1.address, 0, newDidDocument, [simpleGovMethod], 0, "access", proposalTokenSignature
+    );
+
+    const votes = [];
+    for (const holder of [controller1, controller2]) {
+      votes.push({
+        ownerAddress: holder.address,
+        weight: 20,
+        approve: true,
+        tokenSignature: await issuer1.signMessage(ethers.toBeArray(hashAddressWeightToken(holder.address, 20)))
+      });
+    }
+    votes.sort((a, b) => a.ownerAddress.toLowerCase().localeCompare(b.ownerAddress.toLowerCase()));
+
+    await governance.connect(other).submitTokenVotes(0, votes, issuer1.address, 0);
+
+    expect(await governance.isApproved(0)).to.equal(true);
+    const updatedDid = await didRegistry.didDocuments(controller1.address)
+    expect(updatedDid.publicKey).to.equal(newDidDocument.publicKey);
+
+    await expect(governance.voteWithToken(
+      0, true, 20, controller1.address, votes[0].tokenSignature, issuer1.address, 0
+    )).to.be.revertedWith("GovernanceProcess already approved");
+  });
 });
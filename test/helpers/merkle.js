@@ -0,0 +1,28 @@
+const { ethers } = require("hardhat");
+
+// same tree as scripts/merkle_controllers.py: sorted keccak256(abi.encode(address)) leaves, sorted pair hashing
+function controllersMerkleTree(addresses) {
+  const leaf = (address) => ethers.keccak256(ethers.AbiCoder.defaultAbiCoder().encode(["address"], [address]));
+  const hashPair = (a, b) => ethers.keccak256(ethers.concat(a < b ? [a, b] : [b, a]));
+  const levels = [addresses.map(leaf).sort()];
+  while (levels[levels.length - 1].length > 1) {
+    const level = levels[levels.length - 1];
+    const next = [];
+    for (let i = 0; i < level.length; i += 2) {
+      next.push(i + 1 < level.length ? hashPair(level[i], level[i + 1]) : level[i]);
+    }
+    levels.push(next);
+  }
+  const proof = (address) => {
+    let index = levels[0].indexOf(leaf(address));
+    const siblings = [];
+    for (const level of levels.slice(0, -1)) {
+      if ((index ^ 1) < level.length) siblings.push(level[index ^ 1]);
+      index >>= 1;
+    }
+    return siblings;
+  };
+  return { root: levels[levels.length - 1][0], proof };
+}
+
+module.exports = { controllersMerkleTree };